@@ -1,19 +1,341 @@
 #!/usr/bin/python3
 
 import json
+import os
+import time
+# timed from here, the import of the app is a startup phase (/api/v1/admin/startup)
+_import_started = time.perf_counter()
+
 from datetime import datetime
-from flask import Flask, jsonify, request, abort
+from flask import Flask, Response, jsonify, request, abort, g
+from werkzeug.middleware.proxy_fix import ProxyFix
 from models.city import City
 from models.country import Country
 from models.user import User
 from models.amenity import Amenity
 from models.place import Place
 from models.review import Review
+from services import admission, compression, profiler
+from services.changes import feed, format_sse, MAX_WAIT, STREAM_SECONDS, KEEPALIVE_SECONDS
+from services.credentials import credentials, CredentialsBusy
+from services.sessions import sessions, bearer_token, login_required, admin_required
+from services.json_provider import HBnBJSONProvider, Timestamp
+from services.place_views import PlaceViews, parse_expand
+from services.analytics import QueryExecutor
+from services.similar_places import SimilarPlaces
+from data.file_storage import append_json_row
+from data.ids import intern_id
+from data.indexes import UpdatedAtIndex, ReviewsByPlace, EmailIndex, SqliteEmailClaims
+from data.keys import country_ids, user_ids, place_ids
+from data.leaderboards import Leaderboards, METRICS
+from data.hierarchy import GeoHierarchy
+from data.partitions import PartitionRouter, count_records
+from data.review_graph import ReviewGraph
+from data.lazy import record, timings
+from data.snapshot import Snapshotter, snapshots, read_manifest
 from data import (country_data, place_data,
                   amenity_data, review_data,
-                  user_data, city_data)
+                  user_data, city_data, place_to_amenity_data, stores)
 
 app = Flask(__name__)
+app.json = HBnBJSONProvider(app)
+
+# behind N reverse proxies (HBNB_TRUSTED_PROXIES=N) the client address is
+# taken from X-Forwarded-For, which is never trusted otherwise
+_trusted_proxies = int(os.environ.get("HBNB_TRUSTED_PROXIES", "0"))
+if _trusted_proxies:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=_trusted_proxies)
+
+# opt-in per-request profiling and the sampling endpoint (HBNB_PROFILING=1)
+profiler.init_app(app)
+
+# per-client rate limits and load shedding (HBNB_ADMISSION=1)
+admission.init_app(app)
+
+# gzip/br/zstd responses, see services/compression.py for the settings
+compression.init_app(app)
+
+# updated_at order of every store, for the ?updated_since= delta syncs
+user_updates = UpdatedAtIndex("User", user_data)
+country_updates = UpdatedAtIndex("Country", country_data)
+city_updates = UpdatedAtIndex("City", city_data)
+amenity_updates = UpdatedAtIndex("Amenity", amenity_data)
+place_updates = UpdatedAtIndex("Place", place_data)
+review_updates = UpdatedAtIndex("Review", review_data)
+for _index in (user_updates, country_updates, city_updates,
+               amenity_updates, place_updates, review_updates):
+    feed.subscribe(_index.on_change)
+
+# bloom filters in front of the stores for the foreign key checks of the models
+for _checker in (country_ids, user_ids, place_ids):
+    feed.subscribe(_checker.on_change)
+
+# --- response rows of the collection GETs and the multi-gets ---
+def user_row(v):
+    """ a user as returned by the API """
+    return {
+        "id": v['id'],
+        "first_name": v['first_name'],
+        "last_name": v['last_name'],
+        "email": v['email'],
+        "created_at": Timestamp(v['created_at']),
+        "updated_at": Timestamp(v['updated_at'])
+    }
+
+
+def country_row(v):
+    """ a country as returned by the API """
+    return {
+        "id": v['id'],
+        "name": v['name'],
+        "code": v['code'],
+        "created_at": Timestamp(v['created_at']),
+        "updated_at": Timestamp(v['updated_at'])
+    }
+
+
+def city_row(v):
+    """ a city as returned by the API """
+    return {
+        "id": v['id'],
+        "name": v['name'],
+        "country_id": v['country_id'],
+        "created_at": Timestamp(v['created_at']),
+        "updated_at": Timestamp(v['updated_at'])
+    }
+
+
+def amenity_row(v):
+    """ an amenity as returned by the API """
+    return {
+        "id": v['id'],
+        "name": v['name'],
+        "created_at": Timestamp(v['created_at']),
+        "updated_at": Timestamp(v['updated_at'])
+    }
+
+
+def place_row(v):
+    """ a place as returned by the listings """
+    return {
+        "id": v['id'],
+        "name": v['name'],
+        "city_id": v['city_id'],
+        "price_per_night": v['price_per_night'],
+        "max_guests": v['max_guests'],
+        "created_at": Timestamp(v['created_at']),
+        "updated_at": Timestamp(v['updated_at'])
+    }
+
+
+def review_row(review):
+    """ a review as returned by the API """
+    return {
+        "id": review['id'],
+        "commentor_user_id": review['commentor_user_id'],
+        "place_id": review['place_id'],
+        "rating": review['rating'],
+        "feedback": review['feedback'],
+        "created_at": Timestamp(review['created_at']),
+        "updated_at": Timestamp(review['updated_at'])
+    }
+
+
+# store and row builder of every entity that can be fetched by ids
+MULTI_GET = {
+    "users": (user_data, user_row),
+    "countries": (country_data, country_row),
+    "cities": (city_data, city_row),
+    "amenities": (amenity_data, amenity_row),
+    "places": (place_data, place_row),
+    "reviews": (review_data, review_row),
+}
+
+# longest id list of a multi-get
+MAX_IDS = 10000
+
+
+def _multi_get(entity, ids, row=None):
+    """
+    The records of a list of ids in one response.
+
+    The rows come in the order of the ids (each id once) and the ids that
+    don't exist are listed in "missing". `row` replaces the row builder of
+    the entity.
+    """
+    if not isinstance(ids, list) or not all(isinstance(k, str) for k in ids):
+        abort(400, "ids must be a list of ids")
+    if len(ids) > MAX_IDS:
+        abort(400, f"At most {MAX_IDS} ids per request")
+    store, default_row = MULTI_GET[entity]
+    row = row or default_row
+    data = []
+    missing = []
+    for k in dict.fromkeys(ids):
+        v = store.get(k)
+        if v is None:
+            missing.append(k)
+            continue
+        try:
+            data.append(row(v))
+        except KeyError as e:
+            print(f"KeyError: Missing key {e} in {entity} data for id {k}")
+            missing.append(k)
+    return jsonify({"data": data, "missing": missing})
+
+
+def _ids():
+    """ the ?ids=a,b,c list of a collection GET, None without it """
+    value = request.args.get("ids")
+    if value is None:
+        return None
+    return [k.strip() for k in value.split(",") if k.strip()]
+
+
+@app.route('/api/v1/<entity>/lookup', methods=["POST"])
+def lookup(entity):
+    """ multi-get for id lists too long for ?ids=, body {"ids": [...]} """
+    if entity not in MULTI_GET:
+        abort(404)
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or 'ids' not in data:
+        abort(400, "Missing ids")
+    if entity == "places":
+        expand = _expand()
+        return _multi_get(entity, data['ids'],
+                          lambda v: place_views.expand(place_row(v), v['id'], expand))
+    return _multi_get(entity, data['ids'])
+
+
+# reviews of every place, then the ?expand= views of the places built on them
+reviews_by_place = ReviewsByPlace(review_data)
+feed.subscribe(reviews_by_place.on_change)
+# who reviewed what, for the co-review queries
+review_graph = ReviewGraph(review_data)
+feed.subscribe(review_graph.on_change)
+place_views = PlaceViews(place_data, city_data, country_data, user_data, amenity_data,
+                         place_to_amenity_data, reviews_by_place)
+feed.subscribe(place_views.on_change)
+# "places like this one" by amenities, price, capacity and location
+similar_places = SimilarPlaces(place_data, amenity_data, place_to_amenity_data)
+feed.subscribe(similar_places.on_change)
+# best rated, cheapest and most reviewed places per city and per country
+leaderboards = Leaderboards(place_data, city_data, reviews_by_place)
+feed.subscribe(leaderboards.on_change)
+# countries -> cities -> places with their counts, for the country summaries
+hierarchy = GeoHierarchy(country_data, city_data, place_data, reviews_by_place)
+feed.subscribe(hierarchy.on_change)
+# cities, places and reviews sharded by country, see data/partitions.py
+partitions = PartitionRouter(city_data, place_data, review_data)
+feed.subscribe(partitions.on_change)
+
+
+def _expand():
+    """ the ?expand= parts asked for on a place endpoint """
+    try:
+        return parse_expand(request.args.get("expand"))
+    except ValueError as e:
+        abort(400, str(e))
+
+
+def _leaderboard(scope, group_id):
+    """ the ?by=&limit= leaderboard of a city or a country """
+    metric = request.args.get("by", "rating")
+    if metric not in METRICS:
+        abort(400, f"by must be one of {', '.join(METRICS)}")
+    try:
+        limit = int(request.args.get("limit", 10))
+    except ValueError:
+        abort(400, "limit must be an integer")
+    if not 0 < limit <= 100:
+        abort(400, "limit must be between 1 and 100")
+    expand = _expand()
+
+    data = []
+    for place_id in leaderboards.top(scope, group_id, metric, limit):
+        v = place_data.get(place_id)
+        if v is not None:
+            data.append(place_views.expand(place_row(v), place_id, expand))
+    return jsonify(data)
+
+# users by email for the logins (unique across the workers through the shared
+# claims), and the sessions of the deleted users revoked
+users_by_email = EmailIndex(user_data, claims=SqliteEmailClaims(
+    os.environ.get("HBNB_EMAILS_SQLITE_PATH")))
+feed.subscribe(users_by_email.on_change)
+feed.subscribe(sessions.on_change)
+
+# point-in-time backups of the stores, see data/snapshot.py
+snapshotter = Snapshotter(feed)
+feed.subscribe(snapshotter.on_change)
+
+
+def _updated_since():
+    """ the ?updated_since= timestamp of a collection GET, None without it """
+    value = request.args.get("updated_since")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        abort(400, "updated_since must be a timestamp")
+
+
+def _k_arg(default=10, maximum=100):
+    """ the ?k= number of results of a top-k endpoint """
+    try:
+        k = int(request.args.get("k", default))
+    except ValueError:
+        abort(400, "k must be an integer")
+    if not 0 < k <= maximum:
+        abort(400, f"k must be between 1 and {maximum}")
+    return k
+
+
+def _changed(index, store, since):
+    """
+    Records of a store updated after `since`, all of them if since is None.
+    Only the changed records are looked at, so a delta sync costs what changed.
+    """
+    if since is None:
+        return store.values()
+    return [store[k] for k in index.updated_since(since) if k in store]
+
+
+def _listing(data, index, since, records=()):
+    """
+    The response of a collection GET.
+
+    A plain list without ?updated_since=, otherwise the changed rows with the
+    ids deleted since then and the watermark to send as the next updated_since.
+    Both carry the watermark in an X-Watermark header too: updated_since has to
+    come from a watermark, not from the updated_at of the rows, which can be
+    older than what this process remembers deletes for and then gets a 410.
+
+    The deletes are not scoped: a delta of a filtered listing (the cities of a
+    country) also lists ids deleted outside the filter, which the client simply
+    does not have.
+    """
+    if since is None:
+        watermark = index.watermark()
+        response = jsonify(data)
+        response.headers["X-Watermark"] = repr(watermark)
+        return response
+    try:
+        deleted = index.deleted_since(since)
+    except LookupError as e:
+        # the client missed deletes we no longer remember and has to reload in full
+        return jsonify({"message": str(e), "horizon": index.horizon}), 410
+    watermark = max([since] + [v['updated_at'] for v in records]
+                    + [deleted_at for deleted_at, _ in deleted])
+    response = jsonify({
+        "data": data,
+        "deleted": [{"id": k, "deleted_at": deleted_at} for deleted_at, k in deleted],
+        "watermark": watermark
+    })
+    response.headers["X-Watermark"] = repr(watermark)
+    return response
+
 
 @app.route('/')
 def hello_world():
@@ -37,20 +359,23 @@ def hello_world_post():
 @app.route('/api/v1/users', methods=["GET"])
 def users_get():
     """returns Users"""
+    ids = _ids()
+    if ids is not None:
+        # ?ids=a,b,c resolves a list of ids in one request
+        return _multi_get("users", ids)
+    if 'email' in request.args:
+        # ?email= finds a user through the email index, case insensitive
+        user_id = users_by_email.get(request.args['email'])
+        return jsonify([user_row(user_data[user_id])] if user_id in user_data else [])
+
     data = []
+    since = _updated_since()
+    records = _changed(user_updates, user_data, since)
 
-    for _, v in user_data.items():
-        data.append({
-            "id": v['id'],
-            "first_name": v['first_name'],
-            "last_name": v['last_name'],
-            "email": v['email'],
-            "password": v['password'],
-            "created_at": datetime.fromtimestamp(v['created_at']),
-            "updated_at": datetime.fromtimestamp(v['updated_at'])
-        })
+    for v in records:
+        data.append(user_row(v))
 
-    return jsonify(data)
+    return _listing(data, user_updates, since, records)
 
 @app.route('/api/v1/users/<user_id>', methods=["GET"])
 def users_specific_get(user_id):
@@ -62,15 +387,7 @@ def users_specific_get(user_id):
         return "User not found!"
 
     v = user_data[user_id]
-    data.append({
-        "id": v['id'],
-        "first_name": v['first_name'],
-        "last_name": v['last_name'],
-        "email": v['email'],
-        "password": v['password'],
-        "created_at": datetime.fromtimestamp(v['created_at']),
-        "updated_at": datetime.fromtimestamp(v['updated_at'])
-    })
+    data.append(user_row(v))
     return jsonify(data)
 
 @app.route('/api/v1/users', methods=["POST"])
@@ -91,7 +408,15 @@ def users_post():
         abort(400, "Missing email")
     if 'password' not in data:
         abort(400, "Missing password")
+    if not isinstance(data['email'], str):
+        abort(400, "Invalid email")
+
+    # claimed before the user is created, so concurrent signups can't share an email
+    reservation = users_by_email.reserve(data['email'])
+    if reservation is None:
+        abort(409, "Email already registered")
 
+    u = None
     try:
         u = User(first_name=data["first_name"],
                  last_name=data["last_name"],
@@ -99,17 +424,25 @@ def users_post():
                  password=data["password"])
     except ValueError as exc:
         return repr(exc) + "\n"
+    except CredentialsBusy as exc:
+        return _busy(exc)
+    finally:
+        if u is None:
+            users_by_email.release(data['email'], reservation)
 
     # add new user data to user_data
     # note that the created_at and updated_at are using timestamps
+    # the password is the salted hash made by the User model
     user_data[u.id] = {
         "id": u.id,
         "first_name": u.first_name,
         "last_name": u.last_name,
         "email": u.email,
+        "password": u.password,
         "created_at": u.created_at,
         "updated_at": u.updated_at
     }
+    feed.publish("User", "create", u.id, user_data[u.id])
 
     # note that the created_at and updated_at are using readable datetimes
     attribs = {
@@ -117,12 +450,74 @@ def users_post():
         "first_name": u.first_name,
         "last_name": u.last_name,
         "email": u.email,
-        "created_at": datetime.fromtimestamp(u.created_at),
-        "updated_at": datetime.fromtimestamp(u.updated_at)
+        "created_at": Timestamp(u.created_at),
+        "updated_at": Timestamp(u.updated_at)
     }
 
     return jsonify(attribs)
 
+# --- AUTH ---
+def _busy(exc):
+    """ 503 for a request that would queue too many password hashes """
+    return jsonify({"message": str(exc)}), 503, {"Retry-After": "1"}
+
+
+def _find_user_by_email(email):
+    """ the user record with this email, None if there is none """
+    user_id = users_by_email.get(email)
+    return user_data.get(user_id) if user_id is not None else None
+
+
+@app.route('/api/v1/auth/login', methods=["POST"])
+def login():
+    """ checks the email and password of a user and starts a session """
+    # curl -X POST [URL]/api/v1/auth/login /
+    #    -H "Content-Type: application/json" -d '{"email": "...", "password": "..."}'
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('email'), str) \
+            or not isinstance(data.get('password'), str):
+        abort(400, "Missing email or password")
+
+    user = _find_user_by_email(data['email'])
+    try:
+        if user is None or 'password' not in user:
+            # as slow as a wrong password, so the timing doesn't reveal the emails
+            ok, new_hash = credentials.verify_unknown(data['password'])
+        else:
+            ok, new_hash = credentials.verify(data['password'], user['password'])
+    except CredentialsBusy as exc:
+        return _busy(exc)
+    if not ok:
+        return jsonify({"message": "Invalid email or password"}), 401
+
+    if new_hash is not None:
+        # plaintext or outdated parameters, store the hash with the current ones
+        current = user_data.get(user['id'])
+        if current is not None and current.get('password') == user['password']:
+            user_data[user['id']] = {**current, "password": new_hash}
+            feed.publish("User", "update", user['id'], user_data[user['id']], current)
+
+    token, expires = sessions.issue(user['id'])
+    return jsonify({"token": token, "expires_at": Timestamp(expires), "user": user_row(user)})
+
+
+@app.route('/api/v1/auth/logout', methods=["POST"])
+@login_required
+def logout():
+    """ ends the session of the Bearer token """
+    sessions.revoke(bearer_token())
+    return '', 204
+
+
+@app.route('/api/v1/auth/me', methods=["GET"])
+@login_required
+def auth_me():
+    """ returns the user of the Bearer token """
+    if g.user_id not in user_data:
+        abort(401, "A valid Bearer token is required")
+    return jsonify(user_row(user_data[g.user_id]))
+
+
 @app.route('/api/v1/users/<user_id>', methods=["PUT"])
 def users_put(user_id):
     """ updates existing user data using specified id """
@@ -139,24 +534,29 @@ def users_put(user_id):
     if user_id not in user_data:
         abort(400, f"User not found for id {user_id}")
 
-    u = user_data[user_id]
+    previous = user_data[user_id]
+    # records are replaced, never modified in place, so that snapshots and
+    # change events keep the values they were taken with
+    u = dict(previous)
 
     # modify the values
     for k, v in data.items():
         # only first_name and last_name are allowed to be modified
         if k in ["first_name", "last_name"]:
             u[k] = v
+    u["updated_at"] = datetime.now().timestamp()
 
     # update user_data with the new name - print user_data out to confirm it if you want
     user_data[user_id] = u
+    feed.publish("User", "update", user_id, u, previous)
 
     attribs = {
         "id": u["id"],
         "first_name": u["first_name"],
         "last_name": u["last_name"],
         "email": u["email"],
-        "created_at": datetime.fromtimestamp(u["created_at"]),
-        "updated_at": datetime.fromtimestamp(u["updated_at"])
+        "created_at": Timestamp(u["created_at"]),
+        "updated_at": Timestamp(u["updated_at"])
     }
 
     # print out the updated user details
@@ -171,7 +571,8 @@ def delete_user(user_id):
         abort(404, f"User not found for id {user_id}")
 
     # Remove the user from the data store
-    del user_data[user_id]
+    previous = user_data.pop(user_id)
+    feed.publish("User", "delete", user_id, previous=previous)
 
     # Return a 204 No Content response to indicate successful deletion
     return '', 204
@@ -210,14 +611,15 @@ def countries_post():
         "created_at": c.created_at,
         "updated_at": c.updated_at
     }
+    feed.publish("Country", "create", c.id, country_data[c.id])
 
     # note that the created_at and updated_at are using readable datetimes
     attribs = {
         "id": c.id,
         "name": c.name,
         "code": c.code,
-        "created_at": datetime.fromtimestamp(c.created_at),
-        "updated_at": datetime.fromtimestamp(c.updated_at)
+        "created_at": Timestamp(c.created_at),
+        "updated_at": Timestamp(c.updated_at)
     }
 
     return jsonify(attribs)
@@ -225,18 +627,19 @@ def countries_post():
 @app.route('/api/v1/countries', methods=["GET"])
 def countries_get():
     """ returns countires data """
+    ids = _ids()
+    if ids is not None:
+        # ?ids=a,b,c resolves a list of ids in one request
+        return _multi_get("countries", ids)
+
     data = []
+    since = _updated_since()
+    records = _changed(country_updates, country_data, since)
 
-    for _, v in country_data.items():
-        data.append({
-            "id": v['id'],
-            "name": v['name'],
-            "code": v['code'],
-            "created_at": datetime.fromtimestamp(v['created_at']),
-            "updated_at": datetime.fromtimestamp(v['updated_at'])
-        })
+    for v in records:
+        data.append(country_row(v))
 
-    return jsonify(data)
+    return _listing(data, country_updates, since, records)
 
 @app.route('/api/v1/countries/<country_code>', methods=["GET"])
 def countries_specific_get(country_code):
@@ -249,8 +652,8 @@ def countries_specific_get(country_code):
         "id": data['id'],
         "name": data['name'],
         "code": data['code'],
-        "created_at": datetime.fromtimestamp(data['created_at']),
-        "updated_at": datetime.fromtimestamp(data['updated_at'])
+        "created_at": Timestamp(data['created_at']),
+        "updated_at": Timestamp(data['updated_at'])
     }
 
     return jsonify(c)
@@ -276,21 +679,26 @@ def countries_put(country_code):
     if not c:
         abort(400, f"Country not found for code {country_code}")
 
+    previous = c
+    c = dict(previous)
+
     # modify the values
     # only name is allowed to be modified
     for k, v in data.items():
         if k in ["name"]:
             c[k] = v
+    c["updated_at"] = datetime.now().timestamp()
 
     # update country_data with the new name - print country_data out to confirm it if you want
     country_data[c['id']] = c
+    feed.publish("Country", "update", c['id'], c, previous)
 
     attribs = {
         "id": c["id"],
         "name": c["name"],
         "code": c["code"],
-        "created_at": datetime.fromtimestamp(c["created_at"]),
-        "updated_at": datetime.fromtimestamp(c["updated_at"])
+        "created_at": Timestamp(c["created_at"]),
+        "updated_at": Timestamp(c["updated_at"])
     }
 
     # print out the updated user details
@@ -300,23 +708,49 @@ def countries_put(country_code):
 def countries_specific_cities_get(country_code):
     """ returns cities data of specified country """
     data = []
-    wanted_country_id = ""
-
-    for _, v in country_data.items():
-        if v['code'] == country_code:
-            wanted_country_id = v['id']
-
-    for _, v in city_data.items():
-        if v['country_id'] == wanted_country_id:
-            data.append({
-                "id": v['id'],
-                "name": v['name'],
-                "country_id": v['country_id'],
-                "created_at": datetime.fromtimestamp(v['created_at']),
-                "updated_at": datetime.fromtimestamp(v['updated_at'])
-            })
-
-    return jsonify(data)
+    since = _updated_since()
+    wanted_country_id = hierarchy.country_id(country_code)
+
+    if since is None:
+        records = [city_data[k] for k in hierarchy.city_ids(wanted_country_id)
+                   if k in city_data]
+    else:
+        records = [v for v in _changed(city_updates, city_data, since)
+                   if v['country_id'] == wanted_country_id]
+    for v in records:
+        data.append(city_row(v))
+
+    return _listing(data, city_updates, since, records)
+
+@app.route('/api/v1/countries/<country_code>/top', methods=["GET"])
+def countries_specific_top_get(country_code):
+    """ returns the leaderboard of the places of a country """
+    country_id = hierarchy.country_id(country_code)
+    if country_id is None:
+        abort(404, f"Country not found for code {country_code}")
+    return _leaderboard("country", country_id)
+
+@app.route('/api/v1/countries/<country_code>/summary', methods=["GET"])
+def countries_specific_summary_get(country_code):
+    """ returns the number of cities, places and reviews of a country """
+    country_id = hierarchy.country_id(country_code)
+    if country_id is None:
+        abort(404, f"Country not found for code {country_code}")
+
+    summary = hierarchy.summary(country_id)
+    cities = []
+    for city_id, totals in summary.pop("cities").items():
+        city = city_data.get(city_id)
+        if city is not None:
+            cities.append(dict({"id": city_id, "name": city['name']}, **totals))
+    cities.sort(key=lambda c: c["name"])
+
+    country = country_data[country_id]
+    return jsonify(dict({
+        "id": country_id,
+        "name": country['name'],
+        "code": country['code']
+    }, **summary, cities=cities))
 
 # Create the rest of the endpoints for:
 #  - City
@@ -334,18 +768,19 @@ def countries_specific_cities_get(country_code):
 @app.route('/api/v1/cities', methods=["GET"])
 def cities_get():
     """returns Cities"""
+    ids = _ids()
+    if ids is not None:
+        # ?ids=a,b,c resolves a list of ids in one request
+        return _multi_get("cities", ids)
+
     data = []
+    since = _updated_since()
+    records = _changed(city_updates, city_data, since)
 
-    for _, v in city_data.items():
-        data.append({
-            "id": v['id'],
-            "name": v['name'],
-            "country_id": v['country_id'],
-            "created_at": datetime.fromtimestamp(v['created_at']),
-            "updated_at": datetime.fromtimestamp(v['updated_at'])
-        })
+    for v in records:
+        data.append(city_row(v))
 
-    return jsonify(data)
+    return _listing(data, city_updates, since, records)
 
 @app.route('/api/v1/cities/<city_id>', methods=["GET"])
 def cities_specific_get(city_id):
@@ -360,11 +795,18 @@ def cities_specific_get(city_id):
         "id": v['id'],
         "name": v['name'],
         "country_id": v['country_id'],
-        "created_at": datetime.fromtimestamp(v['created_at']),
-        "updated_at": datetime.fromtimestamp(v['updated_at'])
+        "created_at": Timestamp(v['created_at']),
+        "updated_at": Timestamp(v['updated_at'])
     })
     return jsonify(data)
 
+@app.route('/api/v1/cities/<city_id>/top', methods=["GET"])
+def cities_specific_top_get(city_id):
+    """ returns the leaderboard of the places of a city, e.g. ?by=price&limit=5 """
+    if city_id not in city_data:
+        abort(404, "City not found")
+    return _leaderboard("city", city_id)
+
 
 @app.route('/api/v1/cities', methods=["POST"])
 def cities_post():
@@ -407,13 +849,14 @@ def cities_post():
         "created_at": new_city.created_at,
         "updated_at": new_city.updated_at
     }
+    feed.publish("City", "create", new_city.id, city_data[new_city.id])
 
     return jsonify({
         "id": new_city.id,
         "name": new_city.name,
         "country_id": new_city.country_id,
-        "created_at": datetime.fromtimestamp(new_city.created_at),
-        "updated_at": datetime.fromtimestamp(new_city.updated_at)
+        "created_at": Timestamp(new_city.created_at),
+        "updated_at": Timestamp(new_city.updated_at)
     }), 201
 
 
@@ -428,30 +871,32 @@ def cities_put(city_id):
         return jsonify({"message": "City not found"}), 404
 
     # Validate country_code
-    country_id = None
-    for _, v in country_data.items():
-        if v['code'] == data['country_code']:
-            country_id = v['id']
-            break
+    country_id = hierarchy.country_id(data['country_code'])
 
     if not country_id:
         abort(400, "Invalid country_code")
 
     # Ensure city names are unique within the same country
-    for _, v in city_data.items():
-        if v['country_id'] == country_id and v['name'] == data['name'] and v['id'] != city_id:
+    for k in hierarchy.city_ids(country_id):
+        v = city_data.get(k)
+        if v is not None and v['name'] == data['name'] and k != city_id:
             abort(409, "City name must be unique within the same country")
 
-    city_data[city_id]['name'] = data['name']
-    city_data[city_id]['country_id'] = country_id
-    city_data[city_id]['updated_at'] = datetime.now().timestamp()
+    previous = city_data[city_id]
+    city_data[city_id] = {
+        **previous,
+        'name': data['name'],
+        'country_id': country_id,
+        'updated_at': datetime.now().timestamp()
+    }
+    feed.publish("City", "update", city_id, city_data[city_id], previous)
 
     return jsonify({
         "id": city_data[city_id]['id'],
         "name": city_data[city_id]['name'],
         "country_id": city_data[city_id]['country_id'],
-        "created_at": datetime.fromtimestamp(city_data[city_id]['created_at']),
-        "updated_at": datetime.fromtimestamp(city_data[city_id]['updated_at'])
+        "created_at": Timestamp(city_data[city_id]['created_at']),
+        "updated_at": Timestamp(city_data[city_id]['updated_at'])
     })
 
 
@@ -461,7 +906,8 @@ def cities_delete(city_id):
     if city_id not in city_data:
         return jsonify({"message": "City not found"}), 404
 
-    del city_data[city_id]
+    previous = city_data.pop(city_id)
+    feed.publish("City", "delete", city_id, previous=previous)
     return jsonify({"message": "City deleted successfully"}), 200
 
 
@@ -470,17 +916,19 @@ def cities_delete(city_id):
 @app.route('/api/v1/amenities', methods=["GET"])
 def amenities_get():
     """returns Amenities"""
+    ids = _ids()
+    if ids is not None:
+        # ?ids=a,b,c resolves a list of ids in one request
+        return _multi_get("amenities", ids)
+
     data = []
+    since = _updated_since()
+    records = _changed(amenity_updates, amenity_data, since)
 
-    for _, v in amenity_data.items():
-        data.append({
-            "id": v['id'],
-            "name": v['name'],
-            "created_at": datetime.fromtimestamp(v['created_at']),
-            "updated_at": datetime.fromtimestamp(v['updated_at'])
-        })
+    for v in records:
+        data.append(amenity_row(v))
 
-    return jsonify(data)
+    return _listing(data, amenity_updates, since, records)
 
 @app.route('/api/v1/amenities/<amenity_id>', methods=["GET"])
 def amenities_specific_get(amenity_id):
@@ -494,8 +942,8 @@ def amenities_specific_get(amenity_id):
     data.append({
         "id": v['id'],
         "name": v['name'],
-        "created_at": datetime.fromtimestamp(v['created_at']),
-        "updated_at": datetime.fromtimestamp(v['updated_at'])
+        "created_at": Timestamp(v['created_at']),
+        "updated_at": Timestamp(v['updated_at'])
     })
     return jsonify(data)
 
@@ -518,8 +966,13 @@ def update_amenity(amenity_id):
         if amenity['name'] == data['name'] and i != amenity_id:
             abort(409, "Amenity name must be unique")
 
-    amenity_data[amenity_id]['name'] = data['name']
-    amenity_data[amenity_id]['updated_at'] = datetime.now().timestamp()
+    previous = amenity_data[amenity_id]
+    amenity_data[amenity_id] = {
+        **previous,
+        'name': data['name'],
+        'updated_at': datetime.now().timestamp()
+    }
+    feed.publish("Amenity", "update", amenity_id, amenity_data[amenity_id], previous)
 
     return jsonify(amenity_data[amenity_id]), 200
 
@@ -530,7 +983,8 @@ def delete_amenity(amenity_id):
     if amenity_id not in amenity_data:
         return jsonify({"message": "Amenity not found"}), 404
 
-    del amenity_data[amenity_id]
+    previous = amenity_data.pop(amenity_id)
+    feed.publish("Amenity", "delete", amenity_id, previous=previous)
     return '', 204
 
 
@@ -538,47 +992,80 @@ def delete_amenity(amenity_id):
 @app.route('/api/v1/places', methods=["GET"])
 def places_get():
     """returns Places"""
-    data = []
+    expand = _expand()
+    ids = _ids()
+    if ids is not None:
+        # ?ids=a,b,c resolves a list of ids in one request
+        return _multi_get("places", ids,
+                          lambda v: place_views.expand(place_row(v), v['id'], expand))
 
-    for k, v in place_data.items():
+    data = []
+    since = _updated_since()
+    index, store = place_updates, place_data
+    if request.args.get("country") is not None:
+        # ?country=AU only reads the partition of that country
+        partition = partitions.partition(hierarchy.country_id(request.args["country"]))
+        if partition is None:
+            return _listing([], place_updates, since)
+        index, store = partition.updates["Place"], partition.records["Place"]
+    records = _changed(index, store, since)
+
+    for v in records:
+        k = v.get('id')
         try:
-            data.append({
-                "id": v['id'],
-                "name": v['name'],
-                "city_id": v['city_id'],
-                "price_per_night": v['price_per_night'],
-                "max_guests": v['max_guests'],
-                "created_at": datetime.fromtimestamp(v['created_at']),
-                "updated_at": datetime.fromtimestamp(v['updated_at'])
-            })
+            data.append(place_views.expand(place_row(v), k, expand))
         except KeyError as e:
             print(f"KeyError: Missing key {e} in place data for place_id {k}")
 
-    return jsonify(data)
+    return _listing(data, index, since, records)
 
 @app.route('/api/v1/places/<place_id>', methods=["GET"])
 def places_specific_get(place_id):
     """returns specified place"""
     data = []
+    # e.g. ?expand=city,country,host,amenities,rating to get the whole listing page at once
+    expand = _expand()
 
     if place_id not in place_data:
         return "Place not found!"
 
     v = place_data[place_id]
     try:
-        data.append({
+        data.append(place_views.expand({
             "id": v['id'],
             "name": v['name'],
             "city_id": v['city_id'],
             "price_per_night": v['price_per_night'],
             "max_guests": v['max_guests'],
-            "created_at": datetime.fromtimestamp(v['created_at']),
-            "updated_at": datetime.fromtimestamp(v['updated_at'])
-        })
+            "created_at": Timestamp(v['created_at']),
+            "updated_at": Timestamp(v['updated_at'])
+        }, place_id, expand))
     except KeyError as e:
         print(f"KeyError: Missing key {e} in place data for place_id")
     return jsonify(data)
 
+@app.route('/api/v1/places/<place_id>/similar', methods=["GET"])
+def places_specific_similar_get(place_id):
+    """returns the places most similar to the specified place"""
+    if place_id not in place_data:
+        abort(404, "Place not found")
+    k = _k_arg(maximum=similar_places.k)
+    expand = _expand()
+
+    data = []
+    for score, other in similar_places.similar(place_id, k) or ():
+        v = place_data.get(other)
+        if v is None:
+            continue
+        try:
+            row = place_views.expand(place_row(v), other, expand)
+        except KeyError as e:
+            print(f"KeyError: Missing key {e} in place data for place_id {other}")
+            continue
+        row["similarity"] = round(score, 4)
+        data.append(row)
+    return jsonify(data)
+
 
 @app.route('/api/v1/places', methods=['POST'])
 def create_place():
@@ -621,13 +1108,19 @@ def create_place():
                       price_per_night=data["price_per_night"],
                       max_guests=data["max_guests"],
                       city_id=data["city_id"],
-                      host_id=data["host_id"],
+                      host_user_id=data["host_id"],
                       amenities=data["amenities"])
-        place_data[place.id] = place
     except ValueError as e:
         return jsonify({"message": str(e)}), 400
 
-    return jsonify(place.__dict__), 201
+    # places are kept as plain records, like the ones loaded from place.json,
+    # and their amenities go to place_to_amenity_data
+    record = place.to_dict()
+    place_to_amenity_data[place.id] = record.pop("amenities")
+    place_data[place.id] = record
+    feed.publish("Place", "create", place.id, record)
+
+    return jsonify(place), 201
 
 @app.route('/api/v1/places/<place_id>', methods=['PUT'])
 def update_place(place_id):
@@ -635,58 +1128,45 @@ def update_place(place_id):
     if place_id not in place_data:
         return jsonify({"message": "Place not found"}), 404
 
-    place = place_data[place_id]
+    previous = place_data[place_id]
 
     data = request.get_json()
     if not data:
         abort(400, "No data provided")
 
-    # Update the place attributes
-    if 'name' in data:
-        place.name = data['name']
-    if 'description' in data:
-        place.description = data['description']
-    if 'address' in data:
-        place.address = data['address']
-    if 'latitude' in data:
-        place.latitude = data['latitude']
-    if 'longitude' in data:
-        place.longitude = data['longitude']
-    if 'number_of_rooms' in data:
-        place.number_of_rooms = data['number_of_rooms']
-    if 'bathrooms' in data:
-        place.bathrooms = data['bathrooms']
-    if 'price_per_night' in data:
-        place.price_per_night = data['price_per_night']
-    if 'max_guests' in data:
-        place.max_guests = data['max_guests']
-    if 'city_id' in data:
-        place.city_id = data['city_id']
-    if 'host_user_id' in data:
-        place.host_user_id = data['host_user_id']
+    # Validate the place attributes with the same checks as the Place setters
+    try:
+        changes = Place.schema.validate(data)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    for key in ("city_id", "host_user_id"):
+        if key in data:
+            changes[key] = intern_id(data[key])
     if 'amenities' in data:
-        place.amenities = data['amenities']
+        place_to_amenity_data[place_id] = list(data['amenities'])
 
     # Update the timestamp
-    place.updated_at = datetime.now().timestamp()
+    place = {**previous, **changes, "updated_at": datetime.now().timestamp()}
+    place_data[place_id] = place
+    feed.publish("Place", "update", place_id, place, previous)
 
     # Return the updated place
     return jsonify({
-        "id": place.id,
-        "name": place.name,
-        "description": place.description,
-        "address": place.address,
-        "latitude": place.latitud,
-        "longitude": place.longitude,
-        "number_of_rooms": place.number_of_rooms,
-        "bathrooms": place.bathrooms,
-        "price_per_night": place.price_per_night,
-        "max_guests": place.max_guests,
-        "city_id": place.city_id,
-        "host_user_id": place.host_user_id,
-        "amenities": place.amenities,
-        "created_at": datetime.fromtimestamp(place.created_at),
-        "updated_at": datetime.fromtimestamp(place.updated_at)
+        "id": place["id"],
+        "name": place["name"],
+        "description": place["description"],
+        "address": place["address"],
+        "latitude": place["latitude"],
+        "longitude": place["longitude"],
+        "number_of_rooms": place["number_of_rooms"],
+        "bathrooms": place["bathrooms"],
+        "price_per_night": place["price_per_night"],
+        "max_guests": place["max_guests"],
+        "city_id": place["city_id"],
+        "host_user_id": place["host_user_id"],
+        "amenities": place_to_amenity_data.get(place_id, []),
+        "created_at": Timestamp(place["created_at"]),
+        "updated_at": Timestamp(place["updated_at"])
     }), 200
 
 
@@ -699,22 +1179,53 @@ def get_reviews_by_user(user_id):
     if user_id not in user_data:
         return "User not found!"
 
-    user_reviews = [review for review in review_data.values()
+    since = _updated_since()
+    user_reviews = [review for review in _changed(review_updates, review_data, since)
                     if review['commentor_user_id'] == user_id]
     for review in user_reviews:
         try:
-            data.append({
-                "id": review['id'],
-                "commentor_user_id": review['commentor_user_id'],
-                "place_id": review['place_id'],
-                "rating": review['rating'],
-                "feedback": review['feedback'],
-                "created_at": datetime.fromtimestamp(review['created_at']),
-                "updated_at": datetime.fromtimestamp(review['updated_at'])
-            })
+            data.append(review_row(review))
         except KeyError as e:
             print(f"KeyError: Missing key {e} in review data for review_id {review['id']}")
 
+    return _listing(data, review_updates, since, user_reviews)
+
+
+@app.route('/api/v1/places/<place_id>/reviewers', methods=["GET"])
+def get_reviewers_by_place(place_id):
+    """Users who reviewed a specific place"""
+    if place_id not in place_data:
+        abort(404, "Place not found")
+    return jsonify([user_row(user_data[k]) for k in review_graph.reviewers(place_id)
+                    if k in user_data])
+
+
+@app.route('/api/v1/places/<place_id>/also_reviewed', methods=["GET"])
+def get_also_reviewed(place_id):
+    """Places also reviewed by the users who reviewed a specific place"""
+    if place_id not in place_data:
+        abort(404, "Place not found")
+    data = []
+    for other, users in review_graph.also_reviewed(place_id, _k_arg()):
+        v = place_data.get(other)
+        if v is not None:
+            data.append({"id": other, "name": v.get('name'), "reviewers": users})
+    return jsonify(data)
+
+
+@app.route('/api/v1/reviewers/top', methods=["GET"])
+def get_top_reviewers():
+    """Users with the most reviews"""
+    data = []
+    for user_id, reviews, places in review_graph.top_reviewers(_k_arg()):
+        v = user_data.get(user_id)
+        data.append({
+            "id": user_id,
+            "first_name": v['first_name'] if v else None,
+            "last_name": v['last_name'] if v else None,
+            "reviews": reviews,
+            "places": places
+        })
     return jsonify(data)
 
 
@@ -726,24 +1237,22 @@ def get_reviews_by_place(place_id):
     if place_id not in place_data:
         return jsonify({"message": "Place not found!"}), 404
 
-    # Filter reviews to find those that match the given place_id
-    place_reviews = [review for review in review_data.values() if review['place_id'] == place_id]
+    # Look up the reviews of the place in the index instead of scanning them all
+    since = _updated_since()
+    if since is None:
+        place_reviews = [review_data[k] for k in reviews_by_place.review_ids(place_id)
+                         if k in review_data]
+    else:
+        place_reviews = [review for review in _changed(review_updates, review_data, since)
+                         if review['place_id'] == place_id]
 
     for review in place_reviews:
         try:
-            data.append({
-                "id": review['id'],
-                "commentor_user_id": review['commentor_user_id'],
-                "place_id": review['place_id'],
-                "rating": review['rating'],
-                "feedback": review['feedback'],
-                "created_at": datetime.fromtimestamp(review['created_at']),
-                "updated_at": datetime.fromtimestamp(review['updated_at'])
-            })
+            data.append(review_row(review))
         except KeyError as e:
             print(f"KeyError: Missing key {e} in review data for review_id {review['id']}")
 
-    return jsonify(data)
+    return _listing(data, review_updates, since, place_reviews)
 
 @app.route('/api/v1/reviews/<review_id>', methods=["GET"])
 def get_review(review_id):
@@ -761,8 +1270,8 @@ def get_review(review_id):
             "place_id": review['place_id'],
             "rating": review['rating'],
             "feedback": review['feedback'],
-            "created_at": datetime.fromtimestamp(review['created_at']),
-            "updated_at": datetime.fromtimestamp(review['updated_at'])
+            "created_at": Timestamp(review['created_at']),
+            "updated_at": Timestamp(review['updated_at'])
         })
     except KeyError as e:
         print(f"KeyError: Missing key {e} in review data for review_id {review['id']}")
@@ -781,7 +1290,8 @@ def update_review(review_id):
 
     data = request.get_json()
 
-    review = review_data[review_id]
+    previous = review_data[review_id]
+    review = dict(previous)
 
     # Update the review data
     try:
@@ -799,6 +1309,8 @@ def update_review(review_id):
 
         review['updated_at'] = datetime.now().timestamp()
 
+        review_data[review_id] = review
+        feed.publish("Review", "update", review_id, review, previous)
         return jsonify(review), 200
     except KeyError as e:
         return jsonify({"message": f"Missing key {e} in review data"}), 400
@@ -812,7 +1324,8 @@ def delete_review(review_id):
     if review_id not in review_data:
         return jsonify({"message": "Review not found!"}), 404
 
-    del review_data[review_id]
+    previous = review_data.pop(review_id)
+    feed.publish("Review", "delete", review_id, previous=previous)
     return '', 204
 
 @app.route('/api/v1/places/<place_id>/reviews', methods=["POST"])
@@ -858,17 +1371,149 @@ def create_review(place_id):
     }
     file_path = 'data/review.json'
     try:
-        with open(file_path, 'r', encoding="utf-8") as file:
-            data = json.load(file)
-        data['Review'].append(review_entry)
-        with open(file_path, 'w', encoding="utf-8") as file:
-            json.dump(data, file, indent=4)
+        append_json_row(file_path, 'Review', review_entry)
     except (FileNotFoundError, json.JSONDecodeError) as e:
         print(f"Error saving review entry: {e}")
         abort(500, "Error saving the review")
 
+    review_data[review.id] = review_entry
+    feed.publish("Review", "create", review.id, review_entry)
+
     return jsonify(review_entry), 201
 
+
+# --- SNAPSHOTS ---
+@app.route('/api/v1/admin/snapshots', methods=["POST"])
+@admin_required
+def snapshots_post():
+    """Write a consistent snapshot of all the stores without stopping writes"""
+    # curl -X POST -H "X-Admin-Key: $HBNB_ADMIN_KEY" [URL]/api/v1/admin/snapshots
+    try:
+        manifest = snapshotter.take()
+    except OSError as e:
+        abort(500, f"Unable to write the snapshot: {e}")
+    return jsonify(manifest), 201
+
+@app.route('/api/v1/admin/snapshots', methods=["GET"])
+@admin_required
+def snapshots_get():
+    """List the complete snapshots, oldest first"""
+    return jsonify([read_manifest(path) for path in snapshots(snapshotter.directory)])
+
+@app.route('/api/v1/admin/partitions', methods=["GET"])
+@admin_required
+def partitions_get():
+    """List the partitions with the number of records of each"""
+    return jsonify(partitions.scatter_gather(count_records))
+
+@app.route('/api/v1/admin/review_graph', methods=["GET"])
+@admin_required
+def review_graph_get():
+    """Size of the review graph"""
+    return jsonify(review_graph.stats())
+
+@app.route('/api/v1/admin/startup', methods=["GET"])
+@admin_required
+def startup_get():
+    """Startup phase timings of this worker and the stores it has loaded"""
+    return jsonify({
+        "pid": os.getpid(),
+        "timings": timings,
+        "loaded": {store.name: store.loaded for store in stores}
+    })
+
+
+# --- ANALYTICS ---
+# full scans of the places and the reviews, split across a process pool
+analytics = QueryExecutor(place_data, review_data)
+feed.subscribe(analytics.on_change)
+
+
+def _number_arg(name, cast=float, default=None):
+    """ a numeric query string argument """
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        abort(400, f"{name} must be a number")
+
+
+@app.route('/api/v1/analytics/places', methods=["GET"])
+def analytics_places_get():
+    """Count, average price and cheapest of the places matching the filters"""
+    city_ids = request.args.get("city_id")
+    k = _k_arg()
+    return jsonify(analytics.places_query(
+        min_price=_number_arg("min_price"),
+        max_price=_number_arg("max_price"),
+        min_guests=_number_arg("min_guests", int),
+        city_ids=city_ids.split(",") if city_ids else None,
+        k=k))
+
+
+@app.route('/api/v1/analytics/reviews', methods=["GET"])
+def analytics_reviews_get():
+    """Number and average of the reviews, and the best rated places"""
+    k = _k_arg()
+    return jsonify(analytics.reviews_query(
+        k=k,
+        min_reviews=_number_arg("min_reviews", int, 1)))
+
+
+# --- CHANGES ---
+@app.route('/api/v1/changes', methods=["GET"])
+def changes_get():
+    """Stream the changes made after the `since` sequence number"""
+    # -- Usage example --
+    # long-poll: curl "[URL]/api/v1/changes?since=0&timeout=20"
+    # SSE:       curl -H "Accept: text/event-stream" "[URL]/api/v1/changes?since=0"
+    try:
+        since = int(request.headers.get("Last-Event-ID", request.args.get("since", 0)))
+        limit = min(int(request.args.get("limit", 1000)), 1000)
+        timeout = min(float(request.args.get("timeout", MAX_WAIT)), MAX_WAIT)
+    except ValueError:
+        abort(400, "since, limit and timeout must be numbers")
+
+    try:
+        events = feed.since(since, limit)
+    except LookupError as e:
+        # the client fell too far behind and has to reload the full listings
+        return jsonify({"message": str(e), "oldest_seq": feed.oldest_seq,
+                        "last_seq": feed.seq}), 410
+
+    if request.accept_mimetypes.best == "text/event-stream":
+        def stream(since, events):
+            # bounded so a worker is not held forever, clients reconnect with Last-Event-ID
+            deadline = time.monotonic() + STREAM_SECONDS
+            while time.monotonic() < deadline:
+                for event in events:
+                    since = event["seq"]
+                    yield format_sse(event)
+                if not feed.wait(since, min(KEEPALIVE_SECONDS,
+                                            max(0, deadline - time.monotonic()))):
+                    yield ": keep-alive\n\n"
+                try:
+                    events = feed.since(since, limit)
+                except LookupError:
+                    return
+        return Response(stream(since, events), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache"})
+
+    if not events and timeout > 0 and feed.wait(since, timeout):
+        events = feed.since(since, limit)
+
+    return jsonify({
+        "events": events,
+        "last_seq": events[-1]["seq"] if events else since,
+        "head_seq": feed.seq
+    })
+
+record("import app", time.perf_counter() - _import_started)
+
 # Set debug=True for the server to auto-reload when there are changes
 if __name__ == '__main__':
+    # a single process: no signup runs yet, the stale email claims can go
+    users_by_email.claims.rebuild(v['email'] for v in user_data.values())
     app.run(host='localhost', port=5000, debug=True)
@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+"""
+ASGI entry point
+
+Serves the same routes as app.py from an asyncio event loop. Every request
+runs in a thread pool, so the blocking parts of the handlers (the model
+save() calls that rewrite the JSON files, the full table scans) never block
+the loop and one worker process can keep many requests in flight. The saves
+to a data file are serialized by its lock (data/file_storage.py), so
+concurrent creates don't drop each other's rows.
+
+Usage:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app
+
+# threads running the request handlers
+THREADS = int(os.environ.get("HBNB_ASGI_THREADS", "32"))
+
+_executor = ThreadPoolExecutor(max_workers=THREADS, thread_name_prefix="hbnb-asgi")
+
+# end of the response body
+_DONE = object()
+
+
+def _environ(scope, body):
+    """ WSGI environ for an ASGI http scope """
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name == "CONTENT_LENGTH":
+            environ["CONTENT_LENGTH"] = value
+        else:
+            key = "HTTP_" + name
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _run_wsgi(environ, loop, queue):
+    """
+    Run the Flask app in a pool thread, handing the status line, headers and
+    body chunks over to the event loop as they are produced.
+    """
+    def put(item):
+        loop.call_soon_threadsafe(queue.put_nowait, item)
+
+    def start_response(status, headers, exc_info=None):
+        put((int(status.split(" ", 1)[0]), headers))
+
+    try:
+        result = app.wsgi_app(environ, start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    put(chunk)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+    finally:
+        put(_DONE)
+
+
+async def _http(scope, receive, send):
+    body = b""
+    more = True
+    while more:
+        message = await receive()
+        body += message.get("body", b"")
+        more = message.get("more_body", False)
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    future = loop.run_in_executor(_executor, _run_wsgi, _environ(scope, body), loop, queue)
+
+    started = False
+    while True:
+        item = await queue.get()
+        if item is _DONE:
+            break
+        if isinstance(item, tuple):
+            status, headers = item
+            if started:
+                # start_response called again (with exc_info) after the headers were sent
+                continue
+            started = True
+            await send({
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(k.lower().encode("latin-1"), v.encode("latin-1"))
+                            for k, v in headers],
+            })
+        else:
+            await send({"type": "http.response.body", "body": item, "more_body": True})
+
+    try:
+        await future
+    except Exception:  # pylint: disable=broad-except
+        if started:
+            # part of the response is out: raising makes the server drop the
+            # connection rather than end a truncated body as if it were complete
+            raise
+        await send({"type": "http.response.start", "status": 500, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+        return
+    if not started:
+        # the app returned without starting a response
+        await send({"type": "http.response.start", "status": 500, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            _executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    """ the ASGI application """
+    if scope["type"] == "http":
+        await _http(scope, receive, send)
+    elif scope["type"] == "lifespan":
+        await _lifespan(receive, send)
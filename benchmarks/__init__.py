@@ -0,0 +1,2 @@
+#!/usr/bin/python3
+""" benchmark harness for the hbnb evolution API """
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""
+Analytics benchmark
+
+Time of the filtered place scan and of the review aggregation of
+services/analytics.py over generated data, in the calling thread
+(--workers 0) and on process pools of growing size.
+
+Usage:
+    python3 -m benchmarks.analytics --rows 1000000 --workers 0 2 4 8
+"""
+
+import argparse
+import time
+
+from benchmarks.dataset import build_rows, default_counts
+from services.analytics import QueryExecutor
+
+
+def main(argv=None):
+    """ command line entry point """
+    parser = argparse.ArgumentParser(description="Analytics scan benchmark")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    counts = default_counts(args.rows)
+    now = time.time()
+    started = time.perf_counter()
+    places = {row["id"]: row for row in build_rows("Place", 0, args.rows, 0, 1.0, counts, now)}
+    reviews = {row["id"]: row for row in build_rows("Review", 0, args.rows, 0, 1.0, counts, now)}
+    print(f"{len(places)} places and {len(reviews)} reviews generated "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    for workers in args.workers:
+        executor = QueryExecutor(places, reviews, workers=workers, min_rows=0, max_age=0)
+        try:
+            # the first queries copy the columns and start the pool
+            started = time.perf_counter()
+            executor.places_query(k=1)
+            executor.reviews_query(k=1)
+            warmup = time.perf_counter() - started
+
+            for label, query in (
+                    ("places", lambda: executor.places_query(max_price=200, min_guests=2, k=10)),
+                    ("reviews", lambda: executor.reviews_query(k=10, min_reviews=2))):
+                started = time.perf_counter()
+                for _ in range(args.repeat):
+                    query()
+                elapsed = (time.perf_counter() - started) / args.repeat
+                print(f"workers={workers:<3} {label:8} {elapsed * 1000:9.1f} ms/query"
+                      f"  (warmup {warmup:.1f}s)")
+        finally:
+            executor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+"""
+Compression benchmark
+
+CPU time versus bytes saved for every available encoding and level, on the
+places listing at a given number of rows.
+
+Usage:
+    python3 -m benchmarks.compression --rows 10000
+"""
+
+import argparse
+import hashlib
+import time
+from flask import Flask
+
+from benchmarks.dataset import build_rows, default_counts
+from services.compression import CODECS
+from services.json_provider import HBnBJSONProvider, Timestamp
+
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 5, 11), "zstd": (1, 3, 19)}
+
+
+def main(argv=None):
+    """ command line entry point """
+    parser = argparse.ArgumentParser(description="Response compression benchmark")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    app = Flask("bench")
+    app.json = HBnBJSONProvider(app)
+    rows = build_rows("Place", 0, args.rows, 0, 1.0, default_counts(args.rows), time.time())
+    listing = [{"id": v["id"], "name": v["name"], "city_id": v["city_id"],
+                "price_per_night": v["price_per_night"], "max_guests": v["max_guests"],
+                "created_at": Timestamp(v["created_at"]),
+                "updated_at": Timestamp(v["updated_at"])} for v in rows]
+    body = app.json.dumps(listing).encode()
+    print(f"{args.rows} rows, {len(body) / 1e6:.2f} MB uncompressed")
+
+    # what a cache hit costs: the digest of the body
+    started = time.perf_counter()
+    hashlib.blake2b(body, digest_size=16).digest()
+    print(f"cache hit (digest): {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    for encoding, compress in CODECS.items():
+        for level in LEVELS[encoding]:
+            best = None
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                compressed = compress(body, level)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{encoding:5} level {level:2}: {best * 1000:8.1f} ms  "
+                  f"{len(compressed) / 1e6:6.2f} MB  ratio {len(body) / len(compressed):5.1f}  "
+                  f"{len(body) / best / 1e6:6.1f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+"""
+Credentials benchmark
+
+Signup (hash) and login (verify) throughput with concurrent request threads,
+hashing in the calling threads (--workers 0) or in the process pool, and the
+latency of a cheap request served while the hashing runs.
+
+Usage:
+    python3 -m benchmarks.credentials --threads 16 --requests 200 --workers 4
+"""
+
+import argparse
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.credentials import CredentialService, CredentialsBusy
+
+
+def cheap_latencies(stop):
+    """ how long a pure Python request takes while the hashes run """
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        sum(range(10000))
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.001)
+    return latencies
+
+
+def run(service, label, threads, requests, stored):
+    """ run `requests` signups and logins on `threads` threads """
+    busy = [0]
+
+    def signup(i):
+        try:
+            service.hash_password(f"password{i}")
+        except CredentialsBusy:
+            busy[0] += 1
+
+    def login(i):
+        try:
+            service.verify("password", stored)
+        except CredentialsBusy:
+            busy[0] += 1
+
+    for name, func in (("signup", signup), ("login", login)):
+        stop = threading.Event()
+        with ThreadPoolExecutor(1) as probe:
+            latencies = probe.submit(cheap_latencies, stop)
+            started = time.perf_counter()
+            with ThreadPoolExecutor(threads) as pool:
+                list(pool.map(func, range(requests)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            p99 = statistics.quantiles(latencies.result(), n=100)[98] * 1000
+        print(f"{label:10} {name:7} {requests / elapsed:8.1f} req/s  "
+              f"cheap request p99 {p99:7.2f} ms  {busy[0]} refused")
+
+
+def main(argv=None):
+    """ command line entry point """
+    parser = argparse.ArgumentParser(description="Password hashing benchmark")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    stored = CredentialService(workers=0).hash_password("password")
+    for label, workers in (("threads", 0), ("pool", args.workers)):
+        service = CredentialService(workers=workers, max_pending=args.requests)
+        try:
+            run(service, label, args.threads, args.requests, stored)
+        finally:
+            service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/python3
+"""
+Dataset Module
+
+Generates referentially consistent synthetic data for every model and writes
+it in the same format that FileStorage reads from the data folder.
+
+Record ids are derived from (seed, model, index), so any process can refer to
+city #42 or user #1337 without shared state. That lets the rows be generated
+in chunks by a pool of worker processes, each chunk written to its own part
+file, and the parts concatenated into the final JSON files.
+
+Usage:
+    python3 -m benchmarks.dataset --rows 1000000 --out /tmp/hbnb --processes 8
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import random
+import shutil
+import string
+import time
+from multiprocessing import Pool
+
+# JSON key used by FileStorage -> filename inside the data folder
+MODEL_FILES = {
+    "Country": "country.json",
+    "City": "city.json",
+    "Amenity": "amenity.json",
+    "Place": "place.json",
+    "User": "user.json",
+    "Review": "review.json",
+    "Place_to_Amenity": "place_to_amenity.json",
+}
+
+# there are only 26 * 26 valid country codes
+COUNTRY_CODES = [a + b for a in string.ascii_uppercase for b in string.ascii_uppercase]
+
+# max amenities linked to a single place
+MAX_PLACE_AMENITIES = 8
+
+# most reviews are positive
+RATING_WEIGHTS = [5, 8, 17, 35, 35]
+
+CHUNK_SIZE = 100000
+
+
+def default_counts(rows):
+    """ number of records per model for a dataset of `rows` rows """
+    counts = {model: rows for model in MODEL_FILES if model != "Place_to_Amenity"}
+    counts["Country"] = max(1, min(rows, len(COUNTRY_CODES)))
+    return counts
+
+
+def record_id(seed, model, index):
+    """ deterministic uuid4-formatted id of the `index`-th record of `model` """
+    digest = bytearray(hashlib.blake2b(f"{seed}:{model}:{index}".encode(),
+                                       digest_size=16).digest())
+    # same bits as uuid.UUID(bytes=digest, version=4), without building the object
+    digest[6] = (digest[6] & 0x0f) | 0x40
+    digest[8] = (digest[8] & 0x3f) | 0x80
+    h = digest.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def skewed_index(rnd, count, skew):
+    """
+    Pick an index in [0, count). skew=1 is uniform; higher values
+    concentrate the picks on the low indices (hot cities, busy hosts...).
+    """
+    return min(count - 1, int(count * rnd.random() ** skew))
+
+
+def _word(rnd, length=8):
+    """ random alphabetic word, capitalised so it passes the name setters """
+    return "".join(rnd.choices(string.ascii_lowercase, k=length)).capitalize()
+
+
+@functools.lru_cache(maxsize=4096)
+def _country_center(seed, index):
+    rnd = random.Random(f"{seed}:Country:{index}")
+    return rnd.uniform(-50, 65), rnd.uniform(-170, 175)
+
+
+@functools.lru_cache(maxsize=100000)
+def _city_center(seed, index, countries):
+    """ (country index, lat, lng) of a city, clustered around its country """
+    rnd = random.Random(f"{seed}:City:{index}")
+    country = rnd.randrange(countries)
+    lat, lng = _country_center(seed, country)
+    lat = max(-89.0, min(89.0, rnd.gauss(lat, 3.0)))
+    lng = max(-179.0, min(179.0, rnd.gauss(lng, 3.0)))
+    return country, lat, lng
+
+
+def build_rows(model, start, stop, seed, skew, counts, now):
+    """ generate the records of `model` with index in [start, stop) """
+    rnd = random.Random(f"{seed}:{model}:{start}")
+    rows = []
+
+    for i in range(start, stop):
+        if model == "Country":
+            rows.append({"id": record_id(seed, model, i), "name": _word(rnd),
+                         "code": COUNTRY_CODES[i], "created_at": now, "updated_at": now})
+        elif model == "City":
+            country, _, _ = _city_center(seed, i, counts["Country"])
+            rows.append({"id": record_id(seed, model, i), "name": _word(rnd),
+                         "country_id": record_id(seed, "Country", country),
+                         "created_at": now, "updated_at": now})
+        elif model == "Amenity":
+            rows.append({"id": record_id(seed, model, i), "name": _word(rnd).lower(),
+                         "created_at": now, "updated_at": now})
+        elif model == "User":
+            first, last = _word(rnd), _word(rnd)
+            rows.append({"id": record_id(seed, model, i), "first_name": first,
+                         "last_name": last, "email": f"user{i}@example.com",
+                         "password": "password", "created_at": now, "updated_at": now})
+        elif model == "Place":
+            city = skewed_index(rnd, counts["City"], skew)
+            _, lat, lng = _city_center(seed, city, counts["Country"])
+            rows.append({"id": record_id(seed, model, i),
+                         "host_user_id": record_id(seed, "User",
+                                                   skewed_index(rnd, counts["User"], skew)),
+                         "city_id": record_id(seed, "City", city),
+                         "name": _word(rnd),
+                         "description": "A synthetic place",
+                         "address": f"{rnd.randint(1, 999)} {_word(rnd)} Street",
+                         "latitude": round(max(-90.0, min(90.0, rnd.gauss(lat, 0.05))), 6),
+                         "longitude": round(max(-180.0, min(180.0, rnd.gauss(lng, 0.05))), 6),
+                         "number_of_rooms": rnd.randint(1, 8),
+                         "bathrooms": rnd.randint(1, 4),
+                         "price_per_night": round(rnd.lognormvariate(4.8, 0.6), 2),
+                         "max_guests": rnd.randint(1, 12),
+                         "created_at": now, "updated_at": now})
+        elif model == "Review":
+            rows.append({"id": record_id(seed, model, i),
+                         "commentor_user_id": record_id(seed, "User",
+                                                        skewed_index(rnd, counts["User"], skew)),
+                         "place_id": record_id(seed, "Place",
+                                               skewed_index(rnd, counts["Place"], skew)),
+                         "feedback": "Synthetic feedback",
+                         "rating": rnd.choices(range(1, 6), weights=RATING_WEIGHTS)[0],
+                         "created_at": now, "updated_at": now})
+        elif model == "Place_to_Amenity":
+            # here `i` is a place index and every place gets a few distinct amenities
+            place_id = record_id(seed, "Place", i)
+            wanted = rnd.randint(0, min(MAX_PLACE_AMENITIES, counts["Amenity"]))
+            picked = set()
+            while len(picked) < wanted:
+                picked.add(skewed_index(rnd, counts["Amenity"], skew))
+            for amenity in sorted(picked):
+                rows.append({"place_id": place_id,
+                             "amenity_id": record_id(seed, "Amenity", amenity)})
+    return rows
+
+
+def _write_part(task):
+    """ pool worker: generate one chunk and write it as a JSON array fragment """
+    model, start, stop, seed, skew, counts, now, part_path = task
+    rows = build_rows(model, start, stop, seed, skew, counts, now)
+    with open(part_path, "w", encoding="utf-8") as f:
+        f.write(",".join(json.dumps(row) for row in rows))
+    return part_path, len(rows)
+
+
+def generate(directory, rows, seed=0, skew=1.0, processes=None, counts=None,
+             chunk_size=CHUNK_SIZE):
+    """
+    Generate a dataset into `directory`/data using the FileStorage layout.
+    The country data is also written as country_testing.json so that the
+    app can be started with TESTING=1 against it.
+
+    Args:
+        rows: default number of records per model
+        seed: seed for the ids and the random values
+        skew: 1 for uniform foreign keys, > 1 for hot cities/hosts/places
+        processes: size of the worker pool (defaults to the cpu count)
+        counts: optional per model overrides of `rows`
+
+    Returns:
+        dict: number of records written per model
+    """
+    counts = {**default_counts(rows), **(counts or {})}
+    if counts["Country"] > len(COUNTRY_CODES):
+        raise ValueError(f"At most {len(COUNTRY_CODES)} countries can be generated")
+
+    data_dir = os.path.join(directory, "data")
+    parts_dir = os.path.join(directory, ".parts")
+    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(parts_dir, exist_ok=True)
+    now = time.time()
+
+    tasks = []
+    for model in MODEL_FILES:
+        # links are generated per place
+        total = counts["Place" if model == "Place_to_Amenity" else model]
+        for start in range(0, total, chunk_size):
+            stop = min(total, start + chunk_size)
+            tasks.append((model, start, stop, seed, skew, counts, now,
+                          os.path.join(parts_dir, f"{model}-{start:012d}.part")))
+
+    written = {model: 0 for model in MODEL_FILES}
+    with Pool(processes) as pool:
+        parts = pool.map(_write_part, tasks)
+
+    try:
+        for model, filename in MODEL_FILES.items():
+            with open(os.path.join(data_dir, filename), "w", encoding="utf-8") as out:
+                out.write(f'{{"{model}": [')
+                first = True
+                for task, (part_path, count) in zip(tasks, parts):
+                    if task[0] != model or not count:
+                        continue
+                    if not first:
+                        out.write(",")
+                    with open(part_path, "r", encoding="utf-8") as part:
+                        shutil.copyfileobj(part, out)
+                    first = False
+                    written[model] += count
+                out.write("]}")
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    shutil.copyfile(os.path.join(data_dir, "country.json"),
+                    os.path.join(data_dir, "country_testing.json"))
+    return written
+
+
+def main(argv=None):
+    """ command line entry point """
+    parser = argparse.ArgumentParser(description="HBnB synthetic data generator")
+    parser.add_argument("--rows", type=int, default=1000, help="records per model")
+    parser.add_argument("--out", required=True, help="folder the data folder is created in")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skew", type=float, default=1.0,
+                        help="1 = uniform foreign keys, higher = more skewed")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--count", action="append", default=[], metavar="MODEL=N",
+                        help="override the number of records of a model")
+    args = parser.parse_args(argv)
+
+    counts = {}
+    for item in args.count:
+        model, _, value = item.partition("=")
+        if model not in default_counts(1):
+            parser.error(f"Unknown model {model}")
+        counts[model] = int(value)
+
+    started = time.perf_counter()
+    written = generate(args.out, args.rows, seed=args.seed, skew=args.skew,
+                       processes=args.processes, counts=counts)
+    for model, count in written.items():
+        print(f"{model}: {count}")
+    print(f"Generated in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+"""
+Email index benchmark
+
+Signup throughput at scale with the email uniqueness check done by scanning
+user_data (what a uniqueness check cost before the index) and through the
+EmailIndex reservation, from concurrent threads. Only the uniqueness check,
+the store insert and the change event of users_post are measured: the
+password hash and the file write cost the same either way.
+
+Usage:
+    python3 -m benchmarks.emails --users 1000000 --signups 20000 --threads 8
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.dataset import build_rows, default_counts
+from data.ids import new_id
+from data.indexes import EmailIndex
+from services.changes import ChangeFeed
+
+
+def signup_scan(store, feed, email):
+    """ the uniqueness check as a scan of the store """
+    wanted = email.lower()
+    if any(v['email'].lower() == wanted for v in list(store.values())):
+        return False
+    user_id = new_id()
+    store[user_id] = {"id": user_id, "email": email, "updated_at": time.time()}
+    feed.publish("User", "create", user_id, store[user_id])
+    return True
+
+
+def signup_index(index, store, feed, email):
+    """ the uniqueness check as a reservation in the index """
+    if index.reserve(email) is None:
+        return False
+    user_id = new_id()
+    store[user_id] = {"id": user_id, "email": email, "updated_at": time.time()}
+    feed.publish("User", "create", user_id, store[user_id])
+    return True
+
+
+def main(argv=None):
+    """ command line entry point """
+    parser = argparse.ArgumentParser(description="Email uniqueness benchmark")
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--signups", type=int, default=20000)
+    parser.add_argument("--scan-signups", type=int, default=20,
+                        help="signups timed with the scan, which is O(users) each")
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    counts = default_counts(args.users)
+    counts["User"] = args.users
+    started = time.perf_counter()
+    store = {row["id"]: row for row in build_rows("User", 0, args.users, 0, 1.0,
+                                                  counts, time.time())}
+    print(f"{len(store)} users generated in {time.perf_counter() - started:.1f}s")
+
+    feed = ChangeFeed()
+    index = EmailIndex(store)
+    feed.subscribe(index.on_change)
+    started = time.perf_counter()
+    index.get("nobody@example.com")
+    print(f"index built in {time.perf_counter() - started:.2f}s")
+
+    # every tenth signup reuses an email and must be refused
+    def emails(n, prefix):
+        return [f"user{i}@example.com" if i % 10 == 0 else f"{prefix}{i}@example.com"
+                for i in range(n)]
+
+    for label, count, signup in (
+            ("scan", args.scan_signups, lambda email: signup_scan(store, feed, email)),
+            ("index", args.signups, lambda email: signup_index(index, store, feed, email))):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.threads) as pool:
+            created = sum(pool.map(signup, emails(count, f"new-{label}-")))
+        elapsed = time.perf_counter() - started
+        print(f"{label:6} {count / elapsed:12.0f} signups/s  "
+              f"{created} created, {count - created} refused")
+
+
+if __name__ == '__main__':
+    main()
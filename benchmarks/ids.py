@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""
+Id benchmark
+
+Measures the UUIDv7 generator against str(uuid.uuid4()) and the memory used
+by the foreign key heavy tables when loaded with and without interned ids.
+
+Usage:
+    python3 -m benchmarks.ids --rows 100000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import timeit
+import tracemalloc
+import uuid
+
+from benchmarks.dataset import MODEL_FILES, generate
+from data.file_storage import FileStorage
+from data.ids import new_id
+
+
+def load_plain(path):
+    """ load a data file the way FileStorage did before ids were interned """
+    with open(path, "r", encoding="utf-8") as f:
+        rows = json.load(f)
+    return {row["id"]: row for key in rows for row in rows[key]}
+
+
+def measure(loader, paths):
+    """ bytes held by the loaded stores """
+    tracemalloc.start()
+    stores = [loader(path) for path in paths]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del stores
+    return current
+
+
+def main(argv=None):
+    """ command line entry point """
+    parser = argparse.ArgumentParser(description="Id generation and memory benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    number = 200000
+    for label, func in (("uuid4", lambda: str(uuid.uuid4())), ("uuid7", new_id)):
+        seconds = timeit.timeit(func, number=number)
+        print(f"{label}: {number / seconds:,.0f} ids/s")
+
+    with tempfile.TemporaryDirectory(prefix="hbnb-ids-") as workdir:
+        generate(workdir, args.rows)
+        paths = [os.path.join(workdir, "data", MODEL_FILES[model])
+                 for model in ("Country", "City", "User", "Place", "Review")]
+        plain = measure(load_plain, paths)
+        interned = measure(FileStorage().load_model_data, paths)
+
+    print(f"plain ids:    {plain / 1e6:,.1f} MB")
+    print(f"interned ids: {interned / 1e6:,.1f} MB ({100 * (plain - interned) / plain:.1f}% less)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+"""
+Review graph benchmark
+
+Memory and build time of data/review_graph.py at scale, then the time of
+its queries (reviewers of a place, "also reviewed", top reviewers) and of
+the review changes it follows. The reviews are generated as (user, place)
+pairs with a few very active users and a few very reviewed places (--skew).
+
+Usage:
+    python3 -m benchmarks.review_graph --reviews 10000000 --users 1000000 --places 1000000
+"""
+
+import argparse
+import random
+import resource
+import time
+
+from data.review_graph import ReviewGraph
+from services.changes import ChangeFeed
+
+
+def pairs(reviews, users, places, skew, seed=0):
+    """ (user id, place id) of `reviews` generated reviews """
+    rnd = random.Random(seed)
+    for _ in range(reviews):
+        user = min(int(rnd.paretovariate(skew)) - 1, users - 1) if skew else rnd.randrange(users)
+        place = min(int(rnd.paretovariate(skew)) - 1, places - 1) if skew \
+            else rnd.randrange(places)
+        # spread the hot ones so they are not all at the start of the id space
+        yield f"u{(user * 7919) % users}", f"p{(place * 104729) % places}"
+
+
+def rss_mb():
+    """ peak resident memory of the process """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def timed(label, func, repeat):
+    """ average time of `repeat` calls of func """
+    started = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label:24} {elapsed * 1e6:12.1f} us")
+
+
+def main(argv=None):
+    """ command line entry point """
+    parser = argparse.ArgumentParser(description="Review graph benchmark")
+    parser.add_argument("--reviews", type=int, default=10000000)
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--places", type=int, default=1000000)
+    parser.add_argument("--skew", type=float, default=0.0,
+                        help="Pareto shape of the activity, 0 for uniform")
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    before = rss_mb()
+    graph = ReviewGraph({})
+    started = time.perf_counter()
+    graph.load(pairs(args.reviews, args.users, args.places, args.skew))
+    stats = graph.stats()
+    print(f"generated and built in {time.perf_counter() - started:.1f}s: "
+          f"{stats['reviews']} reviews, "
+          f"{stats['users']} users, {stats['places']} places")
+    print(f"arrays {stats['array_bytes'] / 2 ** 20:.0f}MB, "
+          f"process peak +{rss_mb() - before:.0f}MB (with the interned ids)")
+
+    rnd = random.Random(1)
+    place_ids = [f"p{rnd.randrange(args.places)}" for _ in range(args.queries)]
+    user_ids = [f"u{rnd.randrange(args.users)}" for _ in range(args.queries)]
+    timed("reviewers", lambda i: graph.reviewers(place_ids[i]), args.queries)
+    timed("reviewed_places", lambda i: graph.reviewed_places(user_ids[i]), args.queries)
+    timed("also_reviewed", lambda i: graph.also_reviewed(place_ids[i]), args.queries)
+    hot = graph.top_reviewers(1)[0][0]
+    hot_place = graph.reviewed_places(hot)[0]
+    timed("also_reviewed (hot)", lambda i: graph.also_reviewed(hot_place), 10)
+    timed("top_reviewers", lambda i: graph.top_reviewers(10), 3)
+
+    feed = ChangeFeed(capacity=1)
+    feed.subscribe(graph.on_change)
+
+    def change(i):
+        review = {"id": f"new{i}", "commentor_user_id": user_ids[i], "place_id": place_ids[i]}
+        feed.publish("Review", "create", review["id"], review)
+    timed("review created", change, args.queries)
+    timed("reviewers (with deltas)", lambda i: graph.reviewers(place_ids[i]), args.queries)
+
+
+if __name__ == '__main__':
+    main()
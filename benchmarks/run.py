@@ -0,0 +1,324 @@
+#!/usr/bin/python3
+"""
+Benchmark runner
+
+Generates synthetic datasets, then drives every route of app.py either
+in-process through the Flask test client or against a real gunicorn (WSGI)
+or uvicorn (ASGI, see asgi.py) process, and writes throughput / latency percentiles to a JSON file.
+
+Usage:
+    python3 -m benchmarks.run --sizes 1000 100000 --mode client gunicorn uvicorn
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.dataset import COUNTRY_CODES, default_counts, generate, record_id
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# route argument name -> model the id is picked from
+ARG_MODELS = {
+    "user_id": "User",
+    "city_id": "City",
+    "amenity_id": "Amenity",
+    "place_id": "Place",
+    "review_id": "Review",
+}
+
+
+class Context():
+    """ Ids of the generated records that requests can refer to """
+
+    def __init__(self, counts, seed=0):
+        self.rnd = random.Random(seed)
+        self.seed = seed
+        self.counts = dict(counts)
+        self.codes = COUNTRY_CODES[:counts["Country"]]
+        self.counter = 0
+
+    def pick(self, model):
+        """ random existing id of a model """
+        if not self.counts[model]:
+            return "missing"
+        return record_id(self.seed, model, self.rnd.randrange(self.counts[model]))
+
+    def take(self, model):
+        """ removes and returns an id so that deletes always hit a record """
+        if not self.counts[model]:
+            return "missing"
+        self.counts[model] -= 1
+        return record_id(self.seed, model, self.counts[model])
+
+    def unique(self):
+        """ an alphabetic suffix that is different for every call """
+        self.counter += 1
+        n, out = self.counter, ""
+        while n:
+            n, r = divmod(n, 26)
+            out += chr(ord("a") + r)
+        return out
+
+
+def _user_body(ctx):
+    suffix = ctx.unique()
+    return {"first_name": "Bench" + suffix, "last_name": "Mark",
+            "email": f"bench.{suffix}@example.com", "password": "password"}
+
+
+def _place_body(ctx):
+    return {"name": "Bench place", "description": "benchmark", "address": "1 Bench Street",
+            "latitude": 1.5, "longitude": 2.5, "number_of_rooms": 2, "bathrooms": 1,
+            "price_per_night": 99.0, "max_guests": 2, "city_id": ctx.pick("City"),
+            "host_id": ctx.pick("User"), "amenities": [ctx.pick("Amenity")]}
+
+
+# endpoint name -> function building the JSON body for that endpoint
+BODIES = {
+    "users_post": _user_body,
+    "users_put": lambda ctx: {"first_name": "Renamed"},
+    "countries_post": lambda ctx: {"name": "Benchland", "code": "ZZ"},
+    "countries_put": lambda ctx: {"name": "Renamed"},
+    "cities_post": lambda ctx: {"name": "Bench " + ctx.unique(),
+                                "country_code": ctx.rnd.choice(ctx.codes)},
+    "cities_put": lambda ctx: {"name": "Renamed " + ctx.unique(),
+                               "country_code": ctx.rnd.choice(ctx.codes)},
+    "update_amenity": lambda ctx: {"name": "amenity " + ctx.unique()},
+    "create_place": _place_body,
+    "update_place": lambda ctx: {"price_per_night": 120.0},
+    "update_review": lambda ctx: {"rating": 4},
+    "create_review": lambda ctx: {"commentor_user_id": ctx.pick("User"),
+                                  "rating": 5, "feedback": "benchmark"},
+    "lookup": lambda ctx: {"ids": [ctx.pick("Place") for _ in range(50)]},
+}
+
+# endpoint name -> query string added to the path
+QUERIES = {
+    "changes_get": "?since=0&timeout=0",
+}
+
+
+def build_plan(app, ctx, requests_per_route):
+    """
+    Build the list of requests for every route registered on the app.
+
+    Returns:
+        list: (label, method, path, body) tuples
+    """
+    plan = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        if rule.endpoint == "static":
+            continue
+        for method in sorted(rule.methods - {"HEAD", "OPTIONS"}):
+            label = f"{method} {rule.rule}"
+            for _ in range(requests_per_route):
+                values = {}
+                for arg in rule.arguments:
+                    if arg == "country_code":
+                        values[arg] = ctx.rnd.choice(ctx.codes)
+                    elif arg == "entity":
+                        # the multi-get, see the "lookup" body
+                        values[arg] = "places"
+                    elif arg in ARG_MODELS:
+                        take = ctx.take if method == "DELETE" else ctx.pick
+                        values[arg] = take(ARG_MODELS[arg])
+                    else:
+                        values[arg] = "missing"
+                path = rule.rule
+                for arg, value in values.items():
+                    path = path.replace(f"<{arg}>", value)
+                path += QUERIES.get(rule.endpoint, "")
+                body = BODIES[rule.endpoint](ctx) if rule.endpoint in BODIES else None
+                plan.append((label, method, path, body))
+    return plan
+
+
+def percentile(sorted_values, pct):
+    """ nearest-rank percentile of an already sorted list """
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1,
+                       int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarise(samples, elapsed):
+    """ turn (label, status, seconds) samples into per-route statistics """
+    routes = {}
+    for label, status, seconds in samples:
+        route = routes.setdefault(label, {"latencies": [], "errors": 0})
+        route["latencies"].append(seconds)
+        if status >= 500:
+            route["errors"] += 1
+
+    results = []
+    for label, route in sorted(routes.items()):
+        latencies = sorted(route["latencies"])
+        busy = sum(latencies)
+        results.append({
+            "route": label,
+            "requests": len(latencies),
+            "errors": route["errors"],
+            "throughput_rps": len(latencies) / busy if busy else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        })
+    results.append({
+        "route": "ALL",
+        "requests": len(samples),
+        "errors": sum(r["errors"] for r in routes.values()),
+        "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+    })
+    return results
+
+
+def run_client(workdir, plan):
+    """ drive the plan in-process through the Flask test client """
+    # the storage module reads relative paths, so load the generated data from workdir
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import data
+        from app import app
+        for name, filename in (("country_data", "country.json"), ("city_data", "city.json"),
+                               ("amenity_data", "amenity.json"), ("place_data", "place.json"),
+                               ("user_data", "user.json"), ("review_data", "review.json")):
+            store = getattr(data, name)
+            store.clear()
+            store.update(data.storage.load_model_data("data/" + filename))
+        data.place_to_amenity_data.clear()
+        data.place_to_amenity_data.update(
+            data.storage.load_many_to_many_data("data/place_to_amenity.json"))
+
+        client = app.test_client()
+        samples = []
+        started = time.perf_counter()
+        for label, method, path, body in plan:
+            t0 = time.perf_counter()
+            try:
+                status = client.open(path, method=method, json=body).status_code
+            except Exception:  # pylint: disable=broad-except
+                status = 599
+            samples.append((label, status, time.perf_counter() - t0))
+        return samples, time.perf_counter() - started
+    finally:
+        os.chdir(cwd)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def run_server(workdir, plan, command, concurrency, startup_timeout):
+    """ drive the plan over HTTP against a server process started with `command` """
+    port = _free_port()
+    command = [part.format(port=port, workdir=workdir, repo=REPO_ROOT) for part in command]
+    server = subprocess.Popen(command, cwd=workdir, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL)
+    try:
+        if not _wait_for_port(port, startup_timeout):
+            raise RuntimeError(f"Server did not start: {' '.join(command)}")
+
+        def send(item):
+            label, method, path, body = item
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            payload = json.dumps(body) if body is not None else None
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            t0 = time.perf_counter()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                status = 599
+            finally:
+                conn.close()
+            return label, status, time.perf_counter() - t0
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(send, plan))
+        return samples, time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+
+# server commands, run from the generated data folder
+SERVERS = {
+    "gunicorn": ["gunicorn", "--chdir", "{workdir}", "--pythonpath", "{repo}",
+                 "-b", "127.0.0.1:{port}", "-w", "{workers}", "app:app"],
+    "uvicorn": ["uvicorn", "--app-dir", "{repo}", "--host", "127.0.0.1", "--port", "{port}",
+                "--workers", "{workers}", "--no-access-log", "asgi:application"],
+}
+
+
+def main(argv=None):
+    """ command line entry point """
+    parser = argparse.ArgumentParser(description="HBnB API benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000],
+                        help="rows generated per model")
+    parser.add_argument("--mode", nargs="+", default=["client", "gunicorn"],
+                        choices=["client"] + sorted(SERVERS))
+    parser.add_argument("--requests", type=int, default=20, help="requests per route")
+    parser.add_argument("--workers", type=int, default=2, help="server worker processes")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent HTTP clients")
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skew", type=float, default=1.0, help="foreign key skew")
+    parser.add_argument("--processes", type=int, default=None, help="generator processes")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    report = {"created_at": time.time(), "python": sys.version.split()[0], "runs": []}
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="hbnb-bench-") as workdir:
+            generate(workdir, size, seed=args.seed, skew=args.skew, processes=args.processes)
+            for mode in args.mode:
+                from app import app
+                plan = build_plan(app, Context(default_counts(size), seed=args.seed),
+                                  args.requests)
+                if mode == "client":
+                    samples, elapsed = run_client(workdir, plan)
+                else:
+                    command = [p.replace("{workers}", str(args.workers)) for p in SERVERS[mode]]
+                    samples, elapsed = run_server(workdir, plan, command,
+                                                  args.concurrency, args.startup_timeout)
+                results = summarise(samples, elapsed)
+                report["runs"].append({"size": size, "mode": mode, "results": results})
+                total = results[-1]
+                print(f"size={size} mode={mode} requests={total['requests']} "
+                      f"errors={total['errors']} rps={total['throughput_rps']:.1f}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
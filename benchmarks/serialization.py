@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""
+Serialization benchmark
+
+Times the users listing at 10k and 100k rows, built and encoded the old way
+(datetime.fromtimestamp + Flask's default provider) and the new way
+(Timestamp + HBnBJSONProvider).
+
+Usage:
+    python3 -m benchmarks.serialization --rows 10000 100000
+"""
+
+import argparse
+import time
+from datetime import datetime
+from flask import Flask
+
+from benchmarks.dataset import build_rows, default_counts
+from services.json_provider import HBnBJSONProvider, Timestamp, orjson
+
+
+def listing(rows, wrap):
+    """ the users_get payload, with the timestamps wrapped by `wrap` """
+    return [{
+        "id": v['id'],
+        "first_name": v['first_name'],
+        "last_name": v['last_name'],
+        "email": v['email'],
+        "created_at": wrap(v['created_at']),
+        "updated_at": wrap(v['updated_at'])
+    } for v in rows]
+
+
+def run(app, rows, wrap, repeat):
+    """ best time of building and encoding the listing """
+    best = None
+    with app.app_context():
+        for _ in range(repeat):
+            started = time.perf_counter()
+            app.json.response(listing(rows, wrap)).get_data()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    """ command line entry point """
+    parser = argparse.ArgumentParser(description="Listing serialization benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    default_app = Flask("default")
+    fast_app = Flask("fast")
+    fast_app.json = HBnBJSONProvider(fast_app)
+    print(f"orjson: {'yes' if orjson else 'no (stdlib fallback)'}")
+
+    for count in args.rows:
+        rows = build_rows("User", 0, count, 0, 1.0, default_counts(count), time.time())
+        old = run(default_app, rows, datetime.fromtimestamp, args.repeat)
+        new = run(fast_app, rows, Timestamp, args.repeat)
+        print(f"{count:>8} rows  default: {old * 1000:8.1f} ms  "
+              f"fast: {new * 1000:8.1f} ms  ({old / new:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""
+Validation benchmark
+
+Compares validating bulk imports through the model setters (one object and
+one property call per field, the way the constructors used to work) with a
+single Schema.validate_batch pass.
+
+Usage:
+    python3 -m benchmarks.validation --rows 100000
+"""
+
+import argparse
+import time
+
+from benchmarks.dataset import build_rows, default_counts
+from models.place import Place
+from models.user import User
+
+
+def setter_path(model, records):
+    """ validate every record by assigning its fields one by one through the setters """
+    errors = {}
+    for index, record in enumerate(records):
+        obj = object.__new__(model)
+        try:
+            for name in model.schema.fields:
+                setattr(obj, name, record[name])
+        except (KeyError, ValueError) as exc:
+            errors[index] = [str(exc)]
+    return errors
+
+
+def batch_path(model, records):
+    """ validate all the records with the model schema """
+    _, errors = model.schema.validate_batch(records)
+    return errors
+
+
+def main(argv=None):
+    """ command line entry point """
+    parser = argparse.ArgumentParser(description="Model validation benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--invalid", type=float, default=0.05,
+                        help="fraction of records made invalid")
+    args = parser.parse_args(argv)
+
+    counts = default_counts(args.rows)
+    for model, name, broken in ((User, "User", {"email": "not an email"}),
+                                (Place, "Place", {"latitude": 120})):
+        records = build_rows(name, 0, args.rows, 0, 1.0, counts, time.time())
+        step = int(1 / args.invalid) if args.invalid else 0
+        for record in records[::step] if step else []:
+            record.update(broken)
+
+        for label, path in (("setters", setter_path), ("validate_batch", batch_path)):
+            started = time.perf_counter()
+            errors = path(model, records)
+            elapsed = time.perf_counter() - started
+            print(f"{name:6} {label:15} {len(records) / elapsed:12.0f} rows/s "
+                  f"{len(errors)} invalid rows")
+
+
+if __name__ == '__main__':
+    main()
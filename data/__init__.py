@@ -3,6 +3,7 @@
 
 import os
 from data.file_storage import FileStorage
+from data.lazy import LazyStore
 
 storage = FileStorage()
 
@@ -10,12 +11,29 @@ storage = FileStorage()
 # command to use: TESTING=1 python3 -m unittest discover
 is_testing = "TESTING" in os.environ and os.environ['TESTING'] == "1"
 
-country_data = storage.load_model_data('data/country_testing.json') if is_testing \
-    else storage.load_model_data('data/country.json')
 
-city_data = storage.load_model_data('data/city.json')
-amenity_data = storage.load_model_data('data/amenity.json')
-place_data = storage.load_model_data('data/place.json')
-user_data = storage.load_model_data('data/user.json')
-review_data = storage.load_model_data('data/review.json')
-place_to_amenity_data = storage.load_many_to_many_data('data/place_to_amenity.json')
+def _model_file(filename):
+    """ loader of a model file, read when its store is first used """
+    return lambda: storage.load_model_data(filename)
+
+
+# the stores are empty dicts until first used, see data/lazy.py
+country_data = LazyStore("country", _model_file('data/country_testing.json') if is_testing
+                         else _model_file('data/country.json'))
+
+city_data = LazyStore("city", _model_file('data/city.json'))
+amenity_data = LazyStore("amenity", _model_file('data/amenity.json'))
+place_data = LazyStore("place", _model_file('data/place.json'))
+user_data = LazyStore("user", _model_file('data/user.json'))
+review_data = LazyStore("review", _model_file('data/review.json'))
+place_to_amenity_data = LazyStore(
+    "place_to_amenity", lambda: storage.load_many_to_many_data('data/place_to_amenity.json'))
+
+stores = (country_data, city_data, amenity_data, place_data,
+          user_data, review_data, place_to_amenity_data)
+
+
+def preload():
+    """ loads every store now, e.g. in the gunicorn master before the workers fork """
+    for store in stores:
+        store.load()
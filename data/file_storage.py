@@ -2,7 +2,74 @@
 """This module defines a class to manage file storage for hbnb evolution"""
 
 import json
+import os
+import sys
+import tempfile
+import threading
 from pathlib import Path
+from data.ids import intern_record
+
+
+def write_json_atomic(filename, data, indent=None):
+    """
+    Write data as JSON to filename without ever leaving a truncated file.
+
+    The JSON goes to a temporary file in the same folder which is flushed to
+    disk and then renamed over filename, so readers (and a crash) only ever
+    see the old or the new content.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding="utf-8") as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filename)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    # make the rename itself durable
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # pragma: no cover - directories can't be opened on Windows
+        return
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+# one lock per data file, so that concurrent saves (the threads of asgi.py, a
+# threaded gunicorn worker) don't read the same content and drop each other's rows
+_file_locks = {}
+_file_locks_lock = threading.Lock()
+
+
+def file_lock(filename):
+    """ the lock serializing the writes to a data file in this process """
+    path = os.path.abspath(filename)
+    with _file_locks_lock:
+        return _file_locks.setdefault(path, threading.Lock())
+
+
+def append_json_row(filename, key, row):
+    """
+    Append row to the list under key of a JSON data file.
+
+    The read, append and rewrite run under the lock of the file, so no
+    concurrent append of this process is lost.
+
+    Raises:
+        FileNotFoundError, json.JSONDecodeError: the file is missing or invalid
+    """
+    with file_lock(filename):
+        with open(filename, 'r', encoding="utf-8") as f:
+            data = json.load(f)
+        data[key].append(row)
+        write_json_atomic(filename, data, indent=4)
+
 
 class FileStorage():
     """ Class for reading from files """
@@ -42,6 +109,8 @@ class FileStorage():
             # print(data[key])
             for row in data[key]:
                 # now we interate inside the JSON data...
+                # ids repeated across foreign keys are interned so each is stored once
+                intern_record(row)
                 output[row['id']] = row
 
         return output
@@ -68,8 +137,8 @@ class FileStorage():
         for key in data:
             # key's value is 'Place_to_Amenity'
             for row in data[key]:
-                place_id = row['place_id']
-                amenity_id = row['amenity_id']
+                place_id = sys.intern(row['place_id'])
+                amenity_id = sys.intern(row['amenity_id'])
 
                 if place_id not in grouped_data:
                     grouped_data[place_id] = []
@@ -0,0 +1,180 @@
+#!/usr/bin/python3
+"""
+Country -> cities -> places tree with running totals
+
+Each city and each country node keeps the number of places, the sum of their
+prices and the number of their reviews, so the summary of a country is read
+from its node and the nodes of its cities instead of scanning the stores.
+The tree is built on first use and then follows the change events: a city
+moved to another country (cities_put) carries its totals over, a place moved
+to another city (update_place) moves from one node to the other, and reviews
+only change the review count of the nodes above their place.
+"""
+
+import threading
+
+
+class Totals():
+    """Running totals of a node"""
+
+    __slots__ = ("places", "price_sum", "reviews")
+
+    def __init__(self):
+        self.places = 0
+        self.price_sum = 0.0
+        self.reviews = 0
+
+    def add(self, places, price_sum, reviews, sign=1):
+        """ adds (sign=1) or takes away (sign=-1) some totals """
+        self.places += sign * places
+        self.price_sum += sign * price_sum
+        self.reviews += sign * reviews
+
+    def to_dict(self):
+        """ the totals as returned by the API """
+        return {
+            "places": self.places,
+            "average_price": round(self.price_sum / self.places, 2) if self.places else None,
+            "reviews": self.reviews
+        }
+
+
+class GeoHierarchy():
+    """Countries, their cities and the places of the cities"""
+
+    def __init__(self, countries, cities, places, reviews_by_place):
+        self.countries = countries
+        self.cities = cities
+        self.places = places
+        self.reviews_by_place = reviews_by_place
+        self._lock = threading.Lock()
+        self._built = False
+        self._codes = {}            # country code -> country id
+        self._country_cities = {}   # country id -> {city id: None}, in the store order
+        self._city_country = {}     # city id -> country id
+        self._place_entries = {}    # place id -> (city id, price, reviews)
+        self._city_totals = {}      # city id -> Totals
+        self._country_totals = {}   # country id -> Totals
+
+    def _city_node(self, city_id):
+        if city_id not in self._city_totals:
+            self._city_totals[city_id] = Totals()
+        return self._city_totals[city_id]
+
+    def _country_node(self, country_id):
+        if country_id not in self._country_totals:
+            self._country_totals[country_id] = Totals()
+        return self._country_totals[country_id]
+
+    def _add_totals(self, city_id, places, price_sum, reviews, sign=1):
+        self._city_node(city_id).add(places, price_sum, reviews, sign)
+        country_id = self._city_country.get(city_id)
+        if country_id is not None:
+            self._country_node(country_id).add(places, price_sum, reviews, sign)
+
+    def _attach_city(self, city_id, country_id):
+        self._city_country[city_id] = country_id
+        self._country_cities.setdefault(country_id, {})[city_id] = None
+        t = self._city_node(city_id)
+        self._country_node(country_id).add(t.places, t.price_sum, t.reviews)
+
+    def _detach_city(self, city_id):
+        country_id = self._city_country.pop(city_id, None)
+        if country_id is None:
+            return
+        self._country_cities.get(country_id, {}).pop(city_id, None)
+        t = self._city_node(city_id)
+        self._country_node(country_id).add(t.places, t.price_sum, t.reviews, -1)
+
+    def _remove_place(self, place_id):
+        entry = self._place_entries.pop(place_id, None)
+        if entry is not None:
+            city_id, price, reviews = entry
+            self._add_totals(city_id, 1, price, reviews, -1)
+
+    def _add_place(self, place_id):
+        place = self.places.get(place_id)
+        if place is None or place.get('city_id') is None:
+            return
+        city_id = place['city_id']
+        price = place.get('price_per_night') or 0.0
+        reviews, _ = self.reviews_by_place.rating(place_id)
+        self._place_entries[place_id] = (city_id, price, reviews)
+        self._add_totals(city_id, 1, price, reviews)
+
+    def _build(self):
+        self._codes = {v['code']: k for k, v in self.countries.items()}
+        self._country_cities = {}
+        self._city_country = {}
+        self._place_entries = {}
+        self._city_totals = {}
+        self._country_totals = {}
+        for city_id, city in list(self.cities.items()):
+            self._attach_city(city_id, city['country_id'])
+        for place_id in list(self.places):
+            self._add_place(place_id)
+        self._built = True
+
+    def invalidate(self):
+        """ drops the tree and its totals, rebuilt from the stores on next use """
+        with self._lock:
+            self._built = False
+
+    def on_change(self, event):
+        """ change feed listener """
+        entity = event["entity"]
+        if entity not in ("Country", "City", "Place", "Review"):
+            return
+        with self._lock:
+            if not self._built:
+                return
+            data, previous = event["data"], event.get("previous")
+            if entity == "Country":
+                if previous:
+                    self._codes.pop(previous['code'], None)
+                if data:
+                    self._codes[data['code']] = event["id"]
+            elif entity == "City":
+                self._detach_city(event["id"])
+                if data:
+                    self._attach_city(event["id"], data['country_id'])
+            elif entity == "Place":
+                self._remove_place(event["id"])
+                self._add_place(event["id"])
+            else:
+                for place_id in {review['place_id'] for review in (data, previous) if review}:
+                    if place_id in self._place_entries:
+                        self._remove_place(place_id)
+                        self._add_place(place_id)
+
+    def _ensure_built(self):
+        if not self._built:
+            self._build()
+
+    def country_id(self, code):
+        """ id of the country with this code, None if there is none """
+        with self._lock:
+            self._ensure_built()
+            return self._codes.get(code)
+
+    def city_ids(self, country_id):
+        """ ids of the cities of a country, in the order of the store """
+        with self._lock:
+            self._ensure_built()
+            return list(self._country_cities.get(country_id, ()))
+
+    def summary(self, country_id):
+        """
+        Totals of a country and of each of its cities.
+
+        Returns:
+            dict: the country totals, with the totals per city under "cities"
+        """
+        with self._lock:
+            self._ensure_built()
+            city_ids = self._country_cities.get(country_id, ())
+            summary = self._country_totals.get(country_id, Totals()).to_dict()
+            summary["city_count"] = len(city_ids)
+            summary["cities"] = {city_id: self._city_node(city_id).to_dict()
+                                 for city_id in city_ids}
+            return summary
@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""
+Id generation for the models
+
+New ids are UUIDv7 strings: the first 48 bits are the unix time in ms, so ids
+sort in creation order (handy for keyset pagination) while keeping the same
+36 character format as the existing uuid4 ids.
+
+Ids are also interned when loaded, so that an id repeated in every foreign key
+(country_id, city_id, host_user_id, place_id, ...) is stored only once.
+"""
+
+import os
+import sys
+import threading
+import time
+
+# fields holding ids or foreign keys in the stored records
+ID_FIELDS = ("id", "country_id", "city_id", "host_user_id", "place_id",
+             "commentor_user_id", "amenity_id")
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def new_id():
+    """
+    Time ordered UUIDv7 string.
+
+    The 12 bit rand_a field is used as a counter within the same millisecond,
+    so ids created by this process are strictly increasing.
+    """
+    global _last_ms, _counter  # pylint: disable=global-statement
+
+    with _lock:
+        now_ms = time.time_ns() // 1000000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            _counter = int.from_bytes(os.urandom(1), "big")
+        else:
+            # same ms (or the clock went back): keep counting from the last id
+            _counter += 1
+            if _counter > 0xfff:
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+
+    rand_b = int.from_bytes(os.urandom(8), "big") & 0x3fffffffffffffff
+    h = "%012x%04x%016x" % (ms & 0xffffffffffff, 0x7000 | counter, 0x8000000000000000 | rand_b)
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def intern_id(value):
+    """ the single shared copy of an id string """
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def intern_record(record):
+    """ intern the id and foreign key fields of a record in place """
+    for field in ID_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str):
+            record[field] = sys.intern(value)
+    return record
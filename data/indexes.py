@@ -0,0 +1,326 @@
+#!/usr/bin/python3
+"""
+Secondary indexes over the in-memory stores
+
+The indexes are built from their store the first time they are used and are
+then kept up to date from the change events published by the API (see
+services/changes.py), so building them costs nothing for workers that never
+query them.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+
+# deletes remembered per index for the delta sync clients
+DEFAULT_TOMBSTONES = 100000
+
+
+class UpdatedAtIndex():
+    """Ids of a store ordered by updated_at, plus tombstones of the deleted ids"""
+
+    def __init__(self, entity, store, max_tombstones=DEFAULT_TOMBSTONES):
+        self.entity = entity
+        self.store = store
+        self._lock = threading.Lock()
+        self._built = False
+        self._keys = []          # sorted (updated_at, id)
+        self._updated_at = {}    # id -> updated_at
+        self._tombstones = []    # (deleted_at, id), oldest first
+        self._max_tombstones = max_tombstones
+        # deletes before this time are not known: the tombstones only live in
+        # this process, so nothing deleted before it started is remembered
+        self.horizon = time.time()
+
+    def __getstate__(self):
+        # sent to a process pool with its partition (data/partitions.py)
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _build(self):
+        self._updated_at = {k: v['updated_at'] for k, v in self.store.items()}
+        self._keys = sorted((ts, k) for k, ts in self._updated_at.items())
+        self._built = True
+
+    def _discard(self, entity_id):
+        ts = self._updated_at.pop(entity_id, None)
+        if ts is not None:
+            i = bisect_left(self._keys, (ts, entity_id))
+            if i < len(self._keys) and self._keys[i] == (ts, entity_id):
+                del self._keys[i]
+
+    def invalidate(self):
+        """ drops the index after a missed change, it is rebuilt from the store on next use """
+        with self._lock:
+            self._built = False
+
+    def on_change(self, event):
+        """ change feed listener """
+        if event["entity"] != self.entity:
+            return
+        entity_id = event["id"]
+        with self._lock:
+            if event["op"] == "delete":
+                self._tombstones.append((event["timestamp"], entity_id))
+                if len(self._tombstones) > self._max_tombstones:
+                    # forget the oldest tenth in one go rather than one by one
+                    drop = max(1, self._max_tombstones // 10)
+                    self.horizon = self._tombstones[drop - 1][0]
+                    del self._tombstones[:drop]
+            if not self._built:
+                # built from the store on first use, which already has the change
+                return
+            self._discard(entity_id)
+            if event["op"] != "delete":
+                ts = event["data"]["updated_at"]
+                self._updated_at[entity_id] = ts
+                # most changes are the newest, so this is usually an append
+                insort(self._keys, (ts, entity_id))
+
+    def updated_since(self, since):
+        """ ids updated strictly after `since`, oldest change first """
+        with self._lock:
+            if not self._built:
+                self._build()
+            start = bisect_right(self._keys, (since, "\uffff"))
+            return [k for _, k in self._keys[start:]]
+
+    def watermark(self):
+        """
+        The updated_since to send after a full listing: the newest change the
+        index knows of, and never before the horizon, so it is always accepted.
+        """
+        with self._lock:
+            if not self._built:
+                self._build()
+            latest = [self.horizon]
+            if self._keys:
+                latest.append(self._keys[-1][0])
+            if self._tombstones:
+                latest.append(self._tombstones[-1][0])
+            return max(latest)
+
+    def deleted_since(self, since):
+        """
+        Tombstones of the ids deleted after `since`.
+
+        Returns:
+            list: (deleted_at, id) tuples, oldest first
+
+        Raises:
+            LookupError: if deletes after `since` are no longer remembered
+        """
+        with self._lock:
+            if since < self.horizon:
+                raise LookupError(f"Deletes before {self.horizon} are no longer available")
+            start = bisect_right(self._tombstones, (since, "\uffff"))
+            return self._tombstones[start:]
+
+
+class ReviewsByPlace():
+    """Review ids and ratings grouped by place"""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._built = False
+        self._places = {}    # place_id -> {review_id: rating}
+
+    def _build(self):
+        places = {}
+        for review in list(self.store.values()):
+            places.setdefault(review['place_id'], {})[review['id']] = review['rating']
+        self._places = places
+        self._built = True
+
+    def _remove(self, review):
+        ratings = self._places.get(review['place_id'])
+        if ratings is not None:
+            ratings.pop(review['id'], None)
+            if not ratings:
+                del self._places[review['place_id']]
+
+    def invalidate(self):
+        """ drops the index after a missed change, it is rebuilt from the store on next use """
+        with self._lock:
+            self._built = False
+
+    def on_change(self, event):
+        """ change feed listener """
+        if event["entity"] != "Review":
+            return
+        with self._lock:
+            if not self._built:
+                return
+            if event.get("previous"):
+                self._remove(event["previous"])
+            if event["op"] != "delete":
+                review = event["data"]
+                self._places.setdefault(review['place_id'], {})[review['id']] = review['rating']
+
+    def review_ids(self, place_id):
+        """ ids of the reviews of a place """
+        with self._lock:
+            if not self._built:
+                self._build()
+            return list(self._places.get(place_id, ()))
+
+    def rating(self, place_id):
+        """ (number of reviews, sum of the ratings) of a place """
+        with self._lock:
+            if not self._built:
+                self._build()
+            ratings = self._places.get(place_id)
+            return (len(ratings), sum(ratings.values())) if ratings else (0, 0)
+
+
+
+def normalize_email(email):
+    """ the form of an email used for the uniqueness checks """
+    return email.strip().lower()
+
+
+class SqliteEmailClaims():
+    """
+    Emails claimed by the signups of every worker of the deployment, in a
+    SQLite file next to the data files. The email is the primary key, so of
+    two workers claiming the same email only the first insert succeeds.
+
+    The file outlives the workers, and a claim can outlive its user (a data
+    file restored, a worker killed mid-signup), so the server rebuilds the
+    claims from the users with rebuild() when it starts, before any worker.
+    """
+
+    def __init__(self, path=None):
+        self.path = os.path.abspath(path or os.path.join("data", "emails.sqlite"))
+        self._local = threading.local()
+
+    def _connect(self):
+        # one connection per thread, and never one opened before a fork
+        conn, pid = getattr(self._local, "conn", (None, None))
+        if conn is None or pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS emails (email TEXT PRIMARY KEY)")
+            self._local.conn = (conn, os.getpid())
+        return conn
+
+    def claim(self, email):
+        """ True if the email was free and is now claimed """
+        try:
+            self._connect().execute("INSERT INTO emails (email) VALUES (?)", (email,))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def release(self, email):
+        """ frees an email, after a failed signup or a deleted user """
+        self._connect().execute("DELETE FROM emails WHERE email = ?", (email,))
+
+    def rebuild(self, emails):
+        """ replaces every claim by the (not normalized) `emails`, while no worker runs """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM emails")
+            conn.executemany("INSERT OR IGNORE INTO emails (email) VALUES (?)",
+                             ((normalize_email(email),) for email in emails))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+class EmailIndex():
+    """
+    Unique index of the user emails, case insensitive.
+
+    Signups reserve their email before the user is created, so two concurrent
+    signups with the same email can't both succeed. The index only knows the
+    users of its own process: with `claims` (SqliteEmailClaims) the signups
+    also claim the email in storage shared by the workers, so two workers
+    can't both accept it either.
+    """
+
+    def __init__(self, store, claims=None):
+        self.store = store
+        self.claims = claims
+        self._lock = threading.Lock()
+        self._built = False
+        self._ids = {}    # normalized email -> user id (or a reservation)
+
+    def _build(self):
+        ids = {}
+        for k, v in list(self.store.items()):
+            # the oldest user keeps an email registered twice before the index
+            ids.setdefault(normalize_email(v['email']), k)
+        self._ids = ids
+        self._built = True
+
+    def invalidate(self):
+        """ drops the index after a missed change, it is rebuilt from the store on next use """
+        with self._lock:
+            self._built = False
+
+    def on_change(self, event):
+        """ change feed listener """
+        if event["entity"] != "User":
+            return
+        if event["op"] == "delete" and self.claims is not None and event.get("previous"):
+            self.claims.release(normalize_email(event["previous"]['email']))
+        with self._lock:
+            if not self._built:
+                return
+            previous = event.get("previous")
+            if previous:
+                email = normalize_email(previous['email'])
+                if self._ids.get(email) == event["id"]:
+                    del self._ids[email]
+            if event["op"] != "delete":
+                self._ids[normalize_email(event["data"]['email'])] = event["id"]
+
+    def reserve(self, email):
+        """
+        Claim an email for a user about to be created.
+
+        Returns:
+            object: the reservation to pass to release() if the signup fails,
+                None if the email is already taken
+        """
+        email = normalize_email(email)
+        reservation = object()
+        with self._lock:
+            if not self._built:
+                self._build()
+            if email in self._ids:
+                return None
+            # the workers sharing the claims may have taken it since they loaded
+            if self.claims is not None and not self.claims.claim(email):
+                return None
+            # replaced by the user id when the create event comes in
+            self._ids[email] = reservation
+            return reservation
+
+    def release(self, email, reservation):
+        """ give up a reservation """
+        email = normalize_email(email)
+        with self._lock:
+            if self._ids.get(email) is reservation:
+                del self._ids[email]
+                if self.claims is not None:
+                    self.claims.release(email)
+
+    def get(self, email):
+        """ the id of the user with this email, None if there is none """
+        with self._lock:
+            if not self._built:
+                self._build()
+            user_id = self._ids.get(normalize_email(email))
+        return user_id if isinstance(user_id, str) else None
@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+"""
+Existence checks for the foreign keys
+
+City.country_id and the Review foreign keys must be ids of their stores.
+Asking the store is cheap while it is a dict in this process, but not once
+it lives elsewhere, so the checks go through a KeyChecker:
+
+- a bloom filter of every id answers "no" for an invalid id without asking
+  the store (no false negatives; false positives at `error_rate`)
+- a small LRU of ids recently found in the store answers "yes" for the hot ids
+- anything else reads through to the store and the answer is cached
+
+The filter is built from the store on first use and kept up to date from the
+change feed (see app.py). Deleted ids can't be removed from a bloom filter,
+they are only dropped from the cache, so the filter is rebuilt once too many
+of its ids are gone or the store grew past the size it was built for.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+from data import country_data, place_data, user_data
+
+DEFAULT_ERROR_RATE = 0.01
+DEFAULT_CACHE_SIZE = 4096
+
+
+class BloomFilter():
+    """Fixed size bloom filter of strings"""
+
+    def __init__(self, capacity, error_rate=DEFAULT_ERROR_RATE):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # double hashing on the two halves of the (cached) str hash
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        position, step = h & 0xFFFFFFFF, (h >> 32) | 1
+        size = self.size
+        for _ in range(self.hashes):
+            yield position % size
+            position += step
+
+    def add(self, key):
+        """ add a key """
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        bits = self._bits
+        # stops at the first unset bit, so most misses cost one or two probes
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class KeyChecker():
+    """Cached existence checks for the ids of a store (use it with is_key_of)"""
+
+    def __init__(self, entity, store, error_rate=DEFAULT_ERROR_RATE,
+                 cache_size=DEFAULT_CACHE_SIZE):
+        self.entity = entity
+        self.store = store
+        self.error_rate = error_rate
+        self.cache_size = cache_size
+        self._filter = None
+        self._count = 0       # ids in the store the filter knows about
+        self._deleted = 0     # ids still in the filter but no longer in the store
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.negatives = 0    # invalid ids answered by the filter alone
+        self.cache_hits = 0
+        self.lookups = 0      # reads through to the store
+
+    def _build(self):
+        count = len(self.store)
+        bloom = BloomFilter(max(2 * count, 1024), self.error_rate)
+        for key in list(self.store):
+            bloom.add(key)
+        self._filter = bloom
+        self._count = count
+        self._deleted = 0
+        self._cache.clear()
+
+    def _stale(self):
+        # ids added to the store without an event (scripts, tests, imports)
+        return self._filter is None or len(self.store) != self._count
+
+    def invalidate(self):
+        """ drops the filter after a missed change, it is rebuilt from the store on next use """
+        with self._lock:
+            self._filter = None
+
+    def on_change(self, event):
+        """ change feed listener """
+        if event["entity"] != self.entity:
+            return
+        with self._lock:
+            if self._filter is None:
+                return
+            if event["op"] == "create":
+                self._filter.add(event["id"])
+                self._count += 1
+                if self._count > self._filter.capacity:
+                    self._filter = None
+            elif event["op"] == "delete":
+                self._cache.pop(event["id"], None)
+                self._count -= 1
+                self._deleted += 1
+                if self._deleted > self._count:
+                    self._filter = None
+
+    def __contains__(self, key):
+        with self._lock:
+            if self._stale():
+                self._build()
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return True
+            if key not in self._filter:
+                self.negatives += 1
+                return False
+            self.lookups += 1
+            found = key in self.store
+            if found:
+                self._cache[key] = True
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            return found
+
+
+country_ids = KeyChecker("Country", country_data)
+user_ids = KeyChecker("User", user_data)
+place_ids = KeyChecker("Place", place_data)
@@ -0,0 +1,151 @@
+#!/usr/bin/python3
+"""
+Stores loaded on first access, and the startup timings
+
+A LazyStore is an empty dict until something reads or writes it; then its
+loader runs once (under a lock) and the store switches its class to
+LoadedStore, a dict subclass that overrides nothing, so every access after
+the load runs at plain dict speed. Importing data/ no longer reads any file,
+and a worker that never touches a store never pays for it.
+
+The phases of the startup (each store load, the import of the app, the
+gunicorn worker boot) are recorded in `timings`, in order, in seconds.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# phase -> seconds, in the order the phases ended
+timings = {}
+
+_load_lock = threading.RLock()
+
+
+def record(phase, seconds):
+    """ records how long a startup phase took """
+    timings[phase] = round(seconds, 6)
+
+
+@contextmanager
+def timed(phase):
+    """ records how long the body of the with block took """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - started)
+
+
+class LoadedStore(dict):
+    """A store whose data is loaded"""
+
+    __slots__ = ("name", "loader")
+
+    loaded = True
+
+    def load(self):
+        """ already loaded """
+        return self
+
+
+class LazyStore(dict):
+    """A store that loads its data on first access"""
+
+    __slots__ = ("name", "loader")
+
+    loaded = False
+
+    def __init__(self, name, loader):
+        super().__init__()
+        self.name = name
+        self.loader = loader
+
+    def load(self):
+        """ runs the loader once, then behaves as a plain dict """
+        with _load_lock:
+            if self.loaded:
+                # loaded by another thread while this one waited
+                return self
+            with timed(f"load {self.name}"):
+                dict.update(self, self.loader())
+            self.__class__ = LoadedStore
+        return self
+
+    # every dict method loads the store first; after the load the class is
+    # LoadedStore and these are no longer in the way
+    def __getitem__(self, key):
+        return self.load()[key]
+
+    def __setitem__(self, key, value):
+        self.load()[key] = value
+
+    def __delitem__(self, key):
+        del self.load()[key]
+
+    def __contains__(self, key):
+        return key in self.load()
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __reversed__(self):
+        return reversed(self.load())
+
+    def __len__(self):
+        return len(self.load())
+
+    def __bool__(self):
+        return bool(len(self.load()))
+
+    def __eq__(self, other):
+        return self.load() == other
+
+    def __ne__(self, other):
+        return self.load() != other
+
+    def __repr__(self):
+        return repr(self.load())
+
+    def __or__(self, other):
+        return self.load() | other
+
+    def __ror__(self, other):
+        return other | dict(self.load())
+
+    def __ior__(self, other):
+        self.load().update(other)
+        return self
+
+    def get(self, key, default=None):
+        return self.load().get(key, default)
+
+    def keys(self):
+        return self.load().keys()
+
+    def values(self):
+        return self.load().values()
+
+    def items(self):
+        return self.load().items()
+
+    def pop(self, *args):
+        return self.load().pop(*args)
+
+    def popitem(self):
+        return self.load().popitem()
+
+    def setdefault(self, key, default=None):
+        return self.load().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self.load().update(*args, **kwargs)
+
+    def copy(self):
+        return self.load().copy()
+
+    def clear(self):
+        """ empties the store, without loading what would be thrown away """
+        with _load_lock:
+            dict.clear(self)
+            self.__class__ = LoadedStore
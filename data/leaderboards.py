@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+"""
+Top places per city and per country
+
+For every city and every country the places are kept sorted three ways:
+    rating   Bayesian average of the ratings, best first
+    price    price per night, cheapest first
+    reviews  number of reviews, most reviewed first
+
+so a leaderboard read is a slice of the first K entries. The boards are
+built on first use and then updated place by place from the change events
+of the places, the reviews and the cities (a city moved to another country
+moves its places too).
+
+The Bayesian average pulls the places with few reviews towards a prior:
+    (PRIOR_WEIGHT * PRIOR_RATING + sum of ratings) / (PRIOR_WEIGHT + reviews)
+The prior is fixed instead of the global mean, so a new review only moves
+the place it is about.
+"""
+
+import threading
+from bisect import bisect_left, insort
+
+PRIOR_RATING = 3.0
+PRIOR_WEIGHT = 5
+
+METRICS = ("rating", "price", "reviews")
+SCOPES = ("city", "country")
+
+
+def bayesian_rating(count, total):
+    """ the rating used to rank a place """
+    return (PRIOR_WEIGHT * PRIOR_RATING + total) / (PRIOR_WEIGHT + count)
+
+
+class Leaderboards():
+    """Sorted places per city and per country"""
+
+    def __init__(self, places, cities, reviews_by_place):
+        self.places = places
+        self.cities = cities
+        self.reviews_by_place = reviews_by_place
+        self._lock = threading.Lock()
+        self._built = False
+        self._entries = {}      # place_id -> (city_id, country_id, {metric: sort key})
+        self._city_places = {}  # city_id -> set of place ids
+        self._boards = {}       # (scope, group id, metric) -> sorted [(sort key, place_id)]
+
+    def _stats(self, place_id, place):
+        """ (city_id, country_id, {metric: sort key}) of a place, None if unranked """
+        city_id = place.get('city_id')
+        price = place.get('price_per_night')
+        if city_id is None or price is None:
+            return None
+        city = self.cities.get(city_id)
+        count, total = self.reviews_by_place.rating(place_id)
+        keys = {
+            "rating": -bayesian_rating(count, total),
+            "price": price,
+            "reviews": -count,
+        }
+        return city_id, city['country_id'] if city else None, keys
+
+    def _remove(self, place_id):
+        entry = self._entries.pop(place_id, None)
+        if entry is None:
+            return
+        city_id, country_id, keys = entry
+        self._city_places.get(city_id, set()).discard(place_id)
+        for scope, group in (("city", city_id), ("country", country_id)):
+            for metric, key in keys.items():
+                board = self._boards.get((scope, group, metric))
+                if board is None:
+                    continue
+                i = bisect_left(board, (key, place_id))
+                if i < len(board) and board[i] == (key, place_id):
+                    del board[i]
+
+    def _add(self, place_id):
+        place = self.places.get(place_id)
+        stats = self._stats(place_id, place) if place is not None else None
+        if stats is None:
+            return
+        city_id, country_id, keys = stats
+        self._entries[place_id] = stats
+        self._city_places.setdefault(city_id, set()).add(place_id)
+        for scope, group in (("city", city_id), ("country", country_id)):
+            if group is None:
+                continue
+            for metric, key in keys.items():
+                insort(self._boards.setdefault((scope, group, metric), []), (key, place_id))
+
+    def _update(self, place_id):
+        self._remove(place_id)
+        self._add(place_id)
+
+    def _build(self):
+        self._entries = {}
+        self._city_places = {}
+        self._boards = {}
+        for place_id in list(self.places):
+            self._add(place_id)
+        self._built = True
+
+    def invalidate(self):
+        """ drops the boards after a missed change, they are rebuilt on next use """
+        with self._lock:
+            self._built = False
+
+    def on_change(self, event):
+        """ change feed listener """
+        entity = event["entity"]
+        if entity not in ("Place", "Review", "City"):
+            return
+        with self._lock:
+            if not self._built:
+                return
+            if entity == "Place":
+                self._update(event["id"])
+            elif entity == "Review":
+                place_ids = {review['place_id'] for review in (event["data"], event.get("previous"))
+                             if review}
+                for place_id in place_ids:
+                    self._update(place_id)
+            else:
+                previous, city = event.get("previous"), event["data"]
+                if (city or {}).get('country_id') != (previous or {}).get('country_id'):
+                    for place_id in list(self._city_places.get(event["id"], ())):
+                        self._update(place_id)
+
+    def top(self, scope, group_id, metric, k=10):
+        """
+        The first k places of a board.
+
+        Returns:
+            list: place ids, best first
+        """
+        with self._lock:
+            if not self._built:
+                self._build()
+            board = self._boards.get((scope, group_id, metric), [])
+            return [place_id for _, place_id in board[:k]]
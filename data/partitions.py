@@ -0,0 +1,271 @@
+#!/usr/bin/python3
+"""
+Partitions of the cities, places and reviews by country
+
+A city belongs to the partition of its country_id, a place to the partition
+of its city and a review to the partition of its place. Each partition holds
+its own copy of its records with its own updated_at indexes, and can write
+them to its own files under <directory>/<country_id>/, so a busy market only
+rewrites its own (small) files.
+
+The PartitionRouter keeps the partitions up to date from the change events,
+moving the records when a city changes country, a place changes city or a
+review changes place. It sends a lookup to the partition of a record and runs
+a global listing as a scatter-gather over the partitions; a partition can be
+assigned an executor of its own (a thread or process pool serving it) and
+otherwise runs in the calling thread. A process pool gets a pickled copy of
+the partition, so its work has to be picklable too (a module level function,
+not a lambda) and only sees the records as they were when it was sent.
+
+The global stores in data/ stay the source of truth: the partitions are built
+from them on first use. The partition files are an export per country for
+other tools, never read back, so they are written in batches: the changes of
+HBNB_PARTITION_FLUSH_DELAY seconds go out together, off the request threads.
+"""
+
+import os
+import threading
+from data.file_storage import write_json_atomic
+from data.indexes import UpdatedAtIndex
+
+ENTITIES = ("City", "Place", "Review")
+FILES = {"City": "city.json", "Place": "place.json", "Review": "review.json"}
+
+# partition of the places whose city is unknown and of their reviews
+UNASSIGNED = "unassigned"
+
+# the partition files are only written when a directory is set
+DEFAULT_DIR = os.environ.get("HBNB_PARTITION_DIR")
+# seconds between a change and the write of the partition files
+DEFAULT_FLUSH_DELAY = float(os.environ.get("HBNB_PARTITION_FLUSH_DELAY", "1.0"))
+
+
+class Partition():
+    """The cities, places and reviews of one country"""
+
+    def __init__(self, key):
+        self.key = key
+        self.records = {entity: {} for entity in ENTITIES}
+        self.updates = {entity: UpdatedAtIndex(entity, self.records[entity])
+                        for entity in ENTITIES}
+        self.dirty = set()
+
+    def put(self, event, record):
+        """ stores a record and feeds the change to the indexes of the partition """
+        entity = event["entity"]
+        self.records[entity][record['id']] = record
+        self.updates[entity].on_change(event)
+        self.dirty.add(entity)
+
+    def discard(self, event, entity_id):
+        """ removes a record, as a delete for the indexes of the partition """
+        entity = event["entity"]
+        if self.records[entity].pop(entity_id, None) is not None:
+            self.updates[entity].on_change(dict(event, op="delete", id=entity_id, data=None))
+            self.dirty.add(entity)
+
+    def counts(self):
+        """ number of records per entity """
+        return {entity: len(records) for entity, records in self.records.items()}
+
+    def take_dirty(self):
+        """ the records of the changed entities, which are then clean again """
+        changed = {entity: list(self.records[entity].values()) for entity in sorted(self.dirty)}
+        self.dirty = set()
+        return changed
+
+    def flush(self, directory):
+        """ writes the changed entities of the partition to their files """
+        write_partition(directory, self.key, self.take_dirty())
+
+
+def count_records(partition):
+    """ the record counts of a partition as a listing row, picklable work for scatter_gather """
+    return [dict({"key": partition.key}, **partition.counts())]
+
+
+def write_partition(directory, key, changed):
+    """ writes the records taken by Partition.take_dirty() to their files """
+    if not changed:
+        return
+    path = os.path.join(directory, key)
+    os.makedirs(path, exist_ok=True)
+    for entity, records in changed.items():
+        write_json_atomic(os.path.join(path, FILES[entity]), {entity: records})
+
+
+class PartitionRouter():
+    """Routes the cities, places and reviews to the partition of their country"""
+
+    def __init__(self, cities, places, reviews, directory=DEFAULT_DIR,
+                 flush_delay=DEFAULT_FLUSH_DELAY):
+        self.stores = {"City": cities, "Place": places, "Review": reviews}
+        self.directory = directory
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()    # one flush writing at a time, in order
+        self._flush_timer = None
+        self._built = False
+        self._partitions = {}   # key -> Partition
+        self._homes = {}        # (entity, id) -> key
+        self._children = {}     # (entity, id) -> set of child ids (places of a city, reviews of a place)
+        self._executors = {}    # key -> executor
+
+    def _key(self, entity, record):
+        if entity == "City":
+            return record['country_id']
+        parent = ("City", record.get('city_id')) if entity == "Place" \
+            else ("Place", record.get('place_id'))
+        return self._homes.get(parent, UNASSIGNED)
+
+    def _parent(self, entity, record):
+        if entity == "Place":
+            return ("City", record.get('city_id'))
+        if entity == "Review":
+            return ("Place", record.get('place_id'))
+        return None
+
+    def _place(self, event, entity, record):
+        """ puts a record in its partition, moving it and its children if it changed partition """
+        key = self._key(entity, record)
+        home = self._homes.get((entity, record['id']))
+        if home is not None and home != key:
+            self._partitions[home].discard(dict(event, entity=entity), record['id'])
+        self._homes[(entity, record['id'])] = key
+        if key not in self._partitions:
+            self._partitions[key] = Partition(key)
+        self._partitions[key].put(dict(event, entity=entity, id=record['id'], data=record), record)
+        if home is not None and home != key:
+            child = "Place" if entity == "City" else "Review"
+            store = self.stores[child]
+            for child_id in list(self._children.get((entity, record['id']), ())):
+                if child_id in store:
+                    self._place(event, child, store[child_id])
+
+    def _link(self, entity, record, previous):
+        if previous:
+            self._children.get(self._parent(entity, previous), set()).discard(previous['id'])
+        if record:
+            self._children.setdefault(self._parent(entity, record), set()).add(record['id'])
+
+    def _build(self):
+        self._partitions = {}
+        self._homes = {}
+        self._children = {}
+        for entity in ENTITIES:
+            for record in list(self.stores[entity].values()):
+                if entity != "City":
+                    self._link(entity, record, None)
+                self._place({"entity": entity, "op": "create", "timestamp": 0}, entity, record)
+        self._built = True
+
+    def invalidate(self):
+        """ drops the partitions, rebuilt from the global stores on next use """
+        with self._lock:
+            self._built = False
+
+    def on_change(self, event):
+        """ change feed listener """
+        entity = event["entity"]
+        if entity not in ENTITIES:
+            return
+        with self._lock:
+            if not self._built:
+                return
+            record, previous = event["data"], event.get("previous")
+            if entity != "City":
+                self._link(entity, record, previous)
+            if record:
+                self._place(event, entity, record)
+            else:
+                home = self._homes.pop((entity, event["id"]), None)
+                if home is not None:
+                    self._partitions[home].discard(event, event["id"])
+            if self.directory and self._flush_timer is None:
+                # the changes coming in until it fires are written with this one
+                self._flush_timer = threading.Timer(self.flush_delay, self._flush_later)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _flush_later(self):
+        with self._lock:
+            self._flush_timer = None
+        self.flush()
+
+    def _ensure_built(self):
+        if not self._built:
+            self._build()
+
+    def assign(self, key, executor):
+        """
+        runs the work of a partition on this executor (a thread or process
+        pool, which then needs picklable work)
+        """
+        with self._lock:
+            self._executors[key] = executor
+
+    def keys(self):
+        """ keys of the partitions, the country ids """
+        with self._lock:
+            self._ensure_built()
+            return list(self._partitions)
+
+    def partition(self, key):
+        """ the partition of a country, None if it has no records """
+        with self._lock:
+            self._ensure_built()
+            return self._partitions.get(key)
+
+    def route(self, entity, entity_id):
+        """ the partition holding a record, None if the record is unknown """
+        with self._lock:
+            self._ensure_built()
+            key = self._homes.get((entity, entity_id))
+            return self._partitions.get(key) if key is not None else None
+
+    def scatter_gather(self, func, merge=None, keys=None):
+        """
+        Runs func(partition) on every partition (or those in keys) and merges
+        the results.
+
+        Partitions with an executor of their own run there, concurrently,
+        the others run in the calling thread. A partition with a process pool
+        is sent pickled, along with func.
+
+        Args:
+            func (callable): the work done per partition
+            merge (callable): takes the list of the results, defaults to
+                concatenating them
+            keys (iterable): the partitions to query, all of them by default
+
+        Returns:
+            the merged results
+        """
+        with self._lock:
+            self._ensure_built()
+            wanted = list(self._partitions) if keys is None else keys
+            partitions = [self._partitions[k] for k in wanted if k in self._partitions]
+            executors = dict(self._executors)
+
+        pending = [executors[p.key].submit(func, p) if p.key in executors else None
+                   for p in partitions]
+        results = [future.result() if future is not None else func(p)
+                   for p, future in zip(partitions, pending)]
+        if merge is None:
+            return [item for result in results for item in result]
+        return merge(results)
+
+    def flush(self):
+        """ writes the changed partitions to their files, out of the router lock """
+        if not self.directory:
+            return
+        with self._flush_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    # this flush writes what the timer was waiting for
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                self._ensure_built()
+                changed = [(p.key, p.take_dirty()) for p in self._partitions.values()]
+            for key, records in changed:
+                write_partition(self.directory, key, records)
@@ -0,0 +1,290 @@
+#!/usr/bin/python3
+"""
+Users <-> places graph of the reviews
+
+Every review is an edge between its author and its place. The edges are
+kept in both directions as CSR arrays: the neighbours of node i are
+adj[off[i]:off[i + 1]], with the ids interned to ints and the arrays packed
+(4 bytes per edge and direction), so 10M reviews take about 100MB with the
+offsets, plus the ids, instead of a dict per edge.
+
+CSR arrays can't take inserts, so the changes since the last compaction go
+to small per-node deltas (edges added, edges removed) that the queries
+merge in. Once the deltas hold more than COMPACT_RATIO of the edges, the
+arrays are rebuilt with them.
+
+As the other indexes, the graph is built from the store on first use and
+then follows the Review change events.
+"""
+
+import heapq
+import threading
+from array import array
+from collections import Counter
+from itertools import accumulate
+
+COMPACT_RATIO = 0.1
+COMPACT_MIN = 10000
+
+
+def _csr(sources, targets, nodes):
+    """ (offsets, neighbours) of the edges sources[i] -> targets[i] """
+    counts = [0] * (nodes + 1)
+    for s in sources:
+        counts[s + 1] += 1
+    offsets = array("q", accumulate(counts))
+    position = list(offsets)
+    adj = array("i", bytes(4 * len(targets)))
+    for s, t in zip(sources, targets):
+        adj[position[s]] = t
+        position[s] += 1
+    return offsets, adj
+
+
+class _Side():
+    """One direction of the graph: a CSR base plus the deltas"""
+
+    def __init__(self):
+        self.offsets = array("q", [0])
+        self.adj = array("i")
+        self.added = {}     # node -> [neighbours added]
+        self.removed = {}   # node -> Counter of neighbours removed
+
+    def neighbours(self, node):
+        """ the neighbours of a node, once per edge """
+        if node + 1 < len(self.offsets):
+            found = self.adj[self.offsets[node]:self.offsets[node + 1]].tolist()
+        else:
+            found = []
+        removed = self.removed.get(node)
+        if removed:
+            removed = Counter(removed)
+            kept = []
+            for other in found:
+                if removed[other]:
+                    removed[other] -= 1
+                else:
+                    kept.append(other)
+            found = kept
+        return found + self.added.get(node, [])
+
+    def add(self, node, other):
+        removed = self.removed.get(node)
+        if removed and removed[other]:
+            # an edge of the base removed and added back
+            removed[other] -= 1
+            if not removed[other]:
+                del removed[other]
+            return
+        self.added.setdefault(node, []).append(other)
+
+    def remove(self, node, other):
+        added = self.added.get(node)
+        if added and other in added:
+            added.remove(other)
+            return
+        self.removed.setdefault(node, Counter())[other] += 1
+
+    def nbytes(self):
+        """ size of the CSR arrays """
+        return self.offsets.itemsize * len(self.offsets) + self.adj.itemsize * len(self.adj)
+
+
+class ReviewGraph():
+    """Bipartite graph of the users and the places they reviewed"""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._built = False
+        self._reset()
+
+    def _reset(self):
+        self._user_ids = []       # user node -> user id
+        self._users = {}          # user id -> user node
+        self._place_ids = []
+        self._places = {}
+        self._by_user = _Side()   # user node -> place nodes
+        self._by_place = _Side()  # place node -> user nodes
+        self._user_reviews = array("i")
+        self._edges = 0
+        self._changes = 0
+
+    def _user(self, user_id):
+        node = self._users.get(user_id)
+        if node is None:
+            node = self._users[user_id] = len(self._user_ids)
+            self._user_ids.append(user_id)
+            self._user_reviews.append(0)
+        return node
+
+    def _place(self, place_id):
+        node = self._places.get(place_id)
+        if node is None:
+            node = self._places[place_id] = len(self._place_ids)
+            self._place_ids.append(place_id)
+        return node
+
+    def load(self, edges):
+        """
+        Replaces the graph with these edges, in bulk, instead of building it
+        from the store.
+
+        Args:
+            edges (iterable): (user id, place id) of every review
+        """
+        with self._lock:
+            self._load(edges)
+            self._built = True
+
+    def _load(self, edges):
+        self._reset()
+        users, places = array("i"), array("i")
+        for user_id, place_id in edges:
+            users.append(self._user(user_id))
+            places.append(self._place(place_id))
+        self._set_base(users, places)
+
+    def _set_base(self, users, places):
+        self._by_user = _Side()
+        self._by_place = _Side()
+        self._by_user.offsets, self._by_user.adj = _csr(users, places, len(self._user_ids))
+        self._by_place.offsets, self._by_place.adj = _csr(places, users, len(self._place_ids))
+        self._user_reviews = array("i", bytes(4 * len(self._user_ids)))
+        for user in users:
+            self._user_reviews[user] += 1
+        self._edges = len(users)
+        self._changes = 0
+
+    def _compact(self):
+        """ rebuilds the CSR arrays with the deltas folded in """
+        users, places = array("i"), array("i")
+        for user in range(len(self._user_ids)):
+            for place in self._by_user.neighbours(user):
+                users.append(user)
+                places.append(place)
+        self._set_base(users, places)
+
+    def _build(self):
+        self._load((v['commentor_user_id'], v['place_id']) for v in list(self.store.values()))
+        self._built = True
+
+    def _add(self, review):
+        user, place = self._user(review['commentor_user_id']), self._place(review['place_id'])
+        self._by_user.add(user, place)
+        self._by_place.add(place, user)
+        self._user_reviews[user] += 1
+        self._edges += 1
+
+    def _remove(self, review):
+        user = self._users.get(review['commentor_user_id'])
+        place = self._places.get(review['place_id'])
+        if user is None or place is None:
+            return
+        self._by_user.remove(user, place)
+        self._by_place.remove(place, user)
+        self._user_reviews[user] -= 1
+        self._edges -= 1
+
+    def invalidate(self):
+        """ drops the graph, reloaded from the store on next use """
+        with self._lock:
+            self._built = False
+
+    def on_change(self, event):
+        """ change feed listener """
+        if event["entity"] != "Review":
+            return
+        data, previous = event["data"], event.get("previous")
+        with self._lock:
+            if not self._built:
+                return
+            if previous and data and \
+                    (previous['commentor_user_id'], previous['place_id']) == \
+                    (data['commentor_user_id'], data['place_id']):
+                return
+            if previous:
+                self._remove(previous)
+            if data:
+                self._add(data)
+            self._changes += 1
+            if self._changes > max(COMPACT_MIN, COMPACT_RATIO * self._edges):
+                self._compact()
+
+    def _ensure_built(self):
+        if not self._built:
+            self._build()
+
+    def reviewers(self, place_id):
+        """ ids of the users who reviewed a place """
+        with self._lock:
+            self._ensure_built()
+            place = self._places.get(place_id)
+            if place is None:
+                return []
+            return [self._user_ids[u] for u in dict.fromkeys(self._by_place.neighbours(place))]
+
+    def reviewed_places(self, user_id):
+        """ ids of the places a user reviewed """
+        with self._lock:
+            self._ensure_built()
+            user = self._users.get(user_id)
+            if user is None:
+                return []
+            return [self._place_ids[p] for p in dict.fromkeys(self._by_user.neighbours(user))]
+
+    def also_reviewed(self, place_id, k=10):
+        """
+        The places most often reviewed by the users who reviewed a place.
+
+        Returns:
+            list: (place id, number of those users who reviewed it), most first
+        """
+        with self._lock:
+            self._ensure_built()
+            place = self._places.get(place_id)
+            if place is None:
+                return []
+            counts = Counter()
+            for user in set(self._by_place.neighbours(place)):
+                counts.update(set(self._by_user.neighbours(user)))
+            counts.pop(place, None)
+            place_ids = self._place_ids
+            # ties go to the smallest place id, not to the first place interned
+            best = heapq.nsmallest(k, counts.items(),
+                                   key=lambda item: (-item[1], place_ids[item[0]]))
+            return [(place_ids[p], n) for p, n in best]
+
+    def top_reviewers(self, k=10):
+        """
+        The users with the most reviews.
+
+        Returns:
+            list: (user id, reviews, distinct places reviewed), most reviews first
+        """
+        with self._lock:
+            self._ensure_built()
+            reviews = self._user_reviews
+            # the k-th count first, the plain ints compare without a key function
+            top = heapq.nlargest(k, reviews)
+            if not top or top[0] == 0:
+                return []
+            floor = max(top[-1], 1)
+            # then the ties at that count go to the smallest user id
+            best = heapq.nsmallest(k, ((-n, self._user_ids[u], u)
+                                       for u, n in enumerate(reviews) if n >= floor))
+            return [(user_id, -n, len(set(self._by_user.neighbours(u))))
+                    for n, user_id, u in best]
+
+    def stats(self):
+        """ size of the graph and of its arrays """
+        with self._lock:
+            self._ensure_built()
+            return {
+                "users": len(self._user_ids),
+                "places": len(self._place_ids),
+                "reviews": self._edges,
+                "pending_changes": self._changes,
+                "array_bytes": self._by_user.nbytes() + self._by_place.nbytes()
+                + self._user_reviews.itemsize * len(self._user_reviews)
+            }
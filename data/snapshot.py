@@ -0,0 +1,274 @@
+#!/usr/bin/python3
+"""
+Point-in-time snapshots of the in-memory stores
+
+The API keeps the current state in the stores of data/__init__.py, the JSON
+files only get the created rows appended. A snapshot writes every store out
+as it was at one change feed sequence number, without stopping the writers:
+
+- the stores are copied while the change feed lock is held, so no event is
+  published in between. The records are never modified in place (handlers
+  replace them), so a shallow copy of each dict is a consistent copy and
+  costs a few milliseconds per million rows.
+- the files are written from the copies after the lock is released, into a
+  temporary folder that is renamed to snapshot-<time>-<seq> once the manifest
+  with the checksums is on disk, so an interrupted snapshot is never picked up.
+- a store without any change since the previous snapshot of the same process
+  is hard linked from it instead of being written again.
+
+A handler mutates its store just before it publishes the event, so a
+snapshot may already contain a change made after its seq. The events carry
+whole records, so replaying the change feed from the seq on top of a
+restored snapshot still ends in the right state.
+
+The files have the same layout as data/*.json, so a restore is a checked
+copy of the files into the data folder:
+
+    python -m data.snapshot list
+    python -m data.snapshot verify snapshots/snapshot-1715566897190-000000000042
+    python -m data.snapshot restore --data-dir data    # the newest one
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+from data.file_storage import write_json_atomic
+
+DEFAULT_DIR = os.environ.get("HBNB_SNAPSHOT_DIR", "snapshots")
+
+MANIFEST = "manifest.json"
+PREFIX = "snapshot-"
+
+# file -> (key of the rows in the file, name of the store in data, entity of its events)
+FILES = {
+    "country.json": ("Country", "country_data", "Country"),
+    "city.json": ("City", "city_data", "City"),
+    "amenity.json": ("Amenity", "amenity_data", "Amenity"),
+    "place.json": ("Place", "place_data", "Place"),
+    "user.json": ("User", "user_data", "User"),
+    "review.json": ("Review", "review_data", "Review"),
+    "place_to_amenity.json": ("Place_to_Amenity", "place_to_amenity_data", "Place"),
+}
+
+
+def default_stores():
+    """ filename -> store, for the stores of the data package """
+    import data  # pylint: disable=import-outside-toplevel
+    return {filename: getattr(data, store) for filename, (_, store, _) in FILES.items()}
+
+
+def _rows(filename, store):
+    """ a store in the layout of its data file """
+    if filename == "place_to_amenity.json":
+        return [{"place_id": place_id, "amenity_id": amenity_id}
+                for place_id, amenity_ids in store.items() for amenity_id in amenity_ids]
+    return list(store.values())
+
+
+def _digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Snapshotter():
+    """Takes snapshots of the stores into a folder"""
+
+    def __init__(self, feed, stores=None, directory=DEFAULT_DIR):
+        self.feed = feed
+        self._stores = stores
+        self.directory = directory
+        # entity -> seq of its last change, to skip the unchanged stores
+        self._changed_at = {}
+        self._lock = threading.Lock()
+        # the seqs restart with the process, snapshots only link within a run
+        self.run = uuid.uuid4().hex
+
+    @property
+    def stores(self):
+        """ filename -> store, the data package stores unless given """
+        if self._stores is None:
+            self._stores = default_stores()
+        return self._stores
+
+    def on_change(self, event):
+        """ change feed listener """
+        self._changed_at[event["entity"]] = event["seq"]
+
+    def capture(self):
+        """
+        Copy the stores at one point of the change feed.
+
+        Returns:
+            tuple: (seq, {filename: copy of the store})
+        """
+        stores = self.stores
+        with self.feed.lock:
+            return self.feed.seq, {filename: dict(store) for filename, store in stores.items()}
+
+    def take(self):
+        """
+        Write a snapshot of the stores.
+
+        Returns:
+            dict: the manifest of the snapshot
+        """
+        # one snapshot at a time, they link to each other
+        with self._lock:
+            started = time.time()
+            seq, copies = self.capture()
+            previous = latest(self.directory)
+            previous_manifest = read_manifest(previous) if previous else None
+            if previous_manifest and previous_manifest.get("run") != self.run:
+                previous_manifest = None
+            if previous_manifest and previous_manifest["seq"] == seq:
+                # nothing changed since
+                return previous_manifest
+
+            final = os.path.join(self.directory, f"{PREFIX}{int(started * 1000):013d}-{seq:012d}")
+            tmp = final + ".tmp"
+            if os.path.isdir(tmp):
+                shutil.rmtree(tmp)
+            os.makedirs(tmp)
+
+            files = {}
+            for filename, store in copies.items():
+                key, _, entity = FILES[filename]
+                path = os.path.join(tmp, filename)
+                if (previous_manifest and filename in previous_manifest["files"]
+                        and self._changed_at.get(entity, 0) <= previous_manifest["seq"]):
+                    os.link(os.path.join(previous, filename), path)
+                    files[filename] = previous_manifest["files"][filename]
+                    continue
+                write_json_atomic(path, {key: _rows(filename, store)})
+                files[filename] = {"rows": len(store), "bytes": os.path.getsize(path),
+                                   "sha256": _digest(path)}
+
+            manifest = {"name": os.path.basename(final), "seq": seq, "run": self.run,
+                        "created_at": started, "seconds": time.time() - started,
+                        "files": files}
+            write_json_atomic(os.path.join(tmp, MANIFEST), manifest, indent=4)
+            os.rename(tmp, final)
+            return manifest
+
+
+def snapshots(directory=DEFAULT_DIR):
+    """ complete snapshot folders, oldest first """
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory)
+                   if name.startswith(PREFIX) and not name.endswith(".tmp"))
+    return [os.path.join(directory, name) for name in names
+            if os.path.isfile(os.path.join(directory, name, MANIFEST))]
+
+
+def latest(directory=DEFAULT_DIR):
+    """ the newest complete snapshot folder, None if there is none """
+    found = snapshots(directory)
+    return found[-1] if found else None
+
+
+def read_manifest(path):
+    """ the manifest of a snapshot folder """
+    with open(os.path.join(path, MANIFEST), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def verify(path):
+    """
+    Check the files of a snapshot against its manifest.
+
+    Raises:
+        ValueError: if a file is missing or was modified
+    """
+    manifest = read_manifest(path)
+    for filename, info in manifest["files"].items():
+        file_path = os.path.join(path, filename)
+        if not os.path.isfile(file_path):
+            raise ValueError(f"Snapshot file '{file_path}' missing")
+        if _digest(file_path) != info["sha256"]:
+            raise ValueError(f"Snapshot file '{file_path}' is corrupted")
+    return manifest
+
+
+def restore(path, data_dir="data"):
+    """
+    Replace the data files with the files of a snapshot.
+
+    Every file is checked first and then copied next to its target and renamed
+    over it, so a failed restore leaves the data files as they were.
+    """
+    manifest = verify(path)
+    staged = []
+    try:
+        for filename in manifest["files"]:
+            tmp_path = os.path.join(data_dir, f".restore-{filename}")
+            shutil.copyfile(os.path.join(path, filename), tmp_path)
+            staged.append((tmp_path, os.path.join(data_dir, filename)))
+        for tmp_path, target in staged:
+            os.replace(tmp_path, target)
+    finally:
+        for tmp_path, _ in staged:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return manifest
+
+
+def prune(directory=DEFAULT_DIR, keep=5):
+    """ delete all but the `keep` newest snapshots """
+    found = snapshots(directory)
+    removed = found[:-keep] if keep > 0 else found
+    for path in removed:
+        shutil.rmtree(path)
+    return removed
+
+
+def main(argv=None):
+    """ command line entry point """
+    parser = argparse.ArgumentParser(description="List, check and restore HBnB snapshots")
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="folder of the snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="list the complete snapshots")
+    verify_parser = commands.add_parser("verify", help="check the checksums of a snapshot")
+    verify_parser.add_argument("snapshot")
+    restore_parser = commands.add_parser("restore", help="copy a snapshot into the data folder")
+    restore_parser.add_argument("snapshot", nargs="?", help="defaults to the newest one")
+    restore_parser.add_argument("--data-dir", default="data")
+    prune_parser = commands.add_parser("prune", help="delete the old snapshots")
+    prune_parser.add_argument("--keep", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "list":
+            for path in snapshots(args.dir):
+                manifest = read_manifest(path)
+                rows = sum(info["rows"] for info in manifest["files"].values())
+                print(f"{path}  seq={manifest['seq']}  rows={rows}")
+        elif args.command == "verify":
+            verify(args.snapshot)
+            print(f"{args.snapshot} OK")
+        elif args.command == "restore":
+            path = args.snapshot or latest(args.dir)
+            if path is None:
+                raise ValueError(f"No snapshot in '{args.dir}'")
+            manifest = restore(path, args.data_dir)
+            print(f"Restored {path} (seq {manifest['seq']}) into {args.data_dir}")
+        elif args.command == "prune":
+            for path in prune(args.dir, args.keep):
+                print(f"Removed {path}")
+    except (OSError, ValueError) as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""
+gunicorn settings, read from the working directory:
+    gunicorn -b 0.0.0.0:5000 app:app
+
+The stores load on first use (data/lazy.py), so a worker boots in the same
+time whatever the size of the data. With HBNB_PRELOAD=1 (or --preload) the
+master imports the app and loads every store before forking instead: the
+workers start with the data already in memory, shared copy-on-write with
+the master, and a restarted worker doesn't read a file. gc.freeze() keeps
+the collector from touching (and so copying) those shared pages.
+
+The startup phases are logged by the master and each worker, and served by
+/api/v1/admin/startup.
+
+More than one worker needs HBNB_SECRET_KEY, the key of the session tokens:
+the master refuses to start without it. The master also rebuilds the email
+claims of the signups (data/indexes.py) from the users before any worker runs,
+so claims left behind by a previous run don't block those emails forever.
+
+The workers are threaded (gthread): a long-poll or an SSE stream of
+/api/v1/changes holds one thread, not the whole worker, and the worker keeps
+answering the arbiter while it runs, so it isn't killed as timed out.
+"""
+
+import gc
+import os
+import time
+
+preload_app = os.environ.get("HBNB_PRELOAD") == "1"
+
+worker_class = "gthread"
+threads = int(os.environ.get("HBNB_THREADS", "8"))
+timeout = 30
+
+_forked_at = {}
+
+
+def on_starting(server):
+    """ master: check the session key, rebuild the email claims before any worker """
+    from data import user_data
+    from data.indexes import SqliteEmailClaims
+    from services.sessions import check_secret
+
+    check_secret(server.cfg.workers)
+    # read through the loader, so the workers still load the users themselves
+    SqliteEmailClaims(os.environ.get("HBNB_EMAILS_SQLITE_PATH")).rebuild(
+        v['email'] for v in user_data.loader().values())
+
+
+def when_ready(server):
+    """ master: load the stores before the first fork when the app is preloaded """
+    if not server.cfg.preload_app:
+        return
+    from data import preload
+    from data.lazy import timed, timings
+
+    with timed("preload stores"):
+        preload()
+    gc.freeze()
+    server.log.info("startup timings: %s", timings)
+
+
+def pre_fork(server, worker):
+    """ master: remember when the worker was forked """
+    _forked_at[worker.age] = time.perf_counter()
+
+
+def post_worker_init(worker):
+    """ worker: record and log how long the boot took """
+    from data.lazy import record, timings
+
+    started = _forked_at.pop(worker.age, None)
+    if started is not None:
+        record("worker boot", time.perf_counter() - started)
+    worker.log.info("worker %s startup timings: %s", worker.pid, timings)
@@ -7,26 +7,30 @@ name. It includes functionality to save amenity data to a JSON file.
 """
 
 from datetime import datetime
-import uuid
 import json
+from data.file_storage import append_json_row
+from data.ids import new_id
+from models.schema import Schema, Field, is_non_blank_str
 
 
 class Amenity:
     """Representation of an Amenity"""
 
+    schema = Schema(
+        Field("name", is_non_blank_str, "Invalid name specified: {value}"),
+    )
+
     def __init__(self, *_args, **kwargs):
         """Constructor"""
 
-        self.id = str(uuid.uuid4())
+        self.id = new_id()
         self.created_at = datetime.now().timestamp()
         self.updated_at = datetime.now().timestamp()
         self.__name = ""
 
         # Set attributes from kwargs
-        if kwargs:
-            for key, value in kwargs.items():
-                if key == "name":
-                    self.name = value
+        for key, value in self.schema.validate(kwargs).items():
+            setattr(self, "_Amenity__" + key, value)
         self.save()
 
     def save(self):
@@ -44,11 +48,7 @@ class Amenity:
         }
         file_path = 'data/amenity.json'
         try:
-            with open(file_path, 'r', encoding="utf-8") as file:
-                data = json.load(file)
-            data['Amenity'].append(amenity_entry)
-            with open(file_path, 'w', encoding="utf-8") as file:
-                json.dump(data, file, indent=4)
+            append_json_row(file_path, 'Amenity', amenity_entry)
             return True
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"Error saving amenity entry: {e}")
@@ -61,7 +61,4 @@ class Amenity:
 
     @name.setter
     def name(self, value):
-        if isinstance(value, str) and value.strip():
-            self.__name = value
-        else:
-            raise ValueError(f"Invalid name specified: {value}")
+        self.__name = self.schema.check("name", value)
@@ -7,32 +7,39 @@ name and country_id. It includes functionality to save city data to a JSON file.
 """
 
 from datetime import datetime
-import uuid
-import re
 import json
-from data import country_data
+from data.file_storage import append_json_row
+from data.ids import new_id, intern_id
+from data.keys import country_ids
+from models.schema import Schema, Field, matches, is_key_of, NAME_WITH_SPACES
 
 
 class City():
     """Representation of city """
 
+    schema = Schema(
+        # alphabets + spaces only
+        Field("name", matches(NAME_WITH_SPACES), "Invalid city name specified: {value}"),
+        # the specified country id must actually exist
+        Field("country_id", is_key_of(country_ids), "Invalid country_id specified: {value}",
+              clean=intern_id),
+    )
+
     def __init__(self, *_args, **kwargs):
         """ constructor """
         # super().__init__(*args, **kwargs)
 
         # defaults
-        self.id = str(uuid.uuid4())
+        self.id = new_id()
         self.created_at = datetime.now().timestamp()
         self.updated_at = self.created_at
         self.__name = ""
         self.__country_id = ""
 
         # Only allow country_id, name.
-        # Note that setattr will call the setters for these 2 attribs
-        if kwargs:
-            for key, value in kwargs.items():
-                if key == "country_id" or key == "name":
-                    setattr(self, key, value)
+        # The schema validates them all in one go, so the setters are skipped
+        for key, value in self.schema.validate(kwargs).items():
+            setattr(self, "_City__" + key, value)
         self.save()
 
     def save(self):
@@ -51,11 +58,7 @@ class City():
         }
         file_path = 'data/city.json'
         try:
-            with open(file_path, 'r', encoding="utf-8") as file:
-                data = json.load(file)
-            data['City'].append(city_entry)
-            with open(file_path, 'w', encoding="utf-8") as file:
-                json.dump(data, file, indent=4)
+            append_json_row(file_path, 'City', city_entry)
             return True  # Indicate success
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"Error saving city entry: {e}")
@@ -69,13 +72,7 @@ class City():
     @name.setter
     def name(self, value):
         """Setter for private prop name"""
-
-        # ensure that the value is not spaces-only and is alphabets + spaces only
-        is_valid_name = len(value.strip()) > 0 and re.search("^[a-zA-Z ]+$", value)
-        if is_valid_name:
-            self.__name = value
-        else:
-            raise ValueError(f"Invalid city name specified: {value}")
+        self.__name = self.schema.check("name", value)
 
     @property
     def country_id(self):
@@ -85,9 +82,4 @@ class City():
     @country_id.setter
     def country_id(self, value):
         """Setter for private prop country_id"""
-
-        # ensure that the specified country id actually exists before setting
-        if country_data.get(value) is not None:
-            self.__country_id = value
-        else:
-            raise ValueError(f"Invalid country_id specified: {value}")
+        self.__country_id = self.schema.check("country_id", value)
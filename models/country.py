@@ -7,31 +7,37 @@ name and code. It includes functionality to save country data to a JSON file.
 """
 
 from datetime import datetime
-import uuid
-import re
 import json
+from data.file_storage import append_json_row
+from data.ids import new_id
+from models.schema import Schema, Field, matches, NAME_WITH_SPACES
 
 
 class Country():
     """Representation of country """
 
+    schema = Schema(
+        # alphabets + spaces only
+        Field("name", matches(NAME_WITH_SPACES), "Invalid country name specified: {value}"),
+        # two uppercase alphabets only
+        Field("code", matches(r"^[A-Z][A-Z]$"), "Invalid country code specified: {value}"),
+    )
+
     def __init__(self, *_args, **kwargs):
         """ constructor """
         # super().__init__(*args, **kwargs)
 
         # defaults
-        self.id = str(uuid.uuid4())
+        self.id = new_id()
         self.created_at = datetime.now().timestamp()
         self.updated_at = self.created_at
         self.__name = ""
         self.__code = ""
 
         # Only allow name, code.
-        # Note that setattr will call the setters for these attribs
-        if kwargs:
-            for key, value in kwargs.items():
-                if key == "name" or key == "code":
-                    setattr(self, key, value)
+        # The schema validates them all in one go, so the setters are skipped
+        for key, value in self.schema.validate(kwargs).items():
+            setattr(self, "_Country__" + key, value)
         self.save()
 
     def save(self):
@@ -50,11 +56,7 @@ class Country():
         }
         file_path = 'data/country.json'
         try:
-            with open(file_path, 'r', encoding="utf-8") as file:
-                data = json.load(file)
-            data['Country'].append(country_entry)
-            with open(file_path, 'w', encoding="utf-8") as file:
-                json.dump(data, file, indent=4)
+            append_json_row(file_path, 'Country', country_entry)
             return True
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"Error saving country entry: {e}")
@@ -68,13 +70,7 @@ class Country():
     @name.setter
     def name(self, value):
         """Setter for private prop name"""
-
-        # ensure that the value is not spaces-only and is alphabets + spaces only
-        is_valid_name = len(value.strip()) > 0 and re.search("^[a-zA-Z ]+$", value)
-        if is_valid_name:
-            self.__name = value
-        else:
-            raise ValueError(f"Invalid country name specified: {value}")
+        self.__name = self.schema.check("name", value)
 
     @property
     def code(self):
@@ -84,10 +80,4 @@ class Country():
     @code.setter
     def code(self, value):
         """Setter for private prop code"""
-
-        # ensure that the value is not spaces-only and is two uppercase alphabets only
-        is_valid_code = len(value.strip()) > 0 and re.search("^[A-Z][A-Z]$", value)
-        if is_valid_code:
-            self.__code = value
-        else:
-            raise ValueError(f"Invalid country code specified: {value}")
+        self.__code = self.schema.check("code", value)
@@ -6,13 +6,33 @@ Defines the Place class representing a rental property with various attributes.
 """
 
 from datetime import datetime
-import uuid
-import re
 import json
+from data.file_storage import append_json_row
+from data.ids import new_id, intern_id
+from models.schema import (Schema, Field, matches, is_str, is_number_between,
+                           is_positive_int, NAME_WITH_SPACES)
 
 class Place():
     """Representation of place """
 
+    schema = Schema(
+        Field("name", matches(NAME_WITH_SPACES), "Invalid place name specified: {value}"),
+        Field("description", is_str, "Invalid description specified: {value}"),
+        Field("address", is_str, "Invalid address specified: {value}"),
+        Field("latitude", is_number_between(-90, 90), "Invalid latitude specified: {value}"),
+        Field("longitude", is_number_between(-180, 180),
+              "Invalid longitude specified: {value}"),
+        Field("number_of_rooms", is_positive_int,
+              "Invalid number of rooms specified: {value}"),
+        Field("bathrooms", is_positive_int, "Invalid number of bathrooms specified: {value}"),
+        Field("price_per_night", is_number_between(0, float("inf")),
+              "Invalid price per night specified: {value}"),
+        Field("max_guests", is_positive_int, "Invalid number of max guests specified: {value}"),
+    )
+
+    # attributes that are stored as they are, without validation
+    plain_attributes = ("city_id", "host_user_id", "amenities")
+
     def __init__(self, *_args, **kwargs):
         """
         Initialize a new Place instance.
@@ -21,7 +41,7 @@ class Place():
             *_args: Variable length argument list (not used).
             **kwargs: Arbitrary keyword arguments for setting attributes.
         """
-        self.id = str(uuid.uuid4())
+        self.id = new_id()
         self.created_at = datetime.now().timestamp()
         self.updated_at = datetime.now().timestamp()
         self.__name = ""
@@ -37,21 +57,20 @@ class Place():
         self.host_user_id = ""
         self.amenities = []
 
-        for key, value in kwargs.items():
-            if key in ["name", "description", "address", "latitude", "longitude",
-                       "number_of_rooms", "bathrooms", "price_per_night", 
-                       "max_guests", "city_id", "host_user_id", "amenities"]:
-                setattr(self, key, value)
+        # The schema validates all the fields in one go, so the setters are skipped
+        for key, value in self.schema.validate(kwargs).items():
+            setattr(self, "_Place__" + key, value)
+        for key in self.plain_attributes:
+            if key in kwargs:
+                setattr(self, key, intern_id(kwargs[key]))
         self.save()
 
-    def save(self):
+    def to_dict(self):
         """
-        Save the pace data to 'data/place.json'.
-        
         Returns:
-            bool: True if the place was successfully saved, False otherwise.
+            dict: the place data, with the same keys as in 'data/place.json'
         """
-        place_entry = {
+        return {
             "id": self.id,
             "host_user_id": self.host_user_id,
             "city_id": self.city_id,
@@ -64,16 +83,23 @@ class Place():
             "bathrooms": self.bathrooms,
             "price_per_night": self.price_per_night,
             "max_guests": self.max_guests,
+            "amenities": self.amenities,
             "created_at": self.created_at,
             "updated_at": self.updated_at
         }
+
+    def save(self):
+        """
+        Save the pace data to 'data/place.json'.
+        
+        Returns:
+            bool: True if the place was successfully saved, False otherwise.
+        """
+        place_entry = self.to_dict()
+        del place_entry["amenities"]
         file_path = 'data/place.json'
         try:
-            with open(file_path, 'r', encoding="utf-8") as file:
-                data = json.load(file)
-            data['Place'].append(place_entry)
-            with open(file_path, 'w', encoding="utf-8") as file:
-                json.dump(data, file, indent=4)
+            append_json_row(file_path, 'Place', place_entry)
             return True
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"Error saving place entry: {e}")
@@ -87,10 +113,7 @@ class Place():
     @name.setter
     def name(self, value):
         """Set the name of the place."""
-        if len(value.strip()) > 0 and re.search("^[a-zA-Z ]+$", value):
-            self.__name = value
-        else:
-            raise ValueError(f"Invalid place name specified: {value}")
+        self.__name = self.schema.check("name", value)
 
     @property
     def description(self):
@@ -100,10 +123,7 @@ class Place():
     @description.setter
     def description(self, value):
         """Set the description of the place."""
-        if isinstance(value, str):
-            self.__description = value
-        else:
-            raise ValueError(f"Invalid description specified: {value}")
+        self.__description = self.schema.check("description", value)
 
     @property
     def address(self):
@@ -113,10 +133,7 @@ class Place():
     @address.setter
     def address(self, value):
         """Set the address of the place."""
-        if isinstance(value, str):
-            self.__address = value
-        else:
-            raise ValueError(f"Invalid address specified: {value}")
+        self.__address = self.schema.check("address", value)
 
     @property
     def latitude(self):
@@ -126,10 +143,7 @@ class Place():
     @latitude.setter
     def latitude(self, value):
         """Set the latitude of the place."""
-        if isinstance(value, (int, float)) and -90 <= value <= 90:
-            self.__latitude = value
-        else:
-            raise ValueError(f"Invalid latitude specified: {value}")
+        self.__latitude = self.schema.check("latitude", value)
 
     @property
     def longitude(self):
@@ -139,10 +153,7 @@ class Place():
     @longitude.setter
     def longitude(self, value):
         """Set the longitude of the place."""
-        if isinstance(value, (int, float)) and -180 <= value <= 180:
-            self.__longitude = value
-        else:
-            raise ValueError(f"Invalid longitude specified: {value}")
+        self.__longitude = self.schema.check("longitude", value)
 
     @property
     def number_of_rooms(self):
@@ -152,10 +163,7 @@ class Place():
     @number_of_rooms.setter
     def number_of_rooms(self, value):
         """Set the number of rooms in the place."""
-        if isinstance(value, int) and value > 0:
-            self.__number_of_rooms = value
-        else:
-            raise ValueError(f"Invalid number of rooms specified: {value}")
+        self.__number_of_rooms = self.schema.check("number_of_rooms", value)
 
     @property
     def bathrooms(self):
@@ -165,10 +173,7 @@ class Place():
     @bathrooms.setter
     def bathrooms(self, value):
         """Set the number of bathrooms in the place."""
-        if isinstance(value, int) and value > 0:
-            self.__bathrooms = value
-        else:
-            raise ValueError(f"Invalid number of bathrooms specified: {value}")
+        self.__bathrooms = self.schema.check("bathrooms", value)
 
     @property
     def price_per_night(self):
@@ -178,10 +183,7 @@ class Place():
     @price_per_night.setter
     def price_per_night(self, value):
         """Set the price per night."""
-        if isinstance(value, (int, float)) and value >= 0:
-            self.__price_per_night = value
-        else:
-            raise ValueError(f"Invalid price per night specified: {value}")
+        self.__price_per_night = self.schema.check("price_per_night", value)
 
     @property
     def max_guests(self):
@@ -191,7 +193,4 @@ class Place():
     @max_guests.setter
     def max_guests(self, value):
         """Set the maximum number of guests."""
-        if isinstance(value, int) and value > 0:
-            self.__max_guests = value
-        else:
-            raise ValueError(f"Invalid number of max guests specified: {value}")
+        self.__max_guests = self.schema.check("max_guests", value)
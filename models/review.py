@@ -8,13 +8,24 @@ methods for initializing, saving to a JSON file, and setting attribute values wi
 """
 
 from datetime import datetime
-import uuid
-from data import user_data, place_data
+from data.ids import new_id, intern_id
+from data.keys import user_ids, place_ids
+from models.schema import Schema, Field, is_str, is_key_of
 
 
 class Review():
     """Representation of Review """
 
+    schema = Schema(
+        Field("commentor_user_id", is_key_of(user_ids),
+              "Invalid commentor_user_id specified: {value}", clean=intern_id),
+        Field("place_id", is_key_of(place_ids), "Invalid place_id specified: {value}",
+              clean=intern_id),
+        Field("rating", lambda value: isinstance(value, int) and 1 <= value <= 5,
+              "Invalid rating specified: {value}"),
+        Field("feedback", is_str, "Invalid feedback specified: {value}"),
+    )
+
     def __init__(self, *_args, **kwargs):
         """
         Initializes a new Review instance with a unique ID, timestamps,
@@ -25,7 +36,7 @@ class Review():
             **kwargs: Arbitrary keyword arguments for setting specific attributes.
         """
 
-        self.id = str(uuid.uuid4())
+        self.id = new_id()
         self.created_at = datetime.now().timestamp()
         self.updated_at = datetime.now().timestamp()
         self.__commentor_user_id = ""
@@ -33,10 +44,8 @@ class Review():
         self.__feedback = ""
         self.__rating = 0
 
-        if kwargs:
-            for key, value in kwargs.items():
-                if key in ["commentor_user_id", "place_id", "rating", "feedback"]:
-                    setattr(self, key, value)
+        for key, value in self.schema.validate(kwargs).items():
+            setattr(self, "_Review__" + key, value)
 
     @property
     def feedback(self):
@@ -45,10 +54,7 @@ class Review():
 
     @feedback.setter
     def feedback(self, value):
-        if isinstance(value, str):
-            self.__feedback = value
-        else:
-            raise ValueError(f"Invalid feedback specified: {value}")
+        self.__feedback = self.schema.check("feedback", value)
 
     @property
     def rating(self):
@@ -57,10 +63,7 @@ class Review():
 
     @rating.setter
     def rating(self, value):
-        if isinstance(value, int) and 1 <= value <= 5:
-            self.__rating = value
-        else:
-            raise ValueError(f"Invalid rating specified: {value}")
+        self.__rating = self.schema.check("rating", value)
 
     @property
     def commentor_user_id(self):
@@ -69,10 +72,7 @@ class Review():
 
     @commentor_user_id.setter
     def commentor_user_id(self, value):
-        if isinstance(value, str) and value in user_data:
-            self.__commentor_user_id = value
-        else:
-            raise ValueError(f"Invalid commentor_user_id specified: {value}")
+        self.__commentor_user_id = self.schema.check("commentor_user_id", value)
 
     @property
     def place_id(self):
@@ -81,7 +81,4 @@ class Review():
 
     @place_id.setter
     def place_id(self, value):
-        if isinstance(value, str) and value in place_data:
-            self.__place_id = value
-        else:
-            raise ValueError(f"Invalid place_id specified: {value}")
+        self.__place_id = self.schema.check("place_id", value)
@@ -0,0 +1,166 @@
+#!/usr/bin/python
+"""
+Schema Module
+
+Declarative validation for the models. Each model lists its fields once,
+with a precompiled check and the error message to raise, and the setters,
+constructors and bulk imports all go through the same checks.
+"""
+
+import re
+
+
+class Field():
+    """A validated model field"""
+
+    __slots__ = ("name", "check", "message", "clean")
+
+    def __init__(self, name, check, message, clean=None):
+        """
+        Args:
+            name: name of the attribute
+            check: callable returning True if the value is valid
+            message: error message, `{value}` is replaced by the invalid value
+            clean: optional callable applied to valid values before they are stored
+        """
+        self.name = name
+        self.check = check
+        self.message = message
+        self.clean = clean
+
+    def error(self, value):
+        """The ValueError raised for an invalid value"""
+        return ValueError(self.message.replace("{value}", str(value)))
+
+
+class Schema():
+    """The validated fields of a model"""
+
+    def __init__(self, *fields):
+        self.fields = {field.name: field for field in fields}
+
+    def check(self, name, value):
+        """
+        Validate a single field.
+
+        Returns:
+            the value if it is valid
+
+        Raises:
+            ValueError: if the value is invalid
+        """
+        field = self.fields[name]
+        if not field.check(value):
+            raise field.error(value)
+        return field.clean(value) if field.clean else value
+
+    def validate(self, record):
+        """
+        Validate the known fields of a record, ignoring any other key.
+
+        Returns:
+            dict: the known fields of the record
+
+        Raises:
+            ValueError: for the first invalid field
+        """
+        values = {}
+        for key, value in record.items():
+            field = self.fields.get(key)
+            if field is not None:
+                if not field.check(value):
+                    raise field.error(value)
+                values[key] = field.clean(value) if field.clean else value
+        return values
+
+    def errors(self, record, required=True):
+        """
+        Collect every error of a record instead of stopping at the first one.
+
+        Returns:
+            list: error messages, empty if the record is valid
+        """
+        found = []
+        for name, field in self.fields.items():
+            if name not in record:
+                if required:
+                    found.append(f"Missing {name}")
+            elif not field.check(record[name]):
+                found.append(str(field.error(record[name])))
+        return found
+
+    def validate_batch(self, records, required=True):
+        """
+        Validate a batch of records in one pass.
+
+        Returns:
+            tuple: (list of the valid records' known fields,
+                    dict of row index -> list of error messages)
+        """
+        valid = []
+        errors = {}
+        checks = [(name, field.check) for name, field in self.fields.items()]
+        # applied to the valid values, as validate() does
+        cleans = [(name, field.clean) for name, field in self.fields.items() if field.clean]
+        for index, record in enumerate(records):
+            # fast path: every field is present and valid
+            try:
+                values = {name: record[name] for name, check in checks
+                          if check(record[name])}
+            except KeyError:
+                values = None
+            if values is None or len(values) != len(checks):
+                found = self.errors(record, required)
+                if found:
+                    errors[index] = found
+                    continue
+                values = {name: record[name] for name, _ in checks if name in record}
+            for name, clean in cleans:
+                if name in values:
+                    values[name] = clean(values[name])
+            valid.append(values)
+        return valid, errors
+
+
+# --- reusable checks ---
+def matches(pattern):
+    """Non blank string matching the regex `pattern` (compiled once)"""
+    compiled = re.compile(pattern)
+    match = compiled.match
+    return lambda value: isinstance(value, str) and bool(value.strip()) \
+        and match(value) is not None
+
+
+def is_str(value):
+    """Any string"""
+    return isinstance(value, str)
+
+
+def is_non_blank_str(value):
+    """String that is not empty or spaces-only"""
+    return isinstance(value, str) and bool(value.strip())
+
+
+def is_number_between(low, high):
+    """int or float in [low, high]"""
+    return lambda value: isinstance(value, (int, float)) and low <= value <= high
+
+
+def is_positive_int(value):
+    """int greater than 0"""
+    return isinstance(value, int) and value > 0
+
+
+def is_min_length(length):
+    """String of at least `length` characters"""
+    return lambda value: isinstance(value, str) and len(value) >= length
+
+
+def is_key_of(store):
+    """String that is an id in `store` (any container of ids)"""
+    return lambda value: isinstance(value, str) and value in store
+
+
+# alphabets + spaces, alphabets only
+NAME_WITH_SPACES = r"^[a-zA-Z ]+$"
+SINGLE_NAME = r"^[a-zA-Z]+$"
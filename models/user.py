@@ -8,16 +8,30 @@ user data to a JSON file.
 """
 
 from datetime import datetime
-import uuid
-import re
 import json
+from data.file_storage import append_json_row
+from data.ids import new_id
+from models.schema import Schema, Field, matches, is_min_length, SINGLE_NAME
+from services.credentials import hash_password
 
 class User():
     """Representation of user """
 
+    # Note that this won't allow names like Obi-wan or Al'azif
+    schema = Schema(
+        Field("first_name", matches(SINGLE_NAME), "Invalid first name specified: {value}"),
+        Field("last_name", matches(SINGLE_NAME), "Invalid last name specified: {value}"),
+        # a simple regex check for email format. Nothing too fancy.
+        Field("email", matches(r"^[a-zA-Z0-9+_.-]+@[a-zA-Z0-9.-]+$"),
+              "Invalid email specified: {value}"),
+        # only the salted hash is kept, see services/credentials.py
+        Field("password", is_min_length(6),
+              "Password is too short! Min 6 characters required.", clean=hash_password),
+    )
+
     def __init__(self, *_args, **kwargs):
         """ constructor """
-        self.id = str(uuid.uuid4())
+        self.id = new_id()
         self.created_at = datetime.now().timestamp()
         self.updated_at = self.created_at
         self.__first_name = ""
@@ -26,11 +40,9 @@ class User():
         self.__password = ""
 
         # Only allow first_name, last_name, email, password.
-        # Note that setattr will call the setters for these attribs
-        if kwargs:
-            for key, value in kwargs.items():
-                if key == "first_name" or key == "last_name" or key == "email" or key == "password":
-                    setattr(self, key, value)
+        # The schema validates them all in one go, so the setters are skipped
+        for key, value in self.schema.validate(kwargs).items():
+            setattr(self, "_User__" + key, value)
         self.save()
 
     def save(self):
@@ -51,11 +63,7 @@ class User():
         }
         file_path = 'data/user.json'
         try:
-            with open(file_path, 'r', encoding="utf-8") as file:
-                data = json.load(file)
-            data['User'].append(user_entry)
-            with open(file_path, 'w', encoding="utf-8") as file:
-                json.dump(data, file, indent=4)
+            append_json_row(file_path, 'User', user_entry)
             return True
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"Error saving review entry: {e}")
@@ -69,14 +77,7 @@ class User():
     @first_name.setter
     def first_name(self, value):
         """Setter for private prop first_name"""
-
-        # ensure that the value is alphabets only
-        # Note that this won't allow names like Obi-wan or Al'azif
-        is_valid_name = len(value.strip()) > 0 and re.search("^[a-zA-Z]+$", value)
-        if is_valid_name:
-            self.__first_name = value
-        else:
-            raise ValueError(f"Invalid first name specified: {value}")
+        self.__first_name = self.schema.check("first_name", value)
 
     @property
     def last_name(self):
@@ -86,14 +87,7 @@ class User():
     @last_name.setter
     def last_name(self, value):
         """Setter for private prop last_name"""
-
-        # ensure that the value is alphabets only
-        # Note that this won't allow names like Obi-wan or Al'azif
-        is_valid_name = len(value.strip()) > 0 and re.search("^[a-zA-Z]+$", value)
-        if is_valid_name:
-            self.__last_name = value
-        else:
-            raise ValueError(f"Invalid last name specified: {value}")
+        self.__last_name = self.schema.check("last_name", value)
 
     @property
     def email(self):
@@ -102,25 +96,15 @@ class User():
 
     @email.setter
     def email(self, value):
-        """Setter for private prop last_name"""
-
-        # add a simple regex check for email format. Nothing too fancy.
-        is_valid = len(value.strip()) > 0 and re.search("^[a-zA-Z0-9+_.-]+@[a-zA-Z0-9.-]+$",value)
-        if is_valid:
-            self.__email = value
-        else:
-            raise ValueError(f"Invalid email specified: {value}")
+        """Setter for private prop email"""
+        self.__email = self.schema.check("email", value)
 
     @property
     def password(self):
-        """Getter for private prop email"""
+        """Getter for private prop password"""
         return self.__password
 
     @password.setter
     def password(self, value):
-        """Setter for private prop email"""
-        is_valid_password = len(value) >= 6
-        if is_valid_password:
-            self.__password = value
-        else:
-            raise ValueError("Password is too short! Min 6 characters required.")
+        """Setter for private prop password"""
+        self.__password = self.schema.check("password", value)
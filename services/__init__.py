@@ -0,0 +1,2 @@
+#!/usr/bin/python3
+""" request-level services used by the API in app.py """
@@ -0,0 +1,255 @@
+#!/usr/bin/python3
+"""
+Admission control
+
+Keeps a load spike on the expensive endpoints from starving the cheap ones.
+Nothing is registered on the app unless it is enabled (HBNB_ADMISSION=1).
+
+Every request goes through, in order:
+- a token bucket per client (its address) and one per route that has a
+  limit, answered with 429 and Retry-After when empty
+- for the expensive routes, a concurrency limit per worker: a request waits
+  for a slot up to its deadline, and is shed with 503 and Retry-After when
+  the wait queue is full or the deadline passes
+
+The buckets live in a store: "memory" keeps them in the worker, "sqlite"
+keeps them in a small SQLite file that every gunicorn worker of the machine
+shares, so a client gets the same rate whichever worker serves it.
+
+The client is request.remote_addr. X-Forwarded-For is set by the clients
+themselves, so it is only trusted behind a reverse proxy, through the
+ProxyFix that app.py installs when HBNB_TRUSTED_PROXIES is set.
+
+Settings (app.config):
+    ADMISSION_STORE          "memory" or "sqlite" (or HBNB_ADMISSION_STORE)
+    ADMISSION_SQLITE_PATH    file of the sqlite store (or HBNB_ADMISSION_SQLITE_PATH)
+    ADMISSION_CLIENT_RATE    requests per second per client
+    ADMISSION_CLIENT_BURST   bucket size per client
+    ADMISSION_ROUTE_LIMITS   endpoint -> (rate, burst) for all clients together
+    ADMISSION_EXPENSIVE      endpoint -> requests run at once per worker
+    ADMISSION_MAX_QUEUE      requests waiting for a slot per expensive endpoint
+    ADMISSION_QUEUE_TIMEOUT  longest wait for a slot, in seconds
+"""
+
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from flask import current_app, g, request
+
+DEFAULT_CLIENT_RATE = 50.0
+DEFAULT_CLIENT_BURST = 100.0
+# the full listings and review scans
+DEFAULT_EXPENSIVE = {
+    "users_get": 4,
+    "countries_get": 4,
+    "cities_get": 4,
+    "amenities_get": 4,
+    "places_get": 4,
+    "get_reviews_by_user": 4,
+    "get_reviews_by_place": 4,
+    "analytics_places_get": 16,
+    "analytics_reviews_get": 16,
+}
+DEFAULT_MAX_QUEUE = 32
+DEFAULT_QUEUE_TIMEOUT = 2.0
+
+# buckets kept by the memory store before the full ones are dropped
+MAX_MEMORY_BUCKETS = 100000
+# takes of a worker between two drops of the full buckets of the sqlite store
+SQLITE_PRUNE_EVERY = 1000
+
+
+def is_enabled():
+    """ admission control is opt-in through the environment """
+    return os.environ.get("HBNB_ADMISSION") == "1"
+
+
+def _refill(tokens, updated, rate, burst, now, cost):
+    """
+    Token bucket step.
+
+    Returns:
+        tuple: (tokens left, seconds to wait before retrying, 0 if admitted)
+    """
+    tokens = min(burst, tokens + (now - updated) * rate)
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate
+
+
+class MemoryStore():
+    """Token buckets of this worker"""
+
+    def __init__(self):
+        self._buckets = {}    # key -> (tokens, updated, full_at)
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost=1.0, now=None):
+        """ take `cost` tokens, returns the seconds to wait (0 if admitted) """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+            tokens, wait = _refill(tokens, updated, rate, burst, now, cost)
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            if len(self._buckets) > MAX_MEMORY_BUCKETS:
+                # a full bucket is the same as no bucket
+                self._buckets = {k: v for k, v in self._buckets.items() if v[2] > now}
+            return wait
+
+
+class SqliteStore():
+    """Token buckets shared by the workers of the machine through a SQLite file"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(tempfile.gettempdir(), "hbnb-admission.sqlite")
+        self._local = threading.local()
+        self._takes = 0
+
+    def _connect(self):
+        # one connection per thread, and never one opened before a fork
+        conn, pid = getattr(self._local, "conn", (None, None))
+        if conn is None or pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # losing the buckets in a crash only resets the limits
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("CREATE TABLE IF NOT EXISTS token_buckets "
+                         "(key TEXT PRIMARY KEY, tokens REAL, updated REAL, full_at REAL)")
+            self._local.conn = (conn, os.getpid())
+        return conn
+
+    def take(self, key, rate, burst, cost=1.0, now=None):
+        """ take `cost` tokens, returns the seconds to wait (0 if admitted) """
+        # wall clock, the monotonic clocks of the workers don't agree
+        now = time.time() if now is None else now
+        conn = self._connect()
+        # unlocked, a lost increment only delays the next prune a little
+        self._takes += 1
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM token_buckets WHERE key = ?",
+                               (key,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens, wait = _refill(tokens, updated, rate, burst, now, cost)
+            conn.execute("INSERT OR REPLACE INTO token_buckets (key, tokens, updated, full_at) "
+                         "VALUES (?, ?, ?, ?)", (key, tokens, now, now + (burst - tokens) / rate))
+            if self._takes % SQLITE_PRUNE_EVERY == 0:
+                # a full bucket is the same as no bucket
+                conn.execute("DELETE FROM token_buckets WHERE full_at <= ?", (now,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+class ConcurrencyLimit():
+    """At most `limit` requests at once, with a bounded queue of waiting ones"""
+
+    def __init__(self, limit, max_queue=DEFAULT_MAX_QUEUE):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.running = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout):
+        """ True once a slot is taken, False if the request should be shed """
+        with self._cond:
+            if self.running < self.limit:
+                self.running += 1
+                return True
+            if self.waiting >= self.max_queue:
+                return False
+            self.waiting += 1
+            try:
+                if not self._cond.wait_for(lambda: self.running < self.limit, timeout):
+                    return False
+                self.running += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        """ give the slot back """
+        with self._cond:
+            self.running -= 1
+            self._cond.notify()
+
+
+def _client():
+    return request.remote_addr or "unknown"
+
+
+def _reject(status, message, retry_after):
+    """ the 429 / 503 response, telling the client when to come back """
+    response = current_app.response_class(message + "\n", status=status,
+                                          mimetype="text/plain")
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+class Admission():
+    """The admission checks of an app"""
+
+    def __init__(self, app, store):
+        self.store = store
+        config = app.config
+        self.client_rate = config.get("ADMISSION_CLIENT_RATE", DEFAULT_CLIENT_RATE)
+        self.client_burst = config.get("ADMISSION_CLIENT_BURST", DEFAULT_CLIENT_BURST)
+        self.route_limits = config.get("ADMISSION_ROUTE_LIMITS", {})
+        self.queue_timeout = config.get("ADMISSION_QUEUE_TIMEOUT", DEFAULT_QUEUE_TIMEOUT)
+        max_queue = config.get("ADMISSION_MAX_QUEUE", DEFAULT_MAX_QUEUE)
+        self.limits = {endpoint: ConcurrencyLimit(limit, max_queue) for endpoint, limit
+                       in config.get("ADMISSION_EXPENSIVE", DEFAULT_EXPENSIVE).items()}
+        self.rejected = 0
+        self.shed = 0
+
+    def before_request(self):
+        """ rate limit, then wait for a slot on the expensive routes """
+        endpoint = request.endpoint
+        wait = self.store.take("client:" + _client(), self.client_rate, self.client_burst)
+        if not wait and endpoint in self.route_limits:
+            rate, burst = self.route_limits[endpoint]
+            wait = self.store.take("route:" + endpoint, rate, burst)
+        if wait:
+            self.rejected += 1
+            return _reject(429, "Too many requests, slow down", wait)
+
+        limit = self.limits.get(endpoint)
+        if limit is not None:
+            if not limit.acquire(self.queue_timeout):
+                self.shed += 1
+                return _reject(503, "The server is busy, try again later", self.queue_timeout)
+            g.admission_slot = limit
+        return None
+
+    @staticmethod
+    def teardown_request(_exc=None):
+        """ give the slot of an expensive route back """
+        limit = g.pop("admission_slot", None)
+        if limit is not None:
+            limit.release()
+
+
+def init_app(app, enabled=None):
+    """ register the admission checks if admission control is enabled """
+    if enabled is None:
+        enabled = is_enabled()
+    if not enabled:
+        return None
+
+    kind = app.config.get("ADMISSION_STORE", os.environ.get("HBNB_ADMISSION_STORE", "memory"))
+    if kind == "sqlite":
+        store = SqliteStore(app.config.get("ADMISSION_SQLITE_PATH",
+                                           os.environ.get("HBNB_ADMISSION_SQLITE_PATH")))
+    else:
+        store = MemoryStore()
+    admission = Admission(app, store)
+    app.extensions["admission"] = admission
+    app.before_request(admission.before_request)
+    app.teardown_request(admission.teardown_request)
+    return admission
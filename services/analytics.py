@@ -0,0 +1,336 @@
+#!/usr/bin/python3
+"""
+Parallel scans of the places and the reviews
+
+A handler thread can only use one core, so the heavy analytical queries (a
+filtered scan of every place, the aggregation of every review) are split in
+chunks scanned by a process pool. The workers don't get the records: the
+columns they need are copied once into shared memory as packed doubles,
+    places   price_per_night, max_guests, city (index into a table of ids)
+    reviews  place (index into the place ids), rating
+and each task only gets the name of the block and its row range. The
+reviews are sorted by place so that every chunk holds all the reviews of its
+places and can send back its own top-K only. The partial results (counts,
+sums, top-K) are merged in the calling thread.
+
+The column copy is refreshed after the places or the reviews changed, at
+most every HBNB_ANALYTICS_MAX_AGE seconds, so the results can be that old.
+Tables smaller than HBNB_ANALYTICS_MIN_ROWS are scanned in the calling
+thread: for them starting the tasks costs more than the scan.
+
+Settings (environment):
+    HBNB_ANALYTICS_WORKERS   processes of the pool, 0 scans in the calling thread
+    HBNB_ANALYTICS_MIN_ROWS  rows from which a scan goes to the pool
+    HBNB_ANALYTICS_MAX_AGE   seconds a changed column copy is still used
+"""
+
+import heapq
+import multiprocessing
+import os
+import threading
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+PLACE_COLUMNS = ("price", "max_guests", "city")
+REVIEW_COLUMNS = ("place", "rating")
+
+
+class Table():
+    """Columns of packed doubles, in process or in a shared memory block"""
+
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+        self.values = array("d")
+        self.shm = None
+
+    def to_shared(self):
+        """ copies the columns to a shared memory block """
+        if self.shm is None and self.values:
+            self.shm = shared_memory.SharedMemory(create=True, size=len(self.values) * 8)
+            self.shm.buf[:len(self.values) * 8] = self.values.tobytes()
+        return self.shm
+
+    def source(self):
+        """ what a task is given to read the columns """
+        if self.shm is not None:
+            return (self.shm.name, len(self.columns), self.rows)
+        return self.values
+
+    def close(self):
+        """ frees the shared memory block """
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+def _columns(source, count):
+    """ the columns of a task source and the shared memory block to close """
+    if isinstance(source, tuple):
+        name, count, rows = source
+        # the spawned workers share the resource tracker of the parent, which
+        # already tracks the block and unlinks it
+        shm = shared_memory.SharedMemory(name=name)
+        values = shm.buf.cast("d")
+    else:
+        shm, values = None, memoryview(source)
+        rows = len(source) // count if count else 0
+    return [values[i * rows:(i + 1) * rows] for i in range(count)], values, shm
+
+
+def _release(values, columns, shm):
+    """ drops the views of a shared memory block before closing it """
+    if shm is not None:
+        for column in columns:
+            column.release()
+        values.release()
+        shm.close()
+
+
+def scan_places(source, start, end, filters, k):
+    """
+    Filters the places of rows [start, end).
+
+    Returns:
+        tuple: (matching places, sum of their prices, the k cheapest as (price, row))
+    """
+    columns, values, shm = _columns(source, len(PLACE_COLUMNS))
+    try:
+        price, guests, city = columns
+        min_price = filters.get("min_price", float("-inf"))
+        max_price = filters.get("max_price", float("inf"))
+        min_guests = filters.get("min_guests", 0)
+        cities = filters.get("cities")
+        count, total, matches = 0, 0.0, []
+        for row in range(start, end):
+            p = price[row]
+            if p < min_price or p > max_price or guests[row] < min_guests:
+                continue
+            if cities is not None and city[row] not in cities:
+                continue
+            count += 1
+            total += p
+            matches.append((p, row))
+        return count, total, heapq.nsmallest(k, matches)
+    finally:
+        _release(values, columns, shm)
+
+
+def scan_reviews(source, start, end, k, min_reviews):
+    """
+    Aggregates the reviews of rows [start, end), which hold every review of
+    their places (the reviews are sorted by place).
+
+    Returns:
+        tuple: (reviews, sum of the ratings, the k best places as (average, reviews, row))
+    """
+    columns, values, shm = _columns(source, len(REVIEW_COLUMNS))
+    try:
+        place, rating = columns
+        count, total, best = 0, 0.0, []
+        row, n, s = None, 0, 0.0
+        for i in range(start, end + 1):
+            current = place[i] if i < end else None
+            if current != row:
+                if row is not None and row >= 0 and n >= min_reviews:
+                    entry = (s / n, n, row)
+                    if len(best) < k:
+                        heapq.heappush(best, entry)
+                    elif entry > best[0]:
+                        heapq.heapreplace(best, entry)
+                row, n, s = current, 0, 0.0
+            if i < end:
+                r = rating[i]
+                count += 1
+                total += r
+                n += 1
+                s += r
+        return count, total, best
+    finally:
+        _release(values, columns, shm)
+
+
+class Snapshot():
+    """Column copies of the places and the reviews at one point in time"""
+
+    def __init__(self, places, reviews):
+        self.created_at = time.monotonic()
+        records = list(places.items())
+        self.place_ids = [k for k, _ in records]
+        place_rows = {k: i for i, k in enumerate(self.place_ids)}
+        self.city_codes = {}
+        price, guests, city = array("d"), array("d"), array("d")
+        for _, v in records:
+            price.append(v.get('price_per_night') or 0.0)
+            guests.append(v.get('max_guests') or 0)
+            city.append(self.city_codes.setdefault(v.get('city_id'), len(self.city_codes)))
+        self.places = Table(PLACE_COLUMNS, len(self.place_ids))
+        for column in (price, guests, city):
+            self.places.values.extend(column)
+
+        # sorted by place, so the reviews of a place are never split across chunks
+        pairs = sorted((place_rows.get(v['place_id'], -1), v['rating']) for v in reviews)
+        place = array("d", (p for p, _ in pairs))
+        rating = array("d", (r for _, r in pairs))
+        self.reviews = Table(REVIEW_COLUMNS, len(place))
+        self.reviews.values.extend(place)
+        self.reviews.values.extend(rating)
+
+        self.users = 0
+        self.retired = False
+
+    def close(self):
+        """ frees the shared memory of the snapshot """
+        self.places.close()
+        self.reviews.close()
+
+
+class QueryExecutor():
+    """Runs the place and review scans in chunks on a process pool"""
+
+    def __init__(self, places, reviews, workers=None, min_rows=None, max_age=None):
+        if workers is None:
+            workers = int(os.environ.get("HBNB_ANALYTICS_WORKERS", str(os.cpu_count() or 1)))
+        if min_rows is None:
+            min_rows = int(os.environ.get("HBNB_ANALYTICS_MIN_ROWS", "50000"))
+        if max_age is None:
+            max_age = float(os.environ.get("HBNB_ANALYTICS_MAX_AGE", "5"))
+        self.places = places
+        self.reviews = reviews
+        self.workers = workers
+        self.min_rows = min_rows
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._executor = None
+        self._snapshot = None
+        self._stale = True
+
+    def on_change(self, event):
+        """ change feed listener """
+        if event["entity"] in ("Place", "Review"):
+            self._stale = True
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawned, not forked: forking a process full of threads and locks is unsafe
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _acquire(self):
+        """ the current snapshot, refreshed if it is stale and old enough """
+        with self._lock:
+            current = self._snapshot
+            if current is None or (self._stale and
+                                   time.monotonic() - current.created_at >= self.max_age):
+                self._stale = False
+                current = Snapshot(self.places, list(self.reviews.values()))
+                if self._snapshot is not None:
+                    self._retire(self._snapshot)
+                self._snapshot = current
+            current.users += 1
+            return current
+
+    def _release(self, snapshot):
+        with self._lock:
+            snapshot.users -= 1
+            if snapshot.retired and snapshot.users == 0:
+                snapshot.close()
+
+    def _retire(self, snapshot):
+        snapshot.retired = True
+        if snapshot.users == 0:
+            snapshot.close()
+
+    def _run(self, fn, table, *args, grouped=False):
+        """
+        fn over the rows of a table, in chunks on the pool for the big tables.
+        With grouped=True a chunk never ends between two rows with the same
+        value in the first column.
+        """
+        if self.workers == 0 or table.rows < self.min_rows:
+            return [fn(table.source(), 0, table.rows, *args)]
+        with self._lock:
+            table.to_shared()
+        source = table.source()
+        step = -(-table.rows // (self.workers * 2))
+        bounds = [0]
+        while bounds[-1] < table.rows:
+            end = min(bounds[-1] + step, table.rows)
+            while grouped and end < table.rows and table.values[end] == table.values[end - 1]:
+                end += 1
+            bounds.append(end)
+        pool = self._pool()
+        futures = [pool.submit(fn, source, start, end, *args)
+                   for start, end in zip(bounds, bounds[1:])]
+        return [future.result() for future in futures]
+
+    def places_query(self, min_price=None, max_price=None, min_guests=None,
+                     city_ids=None, k=10):
+        """
+        Places matching the filters.
+
+        Returns:
+            dict: count, average_price and the ids of the k cheapest places
+        """
+        snapshot = self._acquire()
+        try:
+            filters = {}
+            if min_price is not None:
+                filters["min_price"] = min_price
+            if max_price is not None:
+                filters["max_price"] = max_price
+            if min_guests is not None:
+                filters["min_guests"] = min_guests
+            if city_ids is not None:
+                filters["cities"] = {snapshot.city_codes[c] for c in city_ids
+                                     if c in snapshot.city_codes}
+            partials = self._run(scan_places, snapshot.places, filters, k)
+            count = sum(p[0] for p in partials)
+            total = sum(p[1] for p in partials)
+            cheapest = heapq.nsmallest(k, (m for p in partials for m in p[2]))
+            return {
+                "count": count,
+                "average_price": round(total / count, 2) if count else None,
+                "cheapest": [snapshot.place_ids[row] for _, row in cheapest]
+            }
+        finally:
+            self._release(snapshot)
+
+    def reviews_query(self, k=10, min_reviews=1):
+        """
+        Review totals and the best rated places.
+
+        Returns:
+            dict: reviews, average_rating and the k places with the best average
+                rating among those with at least min_reviews reviews
+        """
+        snapshot = self._acquire()
+        try:
+            partials = self._run(scan_reviews, snapshot.reviews, k, min_reviews, grouped=True)
+            count = sum(p[0] for p in partials)
+            total = sum(p[1] for p in partials)
+            best = heapq.nlargest(k, (entry for p in partials for entry in p[2]))
+            return {
+                "reviews": count,
+                "average_rating": round(total / count, 2) if count else None,
+                "top_places": [{"place_id": snapshot.place_ids[int(row)],
+                                "reviews": n, "average_rating": round(average, 2)}
+                               for average, n, row in best]
+            }
+        finally:
+            self._release(snapshot)
+
+    def shutdown(self):
+        """ stop the pool and free the shared memory """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+            if self._snapshot is not None:
+                self._retire(self._snapshot)
+                self._snapshot = None
@@ -0,0 +1,153 @@
+#!/usr/bin/python3
+"""
+Change feed
+
+Every create, update and delete done by the API is published here as a
+sequenced event. The last events are kept in a bounded ring buffer that
+clients read through /api/v1/changes, and in-process listeners (indexes,
+caches) subscribe to keep themselves up to date.
+
+An event looks like:
+    {"seq": 42, "entity": "Place", "op": "update", "id": "...",
+     "data": {...the record after the change...}, "timestamp": 1715566897.19}
+
+`data` is None for deletes. Listeners also get the record as it was before
+the change in event["previous"], which is not sent to the clients, and the
+private fields (password hashes) that are left out of the buffered events.
+
+The feed lives in the process: each gunicorn worker has its own buffer and
+its own seq, and only sees the changes it made itself. A `since` is only
+meaningful to the worker that handed it out, so a client reading the feed
+must stick to one worker (or run the app with a single worker).
+
+A long-poll waits at most MAX_WAIT seconds and an SSE stream ends after
+STREAM_SECONDS (the client reconnects with Last-Event-ID), both well under
+the gunicorn worker timeout.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+DEFAULT_CAPACITY = int(os.environ.get("HBNB_CHANGES_CAPACITY", "10000"))
+
+# longest long-poll wait, length of an SSE stream and keep-alive interval, in seconds
+MAX_WAIT = 20
+STREAM_SECONDS = 60
+KEEPALIVE_SECONDS = 15
+
+# fields of the records that must never reach the clients
+PRIVATE_FIELDS = ("password",)
+
+
+class ChangeFeed():
+    """Sequenced ring buffer of entity mutations"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, private_fields=PRIVATE_FIELDS):
+        self.seq = 0
+        self.private_fields = private_fields
+        self._events = deque(maxlen=capacity)
+        self._listeners = []
+        # held while an event is published, so listeners see events in order
+        self.lock = threading.RLock()
+        self._changed = threading.Condition(self.lock)
+
+    def subscribe(self, listener):
+        """
+        call `listener(event)` for every event published from now on
+
+        When the listener is a method of an index with an invalidate() method
+        and it fails, the index is invalidated so that it is rebuilt from its
+        store on next use. Other listeners failing fail the publish.
+        """
+        self._listeners.append(listener)
+        return listener
+
+    def publish(self, entity, op, entity_id, data=None, previous=None):
+        """
+        Record a mutation.
+
+        Args:
+            entity: model name ("User", "Place", ...)
+            op: "create", "update" or "delete"
+            entity_id: id of the record
+            data: the record after the change (None for deletes)
+            previous: the record before the change (None for creates)
+
+        Returns:
+            dict: the event
+        """
+        with self._changed:
+            self.seq += 1
+            event = {
+                "seq": self.seq,
+                "entity": entity,
+                "op": op,
+                "id": entity_id,
+                "data": None,
+                "timestamp": time.time(),
+            }
+            if data is not None:
+                event["data"] = {k: v for k, v in data.items() if k not in self.private_fields}
+            self._events.append(event)
+            listener_event = dict(event, data=dict(data) if data is not None else None,
+                                  previous=previous)
+            failed = None
+            for listener in self._listeners:
+                try:
+                    listener(listener_event)
+                except Exception as exc:  # pylint: disable=broad-except
+                    invalidate = getattr(getattr(listener, "__self__", None), "invalidate", None)
+                    if invalidate is None:
+                        failed = failed or exc
+                        continue
+                    # the index missed the change, it is rebuilt rather than left out of sync
+                    print(f"Change listener {listener!r} failed, rebuilding it: {exc!r}",
+                          file=sys.stderr)
+                    invalidate()
+            self._changed.notify_all()
+        if failed is not None:
+            raise failed
+        return event
+
+    @property
+    def oldest_seq(self):
+        """ seq of the oldest event still in the buffer (seq + 1 if empty) """
+        with self.lock:
+            return self._events[0]["seq"] if self._events else self.seq + 1
+
+    def since(self, seq, limit=None):
+        """
+        Events with a seq greater than `seq`.
+
+        Returns:
+            list: the events, oldest first
+
+        Raises:
+            LookupError: if events after `seq` were already dropped from the buffer
+        """
+        with self.lock:
+            if seq < self.oldest_seq - 1:
+                raise LookupError(f"Changes since {seq} are no longer available")
+            if seq >= self.seq:
+                return []
+            # seqs are contiguous, so the position in the buffer can be computed
+            start = len(self._events) - (self.seq - seq)
+            stop = len(self._events) if limit is None else min(len(self._events), start + limit)
+            return [self._events[i] for i in range(start, stop)]
+
+    def wait(self, seq, timeout):
+        """ block until an event after `seq` is published or `timeout` expires """
+        with self._changed:
+            return self._changed.wait_for(lambda: self.seq > seq, timeout)
+
+
+def format_sse(event):
+    """ an event as a server-sent event message """
+    return f"id: {event['seq']}\nevent: change\ndata: {json.dumps(event)}\n\n"
+
+
+feed = ChangeFeed()
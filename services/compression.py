@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+"""
+Response compression
+
+Compresses JSON and text responses with the best encoding the client accepts
+(br and zstd when the brotli / zstandard packages are installed, gzip always).
+
+Listings are large and the same bytes are served again and again until the
+data changes, so compressed bodies are kept in an LRU keyed by a digest of
+the uncompressed body: an unchanged listing is compressed once and then only
+hashed, which is much cheaper than compressing it.
+
+Settings (app.config):
+    COMPRESS_MIN_SIZE    smallest body worth compressing, in bytes
+    COMPRESS_LEVELS      level per encoding, over the defaults (DEFAULT_LEVELS)
+    COMPRESS_CACHE_BYTES total size of the cached compressed bodies
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_LEVELS = {"br": 5, "zstd": 3, "gzip": 6}
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/plain", "text/html")
+
+# encoding -> compress(data, level), in order of preference
+CODECS = OrderedDict()
+if brotli is not None:
+    CODECS["br"] = lambda data, level: brotli.compress(data, quality=level)
+if zstandard is not None:
+    CODECS["zstd"] = lambda data, level: zstandard.ZstdCompressor(level=level).compress(data)
+CODECS["gzip"] = lambda data, level: gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def negotiate(accept_encoding, codecs=CODECS):
+    """
+    Pick the encoding to use for an Accept-Encoding header.
+
+    The encoding with the highest q-value wins; the server order of
+    `codecs` only breaks ties between equal q-values.
+
+    Returns:
+        str: the encoding, or None if the response should not be compressed
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, *params = part.split(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for name in codecs:
+        quality = accepted.get(name, wildcard)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+class CompressedCache():
+    """LRU of compressed bodies, bounded by the total compressed size"""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compress(self, body, encoding, level):
+        """ compressed body, compressing it only if it is not cached yet """
+        key = (encoding, level, hashlib.blake2b(body, digest_size=16).digest())
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+
+        compressed = CODECS[encoding](body, level)
+        if len(compressed) > self.max_bytes:
+            return compressed
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = compressed
+                self.size += len(compressed)
+                while self.size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.size -= len(evicted)
+        return compressed
+
+
+def _compress_response(response, app, cache):
+    if (response.status_code != 200 or response.direct_passthrough
+            or response.is_streamed or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    if len(body) < app.config.get("COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE):
+        return response
+
+    encoding = negotiate(request.headers.get("Accept-Encoding", ""))
+    if encoding is None:
+        return response
+
+    level = {**DEFAULT_LEVELS, **app.config.get("COMPRESS_LEVELS", {})}[encoding]
+    response.set_data(cache.get_or_compress(body, encoding, level))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_app(app):
+    """ compress the responses of the app """
+    cache = CompressedCache(app.config.get("COMPRESS_CACHE_BYTES", DEFAULT_CACHE_BYTES))
+    app.extensions["compression_cache"] = cache
+    app.after_request(lambda response: _compress_response(response, app, cache))
+    return cache
@@ -0,0 +1,197 @@
+#!/usr/bin/python3
+"""
+Password hashing
+
+Passwords are stored as salted scrypt (or PBKDF2) hashes:
+    scrypt$<n>$<r>$<p>$<salt>$<hash>
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+
+Hashing is made slow on purpose, so it runs in a dedicated process pool and
+the request threads only wait for the result (without holding the GIL). At
+most HBNB_HASH_MAX_PENDING hashes are queued; past that, or when a hash takes
+longer than the service timeout, CredentialsBusy is raised and the API answers
+503 instead of piling up work it can't finish.
+
+A login with an unknown email is checked against a dummy hash, so it costs
+the same as a wrong password and the timing doesn't tell which emails exist.
+
+A login with a password stored in plaintext (the seed data) or with older
+cost parameters succeeds and returns the hash to store instead, so the
+stored hashes upgrade themselves as the users log in.
+
+Settings (environment):
+    HBNB_PASSWORD_SCHEME   "scrypt" or "pbkdf2_sha256"
+    HBNB_SCRYPT_N, HBNB_SCRYPT_R, HBNB_SCRYPT_P, HBNB_PBKDF2_ITERATIONS
+    HBNB_HASH_WORKERS      processes of the pool, 0 hashes in the calling thread
+    HBNB_HASH_MAX_PENDING  hashes queued or running at once
+"""
+
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+
+class CredentialsBusy(Exception):
+    """Too many hashes are already queued, or one took too long"""
+
+
+def _params():
+    """ the current scheme and cost parameters """
+    scheme = os.environ.get("HBNB_PASSWORD_SCHEME", "scrypt")
+    if scheme == "pbkdf2_sha256":
+        return (scheme, int(os.environ.get("HBNB_PBKDF2_ITERATIONS", "600000")))
+    return ("scrypt", int(os.environ.get("HBNB_SCRYPT_N", str(2 ** 14))),
+            int(os.environ.get("HBNB_SCRYPT_R", "8")),
+            int(os.environ.get("HBNB_SCRYPT_P", "1")))
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode().rstrip("=")
+
+
+def _unb64(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _derive(password, salt, params):
+    if params[0] == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, params[1])
+    _, n, r, p = params
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=128 * n * r * p + 1024 * 1024, dklen=32)
+
+
+def make_hash(password, params=None):
+    """ a new salted hash of a password """
+    params = params or _params()
+    salt = os.urandom(16)
+    fields = [str(value) for value in params]
+    return "$".join(fields + [_b64(salt), _b64(_derive(password, salt, params))])
+
+
+def _parse(stored):
+    """ (params, salt, hash) of a stored hash, None for a plaintext password """
+    parts = stored.split("$")
+    try:
+        if parts[0] == "scrypt" and len(parts) == 6:
+            return ("scrypt", int(parts[1]), int(parts[2]), int(parts[3])), \
+                _unb64(parts[4]), _unb64(parts[5])
+        if parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+            return ("pbkdf2_sha256", int(parts[1])), _unb64(parts[2]), _unb64(parts[3])
+    except ValueError:
+        pass
+    return None
+
+
+def check_hash(password, stored):
+    """ True if `password` matches the stored hash (or legacy plaintext) """
+    parsed = _parse(stored)
+    if parsed is None:
+        return hmac.compare_digest(password.encode(), stored.encode())
+    params, salt, expected = parsed
+    return hmac.compare_digest(_derive(password, salt, params), expected)
+
+
+def needs_rehash(stored, params=None):
+    """ True if the stored password is plaintext or uses other parameters """
+    parsed = _parse(stored)
+    return parsed is None or parsed[0] != (params or _params())
+
+
+def verify_and_upgrade(password, stored, params=None):
+    """
+    Check a password, hashing it again if the stored form is outdated.
+
+    Returns:
+        tuple: (True if it matches, the new hash to store or None)
+    """
+    params = params or _params()
+    if not check_hash(password, stored):
+        return False, None
+    return True, make_hash(password, params) if needs_rehash(stored, params) else None
+
+
+class CredentialService():
+    """Runs the hashing in a process pool with a bounded queue"""
+
+    def __init__(self, workers=None, max_pending=None, timeout=30.0):
+        if workers is None:
+            workers = int(os.environ.get("HBNB_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+        if max_pending is None:
+            max_pending = int(os.environ.get("HBNB_HASH_MAX_PENDING", "64"))
+        self.workers = workers
+        self.timeout = timeout
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._dummy = None    # (params, hash of a random password)
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawned, not forked: forking a process full of threads and locks is unsafe
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._pending.acquire(blocking=False):
+            raise CredentialsBusy("Too many password checks in progress, try again later")
+        try:
+            args += (_params(),)
+            if self.workers == 0:
+                return fn(*args)
+            return self._pool().submit(fn, *args).result(self.timeout)
+        except FutureTimeout:
+            raise CredentialsBusy("Password check timed out, try again later") from None
+        finally:
+            self._pending.release()
+
+    def hash_password(self, password):
+        """ a new salted hash of a password """
+        return self._run(make_hash, password)
+
+    def verify(self, password, stored):
+        """
+        Check a password against its stored hash.
+
+        Returns:
+            tuple: (True if it matches, the new hash to store or None)
+
+        Raises:
+            CredentialsBusy: if too many hashes are queued
+        """
+        return self._run(verify_and_upgrade, password, stored)
+
+    def verify_unknown(self, password):
+        """
+        Do the work of a verify for a user that doesn't exist, which never matches.
+
+        Raises:
+            CredentialsBusy: if too many hashes are queued
+        """
+        params = _params()
+        dummy = self._dummy
+        if dummy is None or dummy[0] != params:
+            dummy = self._dummy = (params, make_hash(os.urandom(16).hex(), params))
+        self._run(verify_and_upgrade, password, dummy[1])
+        return False, None
+
+    def shutdown(self):
+        """ stop the pool """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+credentials = CredentialService()
+
+
+def hash_password(password):
+    """ a new salted hash of a password, computed in the pool """
+    return credentials.hash_password(password)
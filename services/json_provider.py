@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+"""
+JSON provider for the Flask app
+
+Uses orjson when it is installed and falls back to the stdlib encoder.
+
+The handlers wrap the stored float timestamps in Timestamp instead of building
+datetime objects; the provider writes them straight out in the same RFC 822
+format that Flask used for the naive datetimes ("Sun, 12 May 2024 10:21:37 GMT").
+Model objects with a to_dict() method (the Place objects that create_place
+keeps in place_data) are serialised through it.
+"""
+
+import json
+import time
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+_DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_MONTHS = ("", "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+           "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+class Timestamp():
+    """A stored float timestamp that should be written as a date"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, Timestamp) and other.value == self.value
+
+    def __repr__(self):
+        return f"Timestamp({self.value!r})"
+
+
+def format_timestamp(value):
+    """
+    RFC 822 date of a float timestamp.
+
+    Same output as Flask's encoding of datetime.fromtimestamp(value): the local
+    wall clock time, labelled GMT, without the microseconds.
+    """
+    t = time.localtime(value)
+    return "%s, %02d %s %04d %02d:%02d:%02d GMT" % (
+        _DAYS[t.tm_wday], t.tm_mday, _MONTHS[t.tm_mon], t.tm_year,
+        t.tm_hour, t.tm_min, t.tm_sec)
+
+
+def _default(o):
+    """ encoder for the types the JSON libraries don't know about """
+    if isinstance(o, Timestamp):
+        return format_timestamp(o.value)
+    if hasattr(o, "to_dict"):
+        return o.to_dict()
+    if hasattr(o, "isoformat"):
+        # datetimes still built elsewhere, same format as Flask
+        from werkzeug.http import http_date  # pylint: disable=import-outside-toplevel
+        return http_date(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class HBnBJSONProvider(JSONProvider):
+    """Fast JSON provider, keys sorted like Flask's default provider"""
+
+    mimetype = "application/json"
+
+    # datetimes go through _default so they keep Flask's format
+    orjson_options = orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=_default, option=self.orjson_options).decode()
+        kwargs.setdefault("default", _default)
+        kwargs.setdefault("sort_keys", True)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if orjson is not None:
+            # skip the bytes -> str -> bytes round trip of dumps()
+            body = orjson.dumps(obj, default=_default, option=self.orjson_options)
+        else:
+            body = json.dumps(obj, default=_default, sort_keys=True,
+                              separators=(",", ":")).encode()
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
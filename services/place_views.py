@@ -0,0 +1,163 @@
+#!/usr/bin/python3
+"""
+Expanded place views
+
+`?expand=city,country,host,amenities,rating` on the place endpoints embeds
+the records a listing page needs, so the front end doesn't have to fetch
+them one by one.
+
+The expansions of a place are resolved once with id lookups in the stores
+and kept in a bounded LRU. Each view remembers the ids it was built from;
+a change event for any of them (the place, its city, the country of the
+city, the host, an amenity, a review of the place) drops the view, which
+is rebuilt on the next request.
+"""
+
+import threading
+from collections import OrderedDict
+from services.json_provider import Timestamp
+
+EXPANSIONS = ("city", "country", "host", "amenities", "rating")
+
+DEFAULT_MAX_VIEWS = 100000
+
+
+def parse_expand(value):
+    """
+    The expansions asked for by an ?expand= value.
+
+    Returns:
+        tuple: the expansions, in the order of EXPANSIONS
+
+    Raises:
+        ValueError: for an unknown expansion
+    """
+    wanted = {part.strip() for part in (value or "").split(",") if part.strip()}
+    unknown = wanted.difference(EXPANSIONS)
+    if unknown:
+        raise ValueError(f"Unknown expand value(s): {', '.join(sorted(unknown))}. "
+                         f"Use any of {', '.join(EXPANSIONS)}")
+    return tuple(part for part in EXPANSIONS if part in wanted)
+
+
+def _city(v):
+    return {"id": v['id'], "name": v['name'], "country_id": v['country_id'],
+            "created_at": Timestamp(v['created_at']), "updated_at": Timestamp(v['updated_at'])}
+
+
+def _country(v):
+    return {"id": v['id'], "name": v['name'], "code": v['code'],
+            "created_at": Timestamp(v['created_at']), "updated_at": Timestamp(v['updated_at'])}
+
+
+def _host(v):
+    return {"id": v['id'], "first_name": v['first_name'], "last_name": v['last_name'],
+            "created_at": Timestamp(v['created_at']), "updated_at": Timestamp(v['updated_at'])}
+
+
+def _amenity(v):
+    return {"id": v['id'], "name": v['name'],
+            "created_at": Timestamp(v['created_at']), "updated_at": Timestamp(v['updated_at'])}
+
+
+class PlaceViews():
+    """Materialized expansions of the places, invalidated by the change feed"""
+
+    def __init__(self, places, cities, countries, users, amenities, place_amenities,
+                 reviews_by_place, max_views=DEFAULT_MAX_VIEWS):
+        self.places = places
+        self.cities = cities
+        self.countries = countries
+        self.users = users
+        self.amenities = amenities
+        self.place_amenities = place_amenities
+        self.reviews_by_place = reviews_by_place
+        self.max_views = max_views
+        self._views = OrderedDict()    # place_id -> view
+        self._dependents = {}          # id of a referenced record -> place ids
+        self._depends_on = {}          # place_id -> ids of the records it references
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _build(self, place_id):
+        """ every expansion of a place and the ids they were built from """
+        place = self.places[place_id]
+        city = self.cities.get(place.get('city_id'))
+        country = self.countries.get(city['country_id']) if city else None
+        host = self.users.get(place.get('host_user_id'))
+        amenity_ids = self.place_amenities.get(place_id, ())
+        count, total = self.reviews_by_place.rating(place_id)
+
+        view = {
+            "city": _city(city) if city else None,
+            "country": _country(country) if country else None,
+            "host": _host(host) if host else None,
+            "amenities": [_amenity(self.amenities[k]) for k in amenity_ids
+                          if k in self.amenities],
+            "rating": {"count": count,
+                       "average": round(total / count, 2) if count else None},
+        }
+        depends_on = {place.get('city_id'), place.get('host_user_id'), *amenity_ids}
+        if city:
+            depends_on.add(city['country_id'])
+        depends_on.discard(None)
+        return view, depends_on
+
+    def _drop(self, place_id):
+        self._views.pop(place_id, None)
+        for key in self._depends_on.pop(place_id, ()):
+            place_ids = self._dependents.get(key)
+            if place_ids is not None:
+                place_ids.discard(place_id)
+                if not place_ids:
+                    del self._dependents[key]
+
+    def get(self, place_id):
+        """ the expansions of a place (all of them) """
+        with self._lock:
+            view = self._views.get(place_id)
+            if view is not None:
+                self._views.move_to_end(place_id)
+                self.hits += 1
+                return view
+            self.misses += 1
+            view, depends_on = self._build(place_id)
+            self._views[place_id] = view
+            self._depends_on[place_id] = depends_on
+            for key in depends_on:
+                self._dependents.setdefault(key, set()).add(place_id)
+            if len(self._views) > self.max_views:
+                self._drop(next(iter(self._views)))
+            return view
+
+    def expand(self, row, place_id, parts):
+        """ add the expansions `parts` of a place to its response row """
+        if parts:
+            view = self.get(place_id)
+            for part in parts:
+                row[part] = view[part]
+        return row
+
+    def invalidate(self):
+        """ drops every view after a missed change """
+        with self._lock:
+            self._views.clear()
+            self._dependents.clear()
+            self._depends_on.clear()
+
+    def on_change(self, event):
+        """ change feed listener """
+        with self._lock:
+            if not self._views:
+                self._dependents.clear()
+                self._depends_on.clear()
+                return
+            for place_id in self._dependents.pop(event["id"], ()):
+                self._drop(place_id)
+            if event["entity"] == "Place":
+                self._drop(event["id"])
+            elif event["entity"] == "Review":
+                for review in (event["data"], event.get("previous")):
+                    if review:
+                        self._drop(review['place_id'])
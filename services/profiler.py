@@ -0,0 +1,239 @@
+#!/usr/bin/python3
+"""
+Profiler Module
+
+Opt-in profiling for the API. Nothing is registered on the app unless
+profiling is enabled (HBNB_PROFILING=1), so there is no overhead otherwise.
+
+When enabled:
+- a request with the header `X-Profile: 1` or the query flag `?profile=1`
+  is run under cProfile and the pstats report is returned instead of the body
+- GET /api/v1/admin/profile?seconds=N runs a wall-clock sampling profiler in
+  every worker process for N seconds and returns the merged stacks in the
+  folded format used by flamegraph.pl / speedscope; like every admin route it
+  takes the admin key in `X-Admin-Key` (see services/sessions.py)
+
+Workers are separate processes under gunicorn, so the admin endpoint drops a
+request file into a shared folder (HBNB_PROFILE_DIR). A watcher thread in each
+worker picks it up, samples its own process and writes its folded stacks back.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from flask import Response, abort, g, request
+from services.sessions import admin_required
+
+# how often the workers look for new sampling requests
+WATCH_INTERVAL = 0.25
+
+# longest sampling run the admin endpoint accepts
+MAX_SECONDS = 60
+
+# orders of the pstats report accepted by ?sort=, with the aliases sort_stats()
+# takes (tottime, cumtime, ncalls, ...)
+SORT_KEYS = tuple(sorted(pstats.Stats.sort_arg_dict_default))
+
+# threads that should not show up in the samples (samplers, waiting admin requests)
+_ignored_threads = set()
+
+
+def is_enabled():
+    """ profiling is opt-in through the environment """
+    return os.environ.get("HBNB_PROFILING") == "1"
+
+
+def profile_dir():
+    """ folder shared by the workers to exchange sampling requests and results """
+    return os.environ.get("HBNB_PROFILE_DIR",
+                          os.path.join(tempfile.gettempdir(), "hbnb-profile"))
+
+
+class SamplingProfiler():
+    """ Wall-clock sampler of the stacks of every thread of this process """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+
+    def sample(self, seconds):
+        """
+        Sample the stacks of all threads for `seconds`.
+
+        Returns:
+            Counter: folded stack ("outer;inner;innermost") -> number of samples
+        """
+        stacks = Counter()
+        me = threading.get_ident()
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():  # pylint: disable=protected-access
+                if thread_id == me or thread_id in _ignored_threads:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stacks[";".join(reversed(names))] += 1
+            time.sleep(self.interval)
+
+        return stacks
+
+
+def format_folded(stacks):
+    """ folded stacks as text, one `stack count` line per stack """
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def parse_folded(text):
+    """ inverse of format_folded """
+    stacks = Counter()
+    for line in text.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack:
+            stacks[stack] += int(count)
+    return stacks
+
+
+class _Watcher(threading.Thread):
+    """ Worker thread that answers the sampling requests of the admin endpoint """
+
+    def __init__(self):
+        super().__init__(name="hbnb-profile-watcher", daemon=True)
+        self.pid = os.getpid()
+        self.handled = set()
+
+    def run(self):
+        _ignored_threads.add(threading.get_ident())
+        while True:
+            directory = profile_dir()
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                names = []
+            for name in names:
+                if name.endswith(".request") and name not in self.handled:
+                    self.handled.add(name)
+                    self.answer(directory, name)
+            time.sleep(WATCH_INTERVAL)
+
+    def answer(self, directory, name):
+        """ sample this process as asked by the request file and write the result """
+        try:
+            with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                spec = json.load(f)
+        except (OSError, ValueError):
+            return
+        stacks = SamplingProfiler(spec["interval"]).sample(spec["seconds"])
+        token = name[:-len(".request")]
+        path = os.path.join(directory, f"{token}-{os.getpid()}.folded")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(format_folded(stacks))
+        os.replace(path + ".tmp", path)
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def _start_watcher():
+    """ start the watcher once per process (gunicorn forks after the import) """
+    global _watcher  # pylint: disable=global-statement
+    with _watcher_lock:
+        if _watcher is None or _watcher.pid != os.getpid() or not _watcher.is_alive():
+            _watcher = _Watcher()
+            _watcher.start()
+
+
+def _wants_profile():
+    return request.headers.get("X-Profile") == "1" or request.args.get("profile") == "1"
+
+
+def _before_request():
+    _start_watcher()
+    if _wants_profile():
+        # checked here, an error in after_request would be a 500
+        if request.args.get("sort", "cumulative") not in SORT_KEYS:
+            abort(400, f"sort must be one of {', '.join(SORT_KEYS)}")
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+def _after_request(response):
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return response
+    profiler.disable()
+
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats(request.args.get("sort", "cumulative")).print_stats(40)
+    report = Response(out.getvalue(), mimetype="text/plain")
+    report.headers["X-Profiled-Status"] = str(response.status_code)
+    return report
+
+
+def profile_workers():
+    """ admin endpoint: sample every worker and return the merged folded stacks """
+    try:
+        seconds = float(request.args.get("seconds", 5))
+        interval = float(request.args.get("interval", 0.005))
+    except ValueError:
+        abort(400, "seconds and interval must be numbers")
+    if not 0 < seconds <= MAX_SECONDS or interval <= 0:
+        abort(400, f"seconds must be between 0 and {MAX_SECONDS}")
+
+    _start_watcher()
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    token = uuid.uuid4().hex
+    request_path = os.path.join(directory, token + ".request")
+    with open(request_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"seconds": seconds, "interval": interval}, f)
+    os.replace(request_path + ".tmp", request_path)
+
+    # wait for the workers to sample, while staying out of the samples ourselves
+    me = threading.get_ident()
+    _ignored_threads.add(me)
+    try:
+        time.sleep(seconds + 2 * WATCH_INTERVAL + 0.5)
+    finally:
+        _ignored_threads.discard(me)
+        os.remove(request_path)
+
+    stacks = Counter()
+    workers = 0
+    for name in os.listdir(directory):
+        if name.startswith(token + "-") and name.endswith(".folded"):
+            path = os.path.join(directory, name)
+            with open(path, "r", encoding="utf-8") as f:
+                stacks.update(parse_folded(f.read()))
+            os.remove(path)
+            workers += 1
+
+    response = Response(format_folded(stacks), mimetype="text/plain")
+    response.headers["X-Profiled-Workers"] = str(workers)
+    return response
+
+
+def init_app(app, enabled=None):
+    """ register the profiling hooks and endpoint if profiling is enabled """
+    if enabled is None:
+        enabled = is_enabled()
+    if not enabled:
+        return False
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule('/api/v1/admin/profile', 'profile_workers',
+                     admin_required(profile_workers), methods=["GET"])
+    return True
@@ -0,0 +1,269 @@
+#!/usr/bin/python3
+"""
+Sessions
+
+POST /api/v1/auth/login hands out a signed token that the client sends back
+as `Authorization: Bearer <token>`. A token carries the user id, its expiry
+and its own id, signed with HMAC-SHA256, so checking it needs no storage:
+
+    <user id>.<expires>.<token id>.<signature>
+
+On top of the signature check:
+- logged out tokens are revoked until they expire, and all the tokens of a
+  user are revoked when the user is deleted
+- the tokens seen recently are kept in an LRU with what they decoded to, so
+  a hot token costs a dict lookup instead of an HMAC (the revocations and the
+  expiry are still checked on every request)
+
+The revocations live in a store: "sqlite" (the default) keeps them in a small
+SQLite file that every worker process of the deployment shares, so a logout
+done on one worker holds on all of them; "memory" keeps them in the process,
+for a single worker. The file sits next to the data files (data/), not in a
+folder shared by every deployment of the machine.
+
+Every worker must sign with the same key, HBNB_SECRET_KEY. Without it a
+random key is made at startup, which only works with a single worker
+process: gunicorn.conf.py refuses to start more than one worker without it.
+
+The /api/v1/admin/* routes are not for the users: they take the admin key,
+HBNB_ADMIN_KEY, in an `X-Admin-Key` header, and answer 401 to everyone while
+no admin key is set.
+
+Settings (environment):
+    HBNB_SECRET_KEY           key of the token signatures
+    HBNB_ADMIN_KEY            key of the admin routes
+    HBNB_SESSION_TTL          lifetime of a token, in seconds
+    HBNB_SESSIONS_STORE       "sqlite" or "memory"
+    HBNB_SESSIONS_SQLITE_PATH file of the sqlite store (data/sessions.sqlite)
+"""
+
+import base64
+import functools
+import hashlib
+import hmac
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from flask import abort, g, request
+
+DEFAULT_TTL = int(os.environ.get("HBNB_SESSION_TTL", str(24 * 3600)))
+DEFAULT_CACHE_SIZE = 10000
+
+# revoked tokens kept by the memory store before the expired ones are dropped
+MAX_MEMORY_REVOCATIONS = 20000
+
+
+def _secret():
+    key = os.environ.get("HBNB_SECRET_KEY")
+    return key.encode() if key else os.urandom(32)
+
+
+def check_secret(workers):
+    """ raises RuntimeError if `workers` processes would each sign with their own key """
+    if workers > 1 and not os.environ.get("HBNB_SECRET_KEY"):
+        raise RuntimeError("HBNB_SECRET_KEY must be set to run more than one worker: "
+                           "each worker would sign the session tokens with its own key")
+
+
+class MemoryRevocations():
+    """Revoked tokens and users of this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = {}    # token id -> expires
+        self._users = {}     # user id -> tokens issued before this are invalid
+
+    def revoke(self, token_id, expires, now):
+        """ revoke one token until it expires """
+        with self._lock:
+            self._tokens[token_id] = expires
+            # forget the revocations of the tokens that expired anyway
+            if len(self._tokens) > MAX_MEMORY_REVOCATIONS:
+                self._tokens = {k: v for k, v in self._tokens.items() if v > now}
+
+    def revoke_user(self, user_id, now):
+        """ revoke the tokens of a user issued before now """
+        with self._lock:
+            self._users[user_id] = now
+
+    def is_revoked(self, token_id, user_id, issued_at):
+        """ True for a revoked token, or one issued before its user was revoked """
+        if token_id in self._tokens:
+            return True
+        revoked_before = self._users.get(user_id)
+        return revoked_before is not None and issued_at < revoked_before
+
+
+class SqliteRevocations():
+    """Revoked tokens and users shared by the workers of the deployment through a SQLite file"""
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL):
+        self.path = os.path.abspath(path or os.path.join("data", "sessions.sqlite"))
+        self.ttl = ttl
+        self._local = threading.local()
+
+    def _connect(self):
+        # one connection per thread, and never one opened before a fork
+        conn, pid = getattr(self._local, "conn", (None, None))
+        if conn is None or pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS revoked_tokens "
+                         "(token_id TEXT PRIMARY KEY, expires REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS revoked_users "
+                         "(user_id TEXT PRIMARY KEY, revoked_at REAL)")
+            self._local.conn = (conn, os.getpid())
+        return conn
+
+    def revoke(self, token_id, expires, now):
+        """ revoke one token until it expires """
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO revoked_tokens VALUES (?, ?)",
+                         (token_id, expires))
+            conn.execute("DELETE FROM revoked_tokens WHERE expires <= ?", (now,))
+
+    def revoke_user(self, user_id, now):
+        """ revoke the tokens of a user issued before now """
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO revoked_users VALUES (?, ?)", (user_id, now))
+            # the tokens issued before these have all expired
+            conn.execute("DELETE FROM revoked_users WHERE revoked_at <= ?", (now - self.ttl,))
+
+    def is_revoked(self, token_id, user_id, issued_at):
+        """ True for a revoked token, or one issued before its user was revoked """
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM revoked_tokens WHERE token_id = ?",
+                        (token_id,)).fetchone():
+            return True
+        row = conn.execute("SELECT revoked_at FROM revoked_users WHERE user_id = ?",
+                           (user_id,)).fetchone()
+        return row is not None and issued_at < row[0]
+
+
+def default_store(ttl=DEFAULT_TTL):
+    """ the revocation store set by the environment """
+    if os.environ.get("HBNB_SESSIONS_STORE", "sqlite") == "memory":
+        return MemoryRevocations()
+    return SqliteRevocations(os.environ.get("HBNB_SESSIONS_SQLITE_PATH"), ttl)
+
+
+class SessionManager():
+    """Issues and checks the signed session tokens"""
+
+    def __init__(self, secret=None, ttl=DEFAULT_TTL, cache_size=DEFAULT_CACHE_SIZE,
+                 store=None):
+        self._key = secret or _secret()
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.store = store if store is not None else default_store(ttl)
+        self._lock = threading.Lock()
+        self._validated = OrderedDict()    # token -> (user id, expires, token id)
+        self.cache_hits = 0
+
+    def _sign(self, payload):
+        digest = hmac.new(self._key, payload.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+    def issue(self, user_id, now=None):
+        """
+        A new token for a user.
+
+        Returns:
+            tuple: (token, expiry timestamp)
+        """
+        now = time.time() if now is None else now
+        expires = int(now + self.ttl)
+        payload = f"{user_id}.{expires}.{uuid.uuid4().hex}"
+        return f"{payload}.{self._sign(payload)}", expires
+
+    def _decode(self, token):
+        """ (user id, expires, token id) of a well signed token, None otherwise """
+        payload, _, signature = token.rpartition(".")
+        parts = payload.split(".")
+        if len(parts) != 3 or not hmac.compare_digest(signature, self._sign(payload)):
+            return None
+        try:
+            return parts[0], int(parts[1]), parts[2]
+        except ValueError:
+            return None
+
+    def validate(self, token, now=None):
+        """ the user id of a valid token, None if it is invalid, expired or revoked """
+        now = time.time() if now is None else now
+        with self._lock:
+            decoded = self._validated.get(token)
+            if decoded is not None:
+                self._validated.move_to_end(token)
+                self.cache_hits += 1
+        if decoded is None:
+            decoded = self._decode(token)
+            if decoded is None:
+                return None
+            with self._lock:
+                self._validated[token] = decoded
+                if len(self._validated) > self.cache_size:
+                    self._validated.popitem(last=False)
+
+        user_id, expires, token_id = decoded
+        if expires <= now or self.store.is_revoked(token_id, user_id, expires - self.ttl):
+            return None
+        return user_id
+
+    def revoke(self, token, now=None):
+        """ log a token out """
+        decoded = self._decode(token)
+        if decoded is None:
+            return
+        now = time.time() if now is None else now
+        self.store.revoke(decoded[2], decoded[1], now)
+        with self._lock:
+            self._validated.pop(token, None)
+
+    def revoke_user(self, user_id, now=None):
+        """ log a user out everywhere """
+        now = time.time() if now is None else now
+        self.store.revoke_user(user_id, now)
+
+    def on_change(self, event):
+        """ change feed listener, deleted users lose their sessions """
+        if event["entity"] == "User" and event["op"] == "delete":
+            self.revoke_user(event["id"])
+
+
+sessions = SessionManager()
+
+
+def bearer_token():
+    """ the token of the Authorization header, None without one """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return token.strip() if scheme.lower() == "bearer" and token.strip() else None
+
+
+def login_required(view):
+    """ route decorator: 401 without a valid token, the user id goes in g.user_id """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        token = bearer_token()
+        user_id = sessions.validate(token) if token else None
+        if user_id is None:
+            abort(401, "A valid Bearer token is required")
+        g.user_id = user_id
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def admin_required(view):
+    """ route decorator: 401 without the admin key in X-Admin-Key """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = os.environ.get("HBNB_ADMIN_KEY")
+        given = request.headers.get("X-Admin-Key", "")
+        if not key or not hmac.compare_digest(given.encode(), key.encode()):
+            abort(401, "A valid X-Admin-Key is required")
+        return view(*args, **kwargs)
+    return wrapper
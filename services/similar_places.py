@@ -0,0 +1,284 @@
+#!/usr/bin/python3
+"""
+Places like this one
+
+Each place is described by
+    its amenities    a bit vector, compared with the Jaccard index
+    its price        log scale, so 50 vs 100 is as far as 100 vs 200
+    its capacity     max_guests
+    its location     latitude / longitude
+and the similarity of two places is a weighted sum of the four (WEIGHTS).
+
+Comparing a place with every other place doesn't scale, so the candidates
+come from two kinds of buckets: a MinHash signature of the amenities cut in
+LSH bands (places sharing a band most likely share most of their
+amenities), and a grid of GRID_DEGREES cells (places in the same or a
+neighbouring cell are close by). Only the candidates are scored.
+
+The K most similar places of every place are kept, so a read is a lookup.
+The lists are computed on first use and then refreshed from the change
+events: a changed place is re-bucketed and re-scored, and it is added to,
+or taken out of, the lists of the places it is a candidate of. A deleted
+amenity re-scores the places that had it.
+"""
+
+import hashlib
+import math
+import random
+import threading
+
+NUM_HASHES = 32
+BANDS = 8
+ROWS = NUM_HASHES // BANDS
+GRID_DEGREES = 0.5
+DEFAULT_K = 10
+
+WEIGHTS = {"amenities": 0.5, "price": 0.2, "capacity": 0.1, "distance": 0.2}
+# distance at which the location similarity has dropped to 1/e
+DISTANCE_SCALE_KM = 25.0
+
+_PRIME = (1 << 61) - 1
+_rnd = random.Random(20240513)
+_HASHES = [(_rnd.randrange(1, _PRIME), _rnd.randrange(0, _PRIME)) for _ in range(NUM_HASHES)]
+
+
+def _minhashes(amenity_id):
+    """
+    the NUM_HASHES hash values of an amenity, from a digest of its id so that
+    every process and every run gets the same signatures
+    """
+    v = int.from_bytes(hashlib.blake2b(amenity_id.encode(), digest_size=8).digest(), "big")
+    return [(m * v + c) % _PRIME for m, c in _HASHES]
+
+
+def _distance_km(a, b):
+    """ haversine distance of two (latitude, longitude, cos(latitude)) in radians """
+    h = math.sin((b[0] - a[0]) / 2) ** 2 + a[2] * b[2] * math.sin((b[1] - a[1]) / 2) ** 2
+    return 12742.0 * math.asin(min(1.0, math.sqrt(h)))
+
+
+class Features():
+    """What a place is compared on"""
+
+    __slots__ = ("bits", "log_price", "guests", "location", "bands", "cell")
+
+    def __init__(self, bits, price, guests, location, bands, cell):
+        self.bits = bits
+        self.log_price = math.log1p(max(price, 0.0))
+        self.guests = guests
+        # in radians with the cosine of the latitude, as _distance_km takes them
+        self.location = (math.radians(location[0]), math.radians(location[1]),
+                         math.cos(math.radians(location[0]))) if location else None
+        self.bands = bands
+        self.cell = cell
+
+
+def similarity(a, b):
+    """ similarity of two places, between 0 and 1 """
+    union = (a.bits | b.bits).bit_count()
+    amenities = (a.bits & b.bits).bit_count() / union if union else 0.0
+    price = math.exp(-abs(a.log_price - b.log_price))
+    capacity = 1.0 / (1.0 + abs(a.guests - b.guests))
+    if a.location is not None and b.location is not None:
+        distance = math.exp(-_distance_km(a.location, b.location) / DISTANCE_SCALE_KM)
+    else:
+        distance = 0.0
+    return (WEIGHTS["amenities"] * amenities + WEIGHTS["price"] * price
+            + WEIGHTS["capacity"] * capacity + WEIGHTS["distance"] * distance)
+
+
+class SimilarPlaces():
+    """The K most similar places of every place"""
+
+    def __init__(self, places, amenities, place_amenities, k=DEFAULT_K):
+        self.places = places
+        self.amenities = amenities
+        self.place_amenities = place_amenities
+        self.k = k
+        self._lock = threading.Lock()
+        self._built = False
+        self._bit = {}           # amenity id -> bit index
+        self._next_bit = 0
+        self._minhashes = {}     # amenity id -> its NUM_HASHES hash values
+        self._features = {}      # place id -> Features
+        self._buckets = {}       # band or cell key -> set of place ids
+        self._similar = {}       # place id -> [(score, place id)], best first
+        self._listed_in = {}     # place id -> ids of the places listing it
+        self._amenity_places = {}  # amenity id -> place ids
+
+    def _bits(self, amenity_ids):
+        bits = 0
+        for amenity_id in amenity_ids:
+            if amenity_id not in self._bit:
+                self._bit[amenity_id] = self._next_bit
+                self._next_bit += 1
+                self._minhashes[amenity_id] = _minhashes(amenity_id)
+            bits |= 1 << self._bit[amenity_id]
+        return bits
+
+    def _signature_bands(self, amenity_ids):
+        """ the LSH band keys of the MinHash signature of a set of amenities """
+        if not amenity_ids:
+            return ()
+        # the minimum of each hash over the amenities, column by column
+        signature = list(map(min, *[self._minhashes[a] for a in amenity_ids])) \
+            if len(amenity_ids) > 1 else self._minhashes[next(iter(amenity_ids))]
+        return tuple(("band", i, tuple(signature[i * ROWS:(i + 1) * ROWS]))
+                     for i in range(BANDS))
+
+    def _describe(self, place_id):
+        """ the features of a place, None for an unknown or incomplete place """
+        place = self.places.get(place_id)
+        if place is None or place.get('price_per_night') is None:
+            return None
+        amenity_ids = {a for a in self.place_amenities.get(place_id, ()) if a in self.amenities}
+        bits = self._bits(amenity_ids)
+        latitude, longitude = place.get('latitude'), place.get('longitude')
+        location = (latitude, longitude) if latitude is not None and longitude is not None \
+            else None
+        cell = (math.floor(latitude / GRID_DEGREES), math.floor(longitude / GRID_DEGREES)) \
+            if location else None
+        return Features(bits, place['price_per_night'], place.get('max_guests') or 0,
+                        location, self._signature_bands(amenity_ids), cell)
+
+    def _keys(self, features):
+        """ the buckets a place is filed under """
+        keys = list(features.bands)
+        if features.cell is not None:
+            keys.append(("cell",) + features.cell)
+        return keys
+
+    def _candidates(self, place_id, features):
+        """ ids of the places sharing a band or a nearby cell with a place """
+        found = set()
+        for key in features.bands:
+            found.update(self._buckets.get(key, ()))
+        if features.cell is not None:
+            row, col = features.cell
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    found.update(self._buckets.get(("cell", row + dr, col + dc), ()))
+        found.discard(place_id)
+        return found
+
+    def _file(self, place_id, features):
+        self._features[place_id] = features
+        for key in self._keys(features):
+            self._buckets.setdefault(key, set()).add(place_id)
+        for amenity_id in self.place_amenities.get(place_id, ()):
+            self._amenity_places.setdefault(amenity_id, set()).add(place_id)
+
+    def _unfile(self, place_id):
+        features = self._features.pop(place_id, None)
+        if features is None:
+            return
+        for key in self._keys(features):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(place_id)
+                if not bucket:
+                    del self._buckets[key]
+        for places in self._amenity_places.values():
+            places.discard(place_id)
+
+    def _set_list(self, place_id, scored):
+        for _, other in self._similar.get(place_id, ()):
+            self._listed_in.get(other, set()).discard(place_id)
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        self._similar[place_id] = scored[:self.k]
+        for _, other in self._similar[place_id]:
+            self._listed_in.setdefault(other, set()).add(place_id)
+
+    def _score(self, place_id, scores=None):
+        """
+        Recomputes the list of a place from its candidates. `scores` keeps the
+        scores of the pairs already compared, from the other side.
+        """
+        features = self._features[place_id]
+        scored = []
+        for other in self._candidates(place_id, features):
+            if scores is None:
+                score = similarity(features, self._features[other])
+            else:
+                score = scores.pop((other, place_id), None)
+                if score is None:
+                    score = scores[(place_id, other)] = similarity(features, self._features[other])
+            scored.append((score, other))
+        self._set_list(place_id, scored)
+
+    def _refresh(self, place_id):
+        """ re-files a changed place and updates the lists it is or should be in """
+        affected = set(self._listed_in.get(place_id, ()))
+        self._unfile(place_id)
+        features = self._describe(place_id)
+        if features is None:
+            self._set_list(place_id, [])
+            del self._similar[place_id]
+            self._listed_in.pop(place_id, None)
+        else:
+            self._file(place_id, features)
+            self._score(place_id)
+            for other in self._candidates(place_id, features):
+                listed = self._similar.get(other, [])
+                if other in affected:
+                    continue
+                score = similarity(self._features[other], features)
+                if len(listed) < self.k or score > listed[-1][0]:
+                    self._set_list(other, listed + [(score, place_id)])
+        # the places that listed it may now rank others above it, or lost it
+        for other in affected:
+            if other in self._features:
+                self._score(other)
+
+    def _build(self):
+        self._bit = {}
+        self._next_bit = 0
+        self._minhashes = {}
+        self._features = {}
+        self._buckets = {}
+        self._similar = {}
+        self._listed_in = {}
+        self._amenity_places = {}
+        for place_id in list(self.places):
+            features = self._describe(place_id)
+            if features is not None:
+                self._file(place_id, features)
+        scores = {}
+        for place_id in self._features:
+            self._score(place_id, scores)
+        self._built = True
+
+    def invalidate(self):
+        """ drops the lists, recomputed on next use """
+        with self._lock:
+            self._built = False
+
+    def on_change(self, event):
+        """ change feed listener """
+        entity = event["entity"]
+        if entity not in ("Place", "Amenity"):
+            return
+        with self._lock:
+            if not self._built:
+                return
+            if entity == "Place":
+                self._refresh(event["id"])
+            elif event["op"] == "delete":
+                self._bit.pop(event["id"], None)
+                self._minhashes.pop(event["id"], None)
+                for place_id in list(self._amenity_places.pop(event["id"], ())):
+                    self._refresh(place_id)
+
+    def similar(self, place_id, k=None):
+        """
+        The places most similar to a place.
+
+        Returns:
+            list: (score, place id), most similar first, None for an unknown place
+        """
+        with self._lock:
+            if not self._built:
+                self._build()
+            if place_id not in self._similar:
+                return None
+            return self._similar[place_id][:k or self.k]
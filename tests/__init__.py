@@ -0,0 +1,14 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import atexit
+import os
+import shutil
+import tempfile
+
+# the SQLite files the workers share go to a folder of the test run, not next
+# to the data files of the deployment
+_shared = tempfile.mkdtemp(prefix="hbnb-tests-")
+atexit.register(shutil.rmtree, _shared, ignore_errors=True)
+os.environ.setdefault("HBNB_SESSIONS_SQLITE_PATH", os.path.join(_shared, "sessions.sqlite"))
+os.environ.setdefault("HBNB_EMAILS_SQLITE_PATH", os.path.join(_shared, "emails.sqlite"))
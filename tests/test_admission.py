@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from flask import Flask
+from services import admission
+
+class TestAdmission(unittest.TestCase):
+    """Test the rate limits and the load shedding
+    """
+
+    def make_app(self, **config):
+        app = Flask(__name__)
+        app.config.update(config)
+        self.admission = admission.init_app(app, enabled=True)
+        self.release = threading.Event()
+
+        @app.route('/cheap')
+        def cheap():
+            return "ok"
+
+        @app.route('/slow')
+        def slow():
+            self.release.wait(5)
+            return "done"
+
+        return app.test_client()
+
+    def test_token_buckets(self):
+        """ both stores admit the burst and then tell the client when to retry """
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        stores = (admission.MemoryStore(),
+                  admission.SqliteStore(os.path.join(tmp.name, "buckets.sqlite")))
+        for store in stores:
+            waits = [store.take("client:a", rate=1.0, burst=3.0, now=100.0) for _ in range(4)]
+            self.assertEqual(waits[:3], [0.0, 0.0, 0.0])
+            self.assertAlmostEqual(waits[3], 1.0)
+            self.assertEqual(store.take("client:a", rate=1.0, burst=3.0, now=101.0), 0.0)
+            self.assertEqual(store.take("client:b", rate=1.0, burst=3.0, now=100.0), 0.0)
+
+    def test_sqlite_buckets(self):
+        """ the sqlite store opens its file on first use and drops the full buckets """
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "buckets.sqlite")
+        store = admission.SqliteStore(path)
+        self.assertFalse(os.path.exists(path))
+
+        with patch.object(admission, "SQLITE_PRUNE_EVERY", 3):
+            store.take("client:a", rate=1.0, burst=3.0, now=100.0)
+            store.take("client:b", rate=1.0, burst=3.0, cost=2.0, now=100.0)
+            # a is full again at 101, b at 102
+            store.take("client:c", rate=1.0, burst=3.0, now=101.5)
+        keys = [k for k, in store._connect().execute("SELECT key FROM token_buckets")]
+        self.assertEqual(sorted(keys), ["client:b", "client:c"])
+
+        # a forked worker opens its own connection
+        conn = store._connect()
+        with patch.object(admission.os, "getpid", return_value=-1):
+            self.assertIsNot(store._connect(), conn)
+
+    def test_rate_limited(self):
+        """ a client over its rate gets 429 with Retry-After """
+        client = self.make_app(ADMISSION_CLIENT_RATE=0.5, ADMISSION_CLIENT_BURST=2)
+
+        statuses = [client.get('/cheap').status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(client.get('/cheap').headers["Retry-After"], "2")
+
+    def test_forwarded_for_ignored(self):
+        """ a made up X-Forwarded-For doesn't get the client a new bucket """
+        client = self.make_app(ADMISSION_CLIENT_RATE=0.5, ADMISSION_CLIENT_BURST=2)
+
+        statuses = [client.get('/cheap', headers={"X-Forwarded-For": f"10.0.0.{i}"}).status_code
+                    for i in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_load_shedding(self):
+        """ an expensive route over its concurrency and queue limits sheds with 503 """
+        client = self.make_app(ADMISSION_EXPENSIVE={"slow": 1}, ADMISSION_MAX_QUEUE=0)
+        results = []
+        worker = threading.Thread(target=lambda: results.append(client.get('/slow').status_code))
+        worker.start()
+        limit = self.admission.limits["slow"]
+        while limit.running == 0:
+            time.sleep(0.001)
+
+        response = client.get('/slow')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response.headers)
+        self.assertEqual(client.get('/cheap').status_code, 200)
+
+        self.release.set()
+        worker.join()
+        self.assertEqual(results, [200])
+        self.assertEqual(limit.running, 0)
+
+if __name__ == '__main__':
+    unittest.main()
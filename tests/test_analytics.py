@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from app import app
+from data import place_data, review_data
+from services.analytics import QueryExecutor
+
+class TestAnalytics(unittest.TestCase):
+    """Test the parallel scans of the places and the reviews
+    """
+
+    places = {f"p{i}": {"price_per_night": float(10 * i), "max_guests": i % 4,
+                        "city_id": f"c{i % 3}"} for i in range(1, 101)}
+    reviews = {f"r{i}": {"place_id": f"p{i % 10 + 1}", "rating": i % 5 + 1}
+               for i in range(200)}
+
+    def check(self, executor):
+        """ the answers of an executor over the class stores """
+        body = executor.places_query(max_price=300, min_guests=2, city_ids=["c1"], k=2)
+        matching = [k for k, v in self.places.items() if v["price_per_night"] <= 300
+                    and v["max_guests"] >= 2 and v["city_id"] == "c1"]
+        self.assertEqual(body["count"], len(matching))
+        self.assertEqual(body["cheapest"], matching[:2])
+
+        body = executor.reviews_query(k=1)
+        self.assertEqual(body["reviews"], 200)
+        self.assertEqual(body["average_rating"], 3.0)
+        self.assertEqual(body["top_places"][0]["reviews"], 20)
+
+    def test_in_process(self):
+        """ small tables are scanned in the calling thread """
+        self.check(QueryExecutor(self.places, self.reviews, workers=2, min_rows=1000))
+
+    def test_pool(self):
+        """ the chunks scanned by the pool give the same answers """
+        executor = QueryExecutor(self.places, self.reviews, workers=2, min_rows=0)
+        try:
+            self.check(executor)
+        finally:
+            executor.shutdown()
+
+    def test_endpoints(self):
+        """ the analytics endpoints """
+        client = app.test_client()
+        body = client.get('/api/v1/analytics/places').get_json()
+        self.assertEqual(body["count"], sum(1 for v in place_data.values()
+                                            if v.get('price_per_night') is not None))
+        body = client.get('/api/v1/analytics/reviews?k=1').get_json()
+        self.assertEqual(body["reviews"], len(review_data))
+        self.assertEqual(client.get('/api/v1/analytics/places?k=x').status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
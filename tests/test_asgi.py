@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import asgi
+from asgi import application
+from data.file_storage import append_json_row
+
+def call(method, path, body=b"", query=b"", sent=None):
+    """ run one request through the ASGI app and return (status, body) """
+    sent = [] if sent is None else sent
+    received = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return received.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": query,
+             "headers": [(b"content-type", b"application/json")]}
+    asyncio.run(application(scope, receive, send))
+    return sent[0]["status"], b"".join(m.get("body", b"") for m in sent[1:])
+
+class TestAsgi(unittest.TestCase):
+    """Test that the ASGI entry point serves the app routes
+    """
+
+    def test_hello_world(self):
+        """ Test the '/' endpoint """
+        self.assertEqual(call("GET", "/"), (200, b"Hello World"))
+
+    def test_post_body(self):
+        """ Request bodies reach the Flask handlers """
+        status, body = call("PUT", "/api/v1/reviews/missing", body=json.dumps({}).encode())
+        self.assertEqual(status, 404)
+        self.assertIn(b"Review not found", body)
+
+    def test_error_before_start(self):
+        """ an app failing before the response starts gives a single 500 """
+        def wsgi_app(environ, start_response):
+            raise RuntimeError("broken")
+        sent = []
+        with patch.object(asgi, "app", type("App", (), {"wsgi_app": staticmethod(wsgi_app)})):
+            self.assertEqual(call("GET", "/", sent=sent), (500, b""))
+        self.assertEqual([m["type"] for m in sent].count("http.response.start"), 1)
+
+    def test_error_after_start(self):
+        """ an app failing mid-body never gets a second response start """
+        def wsgi_app(environ, start_response):
+            start_response("200 OK", [("Content-Type", "text/plain")])
+            yield b"partial"
+            raise RuntimeError("broken")
+        sent = []
+        with patch.object(asgi, "app", type("App", (), {"wsgi_app": staticmethod(wsgi_app)})):
+            with self.assertRaises(RuntimeError):
+                call("GET", "/", sent=sent)
+        self.assertEqual([m["type"] for m in sent],
+                         ["http.response.start", "http.response.body"])
+
+    def test_concurrent_saves(self):
+        """ No row is lost when the handler threads save to the same file """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "review.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"Review": []}, f)
+            with ThreadPoolExecutor(16) as pool:
+                list(pool.map(lambda i: append_json_row(path, "Review", {"id": i}), range(200)))
+            with open(path, "r", encoding="utf-8") as f:
+                self.assertEqual(sorted(r["id"] for r in json.load(f)["Review"]),
+                                 list(range(200)))
+
+if __name__ == '__main__':
+    unittest.main()
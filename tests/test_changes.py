@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from app import app
+from data.indexes import ReviewsByPlace
+from services.changes import ChangeFeed, feed
+
+class TestChangeFeed(unittest.TestCase):
+    """Test that mutations are published to the change feed
+    """
+
+    def test_ring_buffer(self):
+        """ old events are dropped and asking for them is an error """
+        changes = ChangeFeed(capacity=3)
+        for i in range(5):
+            changes.publish("City", "update", str(i), {"id": str(i)})
+
+        self.assertEqual([e["seq"] for e in changes.since(2)], [3, 4, 5])
+        self.assertEqual([e["seq"] for e in changes.since(3, limit=1)], [4])
+        self.assertEqual(changes.since(5), [])
+        with self.assertRaises(LookupError):
+            changes.since(1)
+
+    def test_listeners(self):
+        """ listeners get the previous record, clients don't """
+        changes = ChangeFeed()
+        seen = []
+        changes.subscribe(seen.append)
+        changes.publish("City", "update", "1", {"name": "New"}, {"name": "Old"})
+
+        self.assertEqual(seen[0]["previous"], {"name": "Old"})
+        self.assertNotIn("previous", changes.since(0)[0])
+
+    def test_failed_listener(self):
+        """ an index that fails on an event is rebuilt, other failures are raised """
+        changes = ChangeFeed()
+        store = {"r1": {"id": "r1", "place_id": "p1", "rating": 4}}
+        index = ReviewsByPlace(store)
+        changes.subscribe(index.on_change)
+        self.assertEqual(index.rating("p1"), (1, 4))
+
+        # an event without the review data makes the listener fail
+        store["r2"] = {"id": "r2", "place_id": "p1", "rating": 2}
+        changes.publish("Review", "create", "r2", {"id": "r2"})
+        self.assertEqual(index.rating("p1"), (2, 6))
+
+        def broken(_event):
+            raise RuntimeError("broken")
+        changes.subscribe(broken)
+        with self.assertRaises(RuntimeError):
+            changes.publish("City", "update", "1", {"id": "1"})
+
+    def test_endpoint(self):
+        """ an update through the API shows up in /api/v1/changes """
+        client = app.test_client()
+        since = feed.seq
+
+        client.put('/api/v1/countries/CA', json={"name": "Kanada"})
+        client.put('/api/v1/countries/CA', json={"name": "Canada"})
+
+        response = client.get(f'/api/v1/changes?since={since}&timeout=0')
+        events = response.get_json()["events"]
+        self.assertEqual([(e["entity"], e["op"], e["data"]["name"]) for e in events],
+                         [("Country", "update", "Kanada"), ("Country", "update", "Canada")])
+        self.assertEqual(response.get_json()["last_seq"], since + 2)
+
+if __name__ == '__main__':
+    unittest.main()
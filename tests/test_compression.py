@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import gzip
+import unittest
+from flask import Flask, jsonify
+from services import compression
+
+class TestCompression(unittest.TestCase):
+    """Test that responses are compressed as negotiated
+    """
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config["COMPRESS_MIN_SIZE"] = 100
+        self.cache = compression.init_app(self.app)
+
+        @self.app.route('/big')
+        def big():
+            return jsonify([{"name": "place", "price": i} for i in range(200)])
+
+        @self.app.route('/small')
+        def small():
+            return jsonify({"name": "place"})
+
+        self.client = self.app.test_client()
+
+    def test_negotiate(self):
+        """ the preferred encoding accepted by the client is used """
+        self.assertEqual(compression.negotiate("gzip, deflate"), "gzip")
+        self.assertEqual(compression.negotiate("gzip;q=0"), None)
+        self.assertEqual(compression.negotiate("*"), next(iter(compression.CODECS)))
+        self.assertEqual(compression.negotiate(""), None)
+
+    def test_negotiate_quality(self):
+        """ the client's q-values rank first, the server order breaks ties """
+        codecs = dict.fromkeys(("br", "zstd", "gzip"))
+        self.assertEqual(compression.negotiate("gzip;q=1, br;q=0.1", codecs), "gzip")
+        self.assertEqual(compression.negotiate("gzip;q=0.5, zstd;q=0.5", codecs), "zstd")
+        self.assertEqual(compression.negotiate("br;q=0.2, *;q=0.8", codecs), "zstd")
+        self.assertEqual(compression.negotiate("gzip, br", codecs), "br")
+
+    def test_compressed_once(self):
+        """ a repeated listing is compressed once and served from the cache """
+        for _ in range(3):
+            response = self.client.get('/big', headers={"Accept-Encoding": "gzip"})
+            self.assertEqual(response.headers["Content-Encoding"], "gzip")
+            self.assertIn(b'"price":199', gzip.decompress(response.get_data()))
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 2))
+
+    def test_partial_levels(self):
+        """ levels set for some encodings keep the defaults for the others """
+        self.app.config["COMPRESS_LEVELS"] = {"br": 9}
+        response = self.client.get('/big', headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'"price":199', gzip.decompress(response.get_data()))
+
+    def test_threshold(self):
+        """ small bodies and clients without Accept-Encoding get plain bodies """
+        response = self.client.get('/small', headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", response.headers)
+        response = self.client.get('/big')
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+
+if __name__ == '__main__':
+    unittest.main()
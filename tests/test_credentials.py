@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from concurrent.futures import Future
+from unittest.mock import patch
+from app import app
+from data import user_data
+from models.user import User
+from services import credentials
+from services.credentials import CredentialService, CredentialsBusy
+
+class TestCredentials(unittest.TestCase):
+    """Test the password hashing and the login
+    """
+
+    def setUp(self):
+        # the signups must not append to the tracked data/user.json
+        patcher = patch.object(User, "save", return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hashes(self):
+        """ hashes are salted and outdated ones are upgraded """
+        params = ("scrypt", 2 ** 10, 8, 1)
+        stored = credentials.make_hash("secret", params)
+        self.assertTrue(stored.startswith("scrypt$1024$8$1$"))
+        self.assertNotEqual(stored, credentials.make_hash("secret", params))
+        self.assertTrue(credentials.check_hash("secret", stored))
+        self.assertFalse(credentials.check_hash("Secret", stored))
+
+        self.assertEqual(credentials.verify_and_upgrade("secret", stored, params), (True, None))
+        ok, new_hash = credentials.verify_and_upgrade("secret", stored, ("pbkdf2_sha256", 1000))
+        self.assertTrue(ok)
+        self.assertTrue(new_hash.startswith("pbkdf2_sha256$1000$"))
+        ok, new_hash = credentials.verify_and_upgrade("1234", "1234", params)
+        self.assertTrue(ok and new_hash.startswith("scrypt$"))
+
+    def test_bounded_queue(self):
+        """ work past the queue limit is refused """
+        service = CredentialService(workers=0, max_pending=0)
+        with self.assertRaises(CredentialsBusy):
+            service.hash_password("secret")
+
+    def test_timeout(self):
+        """ a hash that takes too long is a busy service, not an error """
+        service = CredentialService(workers=1, timeout=0.01)
+        with patch.object(service, "_pool") as pool:
+            pool.return_value.submit.return_value = Future()
+            with self.assertRaises(CredentialsBusy):
+                service.verify("secret", "secret")
+
+        with patch.object(credentials.credentials, "verify", side_effect=CredentialsBusy("slow")):
+            response = app.test_client().post('/api/v1/auth/login', json={
+                "email": next(iter(user_data.values()))["email"], "password": "x"})
+        self.assertEqual(response.status_code, 503)
+
+    def test_unknown_email(self):
+        """ a login with an unknown email still checks a hash """
+        service = credentials.credentials
+        with patch.object(service, "_run", wraps=service._run) as run:
+            response = app.test_client().post('/api/v1/auth/login', json={
+                "email": "nobody@nowhere.com", "password": "secret"})
+        self.assertEqual(response.status_code, 401)
+        run.assert_called_once()
+        self.assertIs(run.call_args[0][0], credentials.verify_and_upgrade)
+
+    def test_login(self):
+        """ signup stores a hash, login checks it and never returns it """
+        client = app.test_client()
+        user = client.post('/api/v1/users', json={
+            "first_name": "Diana", "last_name": "Prince",
+            "email": "diana@themyscira.com", "password": "lasso123"}).get_json()
+        try:
+            self.assertTrue(user_data[user["id"]]["password"].startswith("scrypt$"))
+
+            response = client.post('/api/v1/auth/login', json={
+                "email": "diana@themyscira.com", "password": "lasso123"})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("password", response.get_json()["user"])
+            self.assertEqual(client.post('/api/v1/auth/login', json={
+                "email": "diana@themyscira.com", "password": "lasso"}).status_code, 401)
+            self.assertNotIn("password", client.get('/api/v1/users').get_json()[0])
+        finally:
+            client.delete(f'/api/v1/users/{user["id"]}')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from app import app
+from data import country_data, city_data
+from data.hierarchy import GeoHierarchy
+from data.indexes import ReviewsByPlace
+from services.changes import ChangeFeed
+
+class TestGeoHierarchy(unittest.TestCase):
+    """Test the country summaries
+    """
+
+    def test_totals(self):
+        """ the totals follow the moves of the cities and the places """
+        countries = {"au": {"id": "au", "code": "AU"}, "nz": {"id": "nz", "code": "NZ"}}
+        cities = {"c1": {"id": "c1", "country_id": "au"}, "c2": {"id": "c2", "country_id": "au"}}
+        places = {"p1": {"id": "p1", "city_id": "c1", "price_per_night": 100.0},
+                  "p2": {"id": "p2", "city_id": "c2", "price_per_night": 50.0}}
+        reviews = {"r1": {"id": "r1", "place_id": "p1", "rating": 4}}
+        changes = ChangeFeed()
+        by_place = ReviewsByPlace(reviews)
+        tree = GeoHierarchy(countries, cities, places, by_place)
+        changes.subscribe(by_place.on_change)
+        changes.subscribe(tree.on_change)
+
+        summary = tree.summary(tree.country_id("AU"))
+        self.assertEqual((summary["city_count"], summary["places"], summary["reviews"]), (2, 2, 1))
+        self.assertEqual(summary["average_price"], 75.0)
+
+        previous = cities["c2"]
+        cities["c2"] = dict(previous, country_id="nz")
+        changes.publish("City", "update", "c2", cities["c2"], previous)
+        self.assertEqual(tree.summary("au")["places"], 1)
+        self.assertEqual(tree.summary("nz")["cities"], {
+            "c2": {"places": 1, "average_price": 50.0, "reviews": 0}})
+
+        previous = places["p1"]
+        places["p1"] = dict(previous, city_id="c2")
+        changes.publish("Place", "update", "p1", places["p1"], previous)
+        reviews["r2"] = {"id": "r2", "place_id": "p1", "rating": 5}
+        changes.publish("Review", "create", "r2", reviews["r2"])
+        self.assertEqual(tree.summary("au")["places"], 0)
+        self.assertEqual(tree.summary("nz")["reviews"], 2)
+
+        previous = places.pop("p2")
+        changes.publish("Place", "delete", "p2", previous=previous)
+        self.assertEqual(tree.summary("nz")["average_price"], 100.0)
+
+    def test_endpoint(self):
+        """ the summary of a country """
+        client = app.test_client()
+        country = next(iter(country_data.values()))
+        body = client.get(f'/api/v1/countries/{country["code"]}/summary').get_json()
+        self.assertEqual(body["id"], country["id"])
+        self.assertEqual(body["city_count"], len(body["cities"]))
+        self.assertEqual(body["places"], sum(c["places"] for c in body["cities"]))
+        self.assertEqual(client.get('/api/v1/countries/XX/summary').status_code, 404)
+
+    def test_cities_order(self):
+        """ the cities of a country come in the order of the store """
+        cities = {k: {"id": k, "country_id": "au"} for k in ("sydney", "melbourne", "perth")}
+        tree = GeoHierarchy({"au": {"id": "au", "code": "AU"}}, cities, {}, ReviewsByPlace({}))
+        self.assertEqual(tree.city_ids("au"), ["sydney", "melbourne", "perth"])
+
+        client = app.test_client()
+        for country in country_data.values():
+            expected = [v['id'] for v in city_data.values() if v['country_id'] == country['id']]
+            body = client.get(f'/api/v1/countries/{country["code"]}/cities').get_json()
+            self.assertEqual([c["id"] for c in body], expected)
+
+if __name__ == '__main__':
+    unittest.main()
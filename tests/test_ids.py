@@ -0,0 +1,43 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import time
+import unittest
+import uuid
+from unittest.mock import patch
+from data import ids
+
+class TestIds(unittest.TestCase):
+    """Test the UUIDv7 ids of the models
+    """
+
+    def test_format(self):
+        """ version 7, RFC 4122 variant, the creation time in the first 48 bits """
+        before = time.time_ns() // 1000000
+        value = ids.new_id()
+        after = time.time_ns() // 1000000
+
+        parsed = uuid.UUID(value)
+        self.assertEqual(str(parsed), value)
+        self.assertEqual(parsed.version, 7)
+        self.assertEqual(parsed.variant, uuid.RFC_4122)
+        self.assertTrue(before <= parsed.int >> 80 <= after + 1)
+
+    def test_same_millisecond_order(self):
+        """ ids created in the same millisecond still sort in creation order """
+        later_ms = time.time_ns() // 1000000 + 1000
+        with patch.object(ids, "_last_ms", ids._last_ms), \
+                patch.object(ids, "_counter", ids._counter), \
+                patch.object(ids.time, "time_ns", return_value=later_ms * 1000000):
+            created = [ids.new_id() for _ in range(100)]
+        self.assertEqual({uuid.UUID(v).int >> 80 for v in created}, {later_ms})
+        self.assertEqual(sorted(created), created)
+        self.assertEqual(len(set(created)), len(created))
+
+    def test_order(self):
+        """ later ids sort after earlier ones """
+        created = [ids.new_id() for _ in range(1000)]
+        self.assertEqual(sorted(created), created)
+
+if __name__ == '__main__':
+    unittest.main()
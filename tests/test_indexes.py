@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from app import app
+from data.indexes import UpdatedAtIndex, EmailIndex, SqliteEmailClaims
+from models.user import User
+from services.changes import ChangeFeed
+
+class TestUpdatedAtIndex(unittest.TestCase):
+    """Test the updated_at index and the ?updated_since= delta syncs
+    """
+
+    def test_index(self):
+        """ changes and deletes after a timestamp """
+        store = {"a": {"id": "a", "updated_at": 1.0}, "b": {"id": "b", "updated_at": 2.0}}
+        changes = ChangeFeed()
+        index = UpdatedAtIndex("City", store, max_tombstones=2)
+        changes.subscribe(index.on_change)
+
+        self.assertEqual(index.updated_since(1.0), ["b"])
+        store["a"] = {"id": "a", "updated_at": 3.0}
+        changes.publish("City", "update", "a", store["a"])
+        self.assertEqual(index.updated_since(1.5), ["b", "a"])
+
+        for key in ("a", "b"):
+            del store[key]
+            changes.publish("City", "delete", key)
+        self.assertEqual(index.updated_since(0), [])
+        started = index.horizon
+        self.assertEqual([k for _, k in index.deleted_since(started)], ["a", "b"])
+        # the deletes made before the index existed are unknown
+        with self.assertRaises(LookupError):
+            index.deleted_since(started - 1)
+
+        store["c"] = {"id": "c", "updated_at": 4.0}
+        changes.publish("City", "create", "c", store["c"])
+        changes.publish("City", "delete", "c")
+        with self.assertRaises(LookupError):
+            index.deleted_since(started)
+
+    def test_endpoint(self):
+        """ only what changed after updated_since is returned """
+        client = app.test_client()
+        since = time.time()
+
+        client.put('/api/v1/countries/CA', json={"name": "Canada"})
+
+        body = client.get(f'/api/v1/countries?updated_since={since}').get_json()
+        self.assertEqual([c["code"] for c in body["data"]], ["CA"])
+        self.assertGreater(body["watermark"], since)
+
+        body = client.get(f'/api/v1/countries?updated_since={body["watermark"]}').get_json()
+        self.assertEqual(body["data"], [])
+        self.assertEqual(client.get('/api/v1/countries?updated_since=x').status_code, 400)
+
+        # a client older than the process has to resync in full
+        self.assertEqual(client.get('/api/v1/countries?updated_since=0').status_code, 410)
+
+    def test_full_listing_watermark(self):
+        """ the watermark of a full listing is accepted as updated_since """
+        client = app.test_client()
+        response = client.get('/api/v1/countries')
+        watermark = float(response.headers["X-Watermark"])
+        self.assertTrue(response.get_json())
+
+        response = client.get(f'/api/v1/countries?updated_since={watermark}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["data"], [])
+        self.assertEqual(float(response.headers["X-Watermark"]), watermark)
+
+    def test_email_index(self):
+        """ emails are unique whatever their case """
+        store = {"u1": {"id": "u1", "email": "Bruce@Wayne.com"}}
+        changes = ChangeFeed()
+        index = EmailIndex(store)
+        changes.subscribe(index.on_change)
+
+        self.assertEqual(index.get(" bruce@wayne.com"), "u1")
+        self.assertIsNone(index.reserve("BRUCE@wayne.com"))
+        reservation = index.reserve("clark@kent.com")
+        self.assertIsNotNone(reservation)
+        self.assertIsNone(index.reserve("Clark@Kent.com"))
+        self.assertIsNone(index.get("clark@kent.com"))
+        index.release("clark@kent.com", reservation)
+        self.assertIsNotNone(index.reserve("clark@kent.com"))
+
+        previous = store.pop("u1")
+        changes.publish("User", "delete", "u1", previous=previous)
+        self.assertIsNone(index.get("bruce@wayne.com"))
+
+    def test_email_claims(self):
+        """ two workers sharing the claims can't accept the same email """
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "emails.sqlite")
+        workers = [EmailIndex({}, claims=SqliteEmailClaims(path)) for _ in range(2)]
+
+        reservation = workers[0].reserve("Hal@Oa.com")
+        self.assertIsNotNone(reservation)
+        self.assertIsNone(workers[1].reserve("hal@oa.com"))
+        workers[0].release("hal@oa.com", reservation)
+        self.assertIsNotNone(workers[1].reserve("hal@oa.com"))
+
+        # a deleted user frees the email for every worker
+        workers[1].on_change({"entity": "User", "op": "delete", "id": "u1", "data": None,
+                              "previous": {"id": "u1", "email": "hal@oa.com"}})
+        self.assertTrue(workers[0].claims.claim("hal@oa.com"))
+
+        # at startup the claims are rebuilt from the users, a stale claim goes
+        claims = workers[0].claims
+        claims.rebuild(["Kyle@Oa.com"])
+        self.assertTrue(claims.claim("hal@oa.com"))
+        self.assertFalse(claims.claim("kyle@oa.com"))
+
+    @patch.object(User, "save", return_value=True)
+    def test_signup_email_taken(self, _save):
+        """ a second signup with the same email is a conflict """
+        client = app.test_client()
+        body = {"first_name": "Barry", "last_name": "Allen", "password": "speedforce"}
+        user = client.post('/api/v1/users', json=dict(body, email="barry@ccpd.com")).get_json()
+        try:
+            response = client.post('/api/v1/users', json=dict(body, email="Barry@CCPD.com"))
+            self.assertEqual(response.status_code, 409)
+            found = client.get('/api/v1/users?email=BARRY@ccpd.com').get_json()
+            self.assertEqual([u["id"] for u in found], [user["id"]])
+        finally:
+            client.delete(f'/api/v1/users/{user["id"]}')
+        self.assertEqual(client.get('/api/v1/users?email=barry@ccpd.com').get_json(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import json
+import unittest
+from datetime import datetime
+from flask import Flask
+from services.json_provider import HBnBJSONProvider, Timestamp
+
+class TestJSONProvider(unittest.TestCase):
+    """Test that the JSON provider matches Flask's output
+    """
+
+    def setUp(self):
+        self.default_app = Flask(__name__)
+        self.app = Flask(__name__)
+        self.app.json = HBnBJSONProvider(self.app)
+
+    def test_timestamp_format(self):
+        """ Timestamps are written like Flask wrote datetime.fromtimestamp """
+        for ts in (1715563526.942737, 0.0, 1700000000.5, 1735689599.999):
+            expected = self.default_app.json.dumps({"t": datetime.fromtimestamp(ts)})
+            self.assertEqual(json.loads(self.app.json.dumps({"t": Timestamp(ts)})),
+                             json.loads(expected))
+
+    def test_response(self):
+        """ jsonify output decodes to the same data with sorted keys """
+        with self.app.app_context():
+            body = self.app.json.response({"b": 1, "a": [1.5, "x"]}).get_data(as_text=True)
+        self.assertEqual(body, '{"a":[1.5,"x"],"b":1}\n')
+
+    def test_to_dict(self):
+        """ Objects with to_dict() are serialised through it """
+        class Thing():
+            def to_dict(self):
+                return {"id": "1"}
+        self.assertEqual(json.loads(self.app.json.dumps([Thing()])), [{"id": "1"}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from data.keys import BloomFilter, KeyChecker
+from services.changes import ChangeFeed
+
+class TestKeyChecker(unittest.TestCase):
+    """Test the foreign key existence checks
+    """
+
+    def test_bloom_filter(self):
+        """ no false negatives and few false positives """
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"id-{i}")
+
+        self.assertTrue(all(f"id-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_checker(self):
+        """ answers follow the store through the change events """
+        store = {"a": {}, "b": {}}
+        changes = ChangeFeed()
+        checker = KeyChecker("Country", store)
+        changes.subscribe(checker.on_change)
+
+        self.assertIn("a", checker)
+        self.assertIn("a", checker)
+        self.assertNotIn("zzz", checker)
+        self.assertEqual(checker.cache_hits, 1)
+
+        store["c"] = {}
+        changes.publish("Country", "create", "c", {})
+        self.assertIn("c", checker)
+        del store["a"]
+        changes.publish("Country", "delete", "a")
+        self.assertNotIn("a", checker)
+
+        # ids added without an event are still found
+        store["d"] = {}
+        self.assertIn("d", checker)
+
+if __name__ == '__main__':
+    unittest.main()
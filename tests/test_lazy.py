@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import os
+import threading
+import unittest
+from unittest.mock import patch
+from app import app
+from data.lazy import LazyStore, LoadedStore, timings
+
+class TestLazyStore(unittest.TestCase):
+    """Test the stores loaded on first access
+    """
+
+    def test_load_once(self):
+        """ the loader runs on first access only, then the store is a plain dict """
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return {"a": 1}
+
+        store = LazyStore("letters", loader)
+        self.assertFalse(store.loaded)
+        self.assertEqual(calls, [])
+
+        threads = [threading.Thread(target=lambda: store.get("a")) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(calls, [1])
+        self.assertIs(type(store), LoadedStore)
+        self.assertIsInstance(store, dict)
+        self.assertEqual(dict(store), {"a": 1})
+        self.assertIn("load letters", timings)
+
+    def test_first_access(self):
+        """ any access loads, clear() doesn't need to """
+        for access in (len, list, lambda s: "a" in s, lambda s: s.setdefault("b", 2),
+                       lambda s: s.update(b=2), lambda s: s.pop("a")):
+            store = LazyStore("letters", lambda: {"a": 1})
+            access(store)
+            self.assertTrue(store.loaded)
+
+        store = LazyStore("letters", lambda: self.fail("loaded to be cleared"))
+        store.clear()
+        store["b"] = 2
+        self.assertEqual(store, {"b": 2})
+
+    def test_endpoint(self):
+        """ the startup timings of the worker """
+        with patch.dict(os.environ, {"HBNB_ADMIN_KEY": "admin"}):
+            body = app.test_client().get('/api/v1/admin/startup',
+                                         headers={"X-Admin-Key": "admin"}).get_json()
+        self.assertIn("import app", body["timings"])
+        self.assertIn("place", body["loaded"])
+
+if __name__ == '__main__':
+    unittest.main()
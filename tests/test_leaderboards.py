@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from app import app
+from data import place_data, city_data, country_data
+from data.indexes import ReviewsByPlace
+from data.leaderboards import Leaderboards
+from services.changes import ChangeFeed
+
+class TestLeaderboards(unittest.TestCase):
+    """Test the top places of the cities and the countries
+    """
+
+    def test_boards(self):
+        """ the boards follow the places, the reviews and the cities """
+        cities = {"c1": {"id": "c1", "country_id": "AU"}, "c2": {"id": "c2", "country_id": "US"}}
+        places = {"p1": {"id": "p1", "city_id": "c1", "price_per_night": 100.0},
+                  "p2": {"id": "p2", "city_id": "c1", "price_per_night": 50.0},
+                  "p3": {"id": "p3", "city_id": "c2", "price_per_night": 70.0}}
+        reviews = {"r1": {"id": "r1", "place_id": "p1", "rating": 5}}
+        changes = ChangeFeed()
+        by_place = ReviewsByPlace(reviews)
+        boards = Leaderboards(places, cities, by_place)
+        changes.subscribe(by_place.on_change)
+        changes.subscribe(boards.on_change)
+
+        self.assertEqual(boards.top("city", "c1", "price"), ["p2", "p1"])
+        self.assertEqual(boards.top("city", "c1", "rating"), ["p1", "p2"])
+        self.assertEqual(boards.top("country", "AU", "reviews", 1), ["p1"])
+
+        for i, rating in enumerate((5, 5)):
+            reviews[f"n{i}"] = {"id": f"n{i}", "place_id": "p2", "rating": rating}
+            changes.publish("Review", "create", f"n{i}", reviews[f"n{i}"])
+        self.assertEqual(boards.top("city", "c1", "reviews"), ["p2", "p1"])
+        self.assertEqual(boards.top("city", "c1", "rating"), ["p2", "p1"])
+
+        previous = places["p2"]
+        places["p2"] = dict(previous, price_per_night=500.0)
+        changes.publish("Place", "update", "p2", places["p2"], previous)
+        self.assertEqual(boards.top("city", "c1", "price"), ["p1", "p2"])
+
+        previous = cities["c2"]
+        cities["c2"] = dict(previous, country_id="AU")
+        changes.publish("City", "update", "c2", cities["c2"], previous)
+        self.assertEqual(boards.top("country", "AU", "price"), ["p3", "p1", "p2"])
+        self.assertEqual(boards.top("country", "US", "price"), [])
+
+    def test_endpoints(self):
+        """ the leaderboards of a city and of a country """
+        client = app.test_client()
+        place = next(v for v in place_data.values() if v.get('city_id') in city_data)
+        city = city_data[place['city_id']]
+
+        rows = client.get(f'/api/v1/cities/{city["id"]}/top?by=price').get_json()
+        self.assertIn(place['id'], [row["id"] for row in rows])
+        prices = [row["price_per_night"] for row in rows]
+        self.assertEqual(prices, sorted(prices))
+        rows = client.get(f'/api/v1/cities/{city["id"]}/top?limit=1&expand=rating').get_json()
+        self.assertEqual(len(rows), 1)
+        self.assertIn("rating", rows[0])
+
+        code = next(iter(country_data.values()))['code']
+        self.assertEqual(client.get(f'/api/v1/countries/{code}/top').status_code, 200)
+        self.assertEqual(client.get('/api/v1/countries/XX/top').status_code, 404)
+
+        self.assertEqual(client.get(f'/api/v1/cities/{city["id"]}/top?by=name').status_code, 400)
+        self.assertEqual(client.get('/api/v1/cities/nowhere/top').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from app import app
+from data import amenity_data, review_data
+
+class TestMultiGet(unittest.TestCase):
+    """Test fetching a list of ids in one request
+    """
+
+    def test_ids(self):
+        """ rows come in the order of the ids and missing ids are reported """
+        client = app.test_client()
+        first, second = list(amenity_data)[:2]
+
+        body = client.get(f'/api/v1/amenities?ids={second},nope,{first},{second}').get_json()
+        self.assertEqual([a["id"] for a in body["data"]], [second, first])
+        self.assertEqual(body["missing"], ["nope"])
+
+    def test_lookup(self):
+        """ the POST form takes the ids in the body """
+        client = app.test_client()
+        ids = list(review_data)
+
+        body = client.post('/api/v1/reviews/lookup', json={"ids": ids[::-1]}).get_json()
+        self.assertEqual([r["id"] for r in body["data"]], ids[::-1])
+        self.assertEqual(client.post('/api/v1/reviews/lookup', json={"ids": "x"}).status_code, 400)
+        self.assertEqual(client.post('/api/v1/owners/lookup', json={"ids": []}).status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from app import app, partitions
+from data import place_data
+from data.partitions import PartitionRouter, count_records
+from services.changes import ChangeFeed
+
+class TestPartitions(unittest.TestCase):
+    """Test the partitions of the cities, places and reviews by country
+    """
+
+    def test_router(self):
+        """ records follow their country and the listings gather every partition """
+        cities = {"c1": {"id": "c1", "country_id": "au", "updated_at": 1.0},
+                  "c2": {"id": "c2", "country_id": "nz", "updated_at": 1.0}}
+        places = {"p1": {"id": "p1", "city_id": "c1", "updated_at": 1.0},
+                  "p2": {"id": "p2", "city_id": "c2", "updated_at": 1.0}}
+        reviews = {"r1": {"id": "r1", "place_id": "p1", "updated_at": 1.0}}
+        changes = ChangeFeed()
+        with tempfile.TemporaryDirectory() as directory:
+            router = PartitionRouter(cities, places, reviews, directory=directory,
+                                     flush_delay=60)
+            changes.subscribe(router.on_change)
+
+            self.assertEqual(router.route("Review", "r1").key, "au")
+            self.assertEqual(router.partition("nz").counts(), {"City": 1, "Place": 1, "Review": 0})
+
+            previous = cities["c1"]
+            cities["c1"] = dict(previous, country_id="nz", updated_at=2.0)
+            changes.publish("City", "update", "c1", cities["c1"], previous)
+            self.assertEqual(router.route("Review", "r1").key, "nz")
+            self.assertEqual(router.partition("au").counts(), {"City": 0, "Place": 0, "Review": 0})
+            self.assertEqual(router.partition("au").updates["Place"].updated_since(0), [])
+            self.assertEqual(router.partition("nz").updates["City"].updated_since(1.5), ["c1"])
+
+            # the files are written in batches, not by the change itself
+            self.assertFalse(os.path.exists(os.path.join(directory, "nz", "place.json")))
+            router.flush()
+            with open(os.path.join(directory, "nz", "place.json"), encoding="utf-8") as f:
+                self.assertEqual(sorted(p["id"] for p in json.load(f)["Place"]), ["p1", "p2"])
+
+            with ThreadPoolExecutor(1) as pool:
+                router.assign("nz", pool)
+                ids = router.scatter_gather(lambda p: list(p.records["Place"]))
+                reviews = router.scatter_gather(lambda p: len(p.records["Review"]), sum)
+            self.assertEqual(sorted(ids), ["p1", "p2"])
+            self.assertEqual(reviews, 1)
+
+            # a process pool gets a pickled copy of the partition
+            with ProcessPoolExecutor(1) as pool:
+                router.assign("nz", pool)
+                counts = router.scatter_gather(count_records)
+            self.assertIn({"key": "nz", "City": 2, "Place": 2, "Review": 1}, counts)
+
+    def test_endpoints(self):
+        """ the places of one country come from its partition """
+        client = app.test_client()
+        with patch.dict(os.environ, {"HBNB_ADMIN_KEY": "admin"}):
+            counts = client.get('/api/v1/admin/partitions',
+                                headers={"X-Admin-Key": "admin"}).get_json()
+        self.assertEqual(sum(p["Place"] for p in counts), len(place_data))
+        self.assertEqual(client.get('/api/v1/places?country=XX').get_json(), [])
+        self.assertEqual(len(partitions.keys()), len(counts))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from app import app, place_views
+from data import place_data, amenity_data, place_to_amenity_data
+from data.indexes import ReviewsByPlace
+from services.place_views import PlaceViews
+
+class TestPlaceViews(unittest.TestCase):
+    """Test the ?expand= option of the place endpoints
+    """
+
+    def test_expand(self):
+        """ the embedded records follow the changes of the referenced records """
+        client = app.test_client()
+        place_id = next(k for k, v in place_data.items() if place_to_amenity_data.get(k))
+        amenity_id = place_to_amenity_data[place_id][0]
+        name = amenity_data[amenity_id]['name']
+
+        row = client.get(f'/api/v1/places/{place_id}?expand=host,amenities,rating').get_json()[0]
+        self.assertEqual(row["host"]["id"], place_data[place_id]["host_user_id"])
+        self.assertIn(name, [a["name"] for a in row["amenities"]])
+        self.assertNotIn("city", row)
+
+        client.put(f'/api/v1/amenities/{amenity_id}', json={"name": name + "x"})
+        try:
+            row = client.get(f'/api/v1/places/{place_id}?expand=amenities').get_json()[0]
+            self.assertIn(name + "x", [a["name"] for a in row["amenities"]])
+        finally:
+            client.put(f'/api/v1/amenities/{amenity_id}', json={"name": name})
+        self.assertGreater(place_views.misses, 1)
+
+    def test_eviction(self):
+        """ an evicted place is no longer listed as a dependent """
+        places = {"p1": {"city_id": "c1", "host_user_id": "u1"},
+                  "p2": {"city_id": "c2", "host_user_id": "u1"}}
+        cities = {k: {"id": k, "name": k, "country_id": "FR",
+                      "created_at": 1.0, "updated_at": 1.0} for k in ("c1", "c2")}
+        views = PlaceViews(places, cities, {}, {}, {}, {}, ReviewsByPlace({}), max_views=1)
+
+        views.get("p1")
+        views.get("p2")
+        self.assertEqual(list(views._views), ["p2"])
+        self.assertEqual(views._dependents, {"c2": {"p2"}, "u1": {"p2"}, "FR": {"p2"}})
+
+        views.on_change({"entity": "City", "op": "update", "id": "c2", "data": cities["c2"]})
+        self.assertEqual(views._dependents, {})
+
+    def test_unknown_expand(self):
+        """ an unknown expansion is a bad request """
+        client = app.test_client()
+        self.assertEqual(client.get('/api/v1/places?expand=owner').status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
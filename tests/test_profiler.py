@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from flask import Flask
+from services import profiler
+
+class TestProfiler(unittest.TestCase):
+    """Test that the opt-in profiling works as expected
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        os.environ["HBNB_PROFILE_DIR"] = self.tmp.name
+
+        self.app = Flask(__name__)
+
+        @self.app.route('/slow')
+        def slow():
+            time.sleep(0.01)
+            return "done"
+
+    def tearDown(self):
+        del os.environ["HBNB_PROFILE_DIR"]
+        self.tmp.cleanup()
+
+    def test_disabled_registers_nothing(self):
+        """ Nothing is hooked into the app when profiling is off """
+        self.assertFalse(profiler.init_app(self.app, enabled=False))
+        self.assertEqual(self.app.before_request_funcs, {})
+        response = self.app.test_client().get('/slow?profile=1')
+        self.assertEqual(response.get_data(as_text=True), "done")
+
+    def test_request_profile(self):
+        """ ?profile=1 returns the pstats report instead of the body """
+        profiler.init_app(self.app, enabled=True)
+        client = self.app.test_client()
+
+        self.assertEqual(client.get('/slow').get_data(as_text=True), "done")
+
+        response = client.get('/slow', headers={"X-Profile": "1"})
+        self.assertEqual(response.headers["X-Profiled-Status"], "200")
+        self.assertIn("function calls", response.get_data(as_text=True))
+
+    def test_request_profile_sort(self):
+        """ ?sort= takes the pstats sort keys, anything else is a 400 """
+        profiler.init_app(self.app, enabled=True)
+        client = self.app.test_client()
+
+        for key in ("time", "tottime", "cumtime"):
+            response = client.get(f'/slow?profile=1&sort={key}')
+            self.assertIn("function calls", response.get_data(as_text=True))
+
+        response = client.get('/slow?profile=1&sort=nope')
+        self.assertEqual(response.status_code, 400)
+
+    def test_sampling_endpoint(self):
+        """ the admin endpoint returns folded stacks from this worker """
+        profiler.init_app(self.app, enabled=True)
+        with patch.dict(os.environ, {"HBNB_ADMIN_KEY": "admin"}):
+            response = self.app.test_client().get('/api/v1/admin/profile?seconds=0.2',
+                                                  headers={"X-Admin-Key": "admin"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-Profiled-Workers"], "1")
+        stacks = profiler.parse_folded(response.get_data(as_text=True))
+        self.assertTrue(all(count > 0 for count in stacks.values()))
+
+if __name__ == '__main__':
+    unittest.main()
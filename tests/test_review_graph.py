@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import os
+import unittest
+from unittest.mock import patch
+from app import app
+from data import place_data, review_data
+from data import review_graph as graph_module
+from data.review_graph import ReviewGraph
+from services.changes import ChangeFeed
+
+class TestReviewGraph(unittest.TestCase):
+    """Test the users <-> places graph of the reviews
+    """
+
+    def test_graph(self):
+        """ queries over the arrays and the pending changes """
+        reviews = {f"r{i}": {"id": f"r{i}", "commentor_user_id": u, "place_id": p}
+                   for i, (u, p) in enumerate([("ann", "x"), ("ann", "y"), ("bob", "x"),
+                                               ("bob", "y"), ("bob", "z"), ("cat", "z")])}
+        changes = ChangeFeed()
+        graph = ReviewGraph(reviews)
+        changes.subscribe(graph.on_change)
+
+        self.assertEqual(graph.also_reviewed("x"), [("y", 2), ("z", 1)])
+        self.assertEqual(graph.top_reviewers(1), [("bob", 3, 3)])
+        self.assertEqual(sorted(graph.reviewers("z")), ["bob", "cat"])
+
+        previous = reviews.pop("r3")
+        changes.publish("Review", "delete", "r3", previous=previous)
+        reviews["r6"] = {"id": "r6", "commentor_user_id": "dan", "place_id": "x"}
+        changes.publish("Review", "create", "r6", reviews["r6"])
+        self.assertEqual(graph.also_reviewed("x"), [("y", 1), ("z", 1)])
+        self.assertEqual(sorted(graph.reviewers("x")), ["ann", "bob", "dan"])
+        self.assertEqual(graph.reviewed_places("bob"), ["x", "z"])
+
+        graph._compact()
+        self.assertEqual(graph.stats()["reviews"], 6)
+        self.assertEqual(graph.also_reviewed("x"), [("y", 1), ("z", 1)])
+        self.assertEqual(graph.reviewed_places("bob"), ["x", "z"])
+
+    def test_ties(self):
+        """ equal counts are ordered by id, not by the order the nodes were made """
+        reviews = {f"r{i}": {"id": f"r{i}", "commentor_user_id": u, "place_id": p}
+                   for i, (u, p) in enumerate([("amy", "x"), ("zed", "w"), ("amy", "b"),
+                                               ("zed", "x")])}
+        graph = ReviewGraph(reviews)
+        self.assertEqual(graph.also_reviewed("x", 1), [("b", 1)])
+        self.assertEqual(graph.top_reviewers(1), [("amy", 2, 2)])
+        self.assertEqual(graph.top_reviewers(5), [("amy", 2, 2), ("zed", 2, 2)])
+
+    def test_compaction(self):
+        """ enough changes fold the deltas into the arrays """
+        reviews = {}
+        changes = ChangeFeed()
+        graph = ReviewGraph(reviews)
+        changes.subscribe(graph.on_change)
+        graph.stats()
+        minimum, graph_module.COMPACT_MIN = graph_module.COMPACT_MIN, 3
+        try:
+            for i in range(5):
+                reviews[f"r{i}"] = {"id": f"r{i}", "commentor_user_id": "ann", "place_id": f"p{i}"}
+                changes.publish("Review", "create", f"r{i}", reviews[f"r{i}"])
+        finally:
+            graph_module.COMPACT_MIN = minimum
+        self.assertEqual(graph.stats()["pending_changes"], 1)
+        self.assertEqual(len(graph.reviewed_places("ann")), 5)
+
+    def test_endpoints(self):
+        """ the co-review endpoints """
+        client = app.test_client()
+        place_id = next(iter(review_data.values()))['place_id']
+        if place_id in place_data:
+            reviewers = client.get(f'/api/v1/places/{place_id}/reviewers').get_json()
+            self.assertTrue(all("password" not in u for u in reviewers))
+            self.assertEqual(
+                client.get(f'/api/v1/places/{place_id}/also_reviewed?k=2').status_code, 200)
+        top = client.get('/api/v1/reviewers/top?k=1').get_json()
+        self.assertEqual(len(top), 1)
+        with patch.dict(os.environ, {"HBNB_ADMIN_KEY": "admin"}):
+            graph = client.get('/api/v1/admin/review_graph',
+                               headers={"X-Admin-Key": "admin"}).get_json()
+        self.assertEqual(graph["reviews"], len(review_data))
+        self.assertEqual(client.get('/api/v1/reviewers/top?k=0').status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
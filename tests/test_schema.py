@@ -0,0 +1,48 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from models.place import Place
+from models.user import User
+
+class TestSchema(unittest.TestCase):
+    """Test that the model schemas work as expected
+    """
+
+    def test_check(self):
+        """ single field checks return the value or raise ValueError """
+        self.assertEqual(User.schema.check("first_name", "Peter"), "Peter")
+        with self.assertRaises(ValueError):
+            User.schema.check("first_name", "P3ter")
+        with self.assertRaises(ValueError):
+            Place.schema.check("latitude", 91)
+
+    def test_validate_batch(self):
+        """ every error of every row is collected """
+        rows = [
+            {"first_name": "Peter", "last_name": "Parker",
+             "email": "peter@dailybugle.com", "password": "123321"},
+            {"first_name": "M4ry", "last_name": "Jane",
+             "email": "not an email", "password": "123321"},
+            {"first_name": "Gwen", "last_name": "Stacy", "email": "gwen@esu.edu"},
+        ]
+        valid, errors = User.schema.validate_batch(rows)
+
+        self.assertEqual(len(valid), 1)
+        self.assertEqual(valid[0]["first_name"], "Peter")
+        self.assertEqual(sorted(errors), [1, 2])
+        self.assertEqual(len(errors[1]), 2)
+        self.assertEqual(errors[2], ["Missing password"])
+        # cleaned as validate() cleans them: the password is stored hashed
+        self.assertTrue(valid[0]["password"].startswith("scrypt$"))
+        self.assertTrue(User.schema.validate(rows[0])["password"].startswith("scrypt$"))
+
+    def test_validate_batch_partial(self):
+        """ missing fields are allowed when required is False """
+        valid, errors = Place.schema.validate_batch([{"name": "Cosy flat", "max_guests": 2},
+                                                     {"max_guests": 0}], required=False)
+        self.assertEqual(valid, [{"name": "Cosy flat", "max_guests": 2}])
+        self.assertEqual(list(errors), [1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from app import app
+from data import user_data
+from models.user import User
+from services import sessions
+from services.sessions import SessionManager, MemoryRevocations, SqliteRevocations
+
+class TestSessions(unittest.TestCase):
+    """Test the session tokens
+    """
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "sessions.sqlite")
+        # the signups must not append to the tracked data/user.json
+        patcher = patch.object(User, "save", return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_tokens(self):
+        """ signed, expiring and revocable, with both stores """
+        for store in (MemoryRevocations(), SqliteRevocations(self.path, ttl=60)):
+            manager = SessionManager(secret=b"k" * 32, ttl=60, store=store)
+            token, expires = manager.issue("user-1", now=1000)
+            self.assertEqual(expires, 1060)
+
+            self.assertEqual(manager.validate(token, now=1001), "user-1")
+            self.assertEqual(manager.validate(token, now=1002), "user-1")
+            self.assertEqual(manager.cache_hits, 1)
+            self.assertIsNone(manager.validate(token, now=1060))
+            self.assertIsNone(manager.validate(token.replace("user-1", "user-2"), now=1001))
+            self.assertIsNone(SessionManager(secret=b"x" * 32, store=store)
+                              .validate(token, now=1001))
+
+            manager.revoke(token, now=1001)
+            self.assertIsNone(manager.validate(token, now=1001))
+
+            other, _ = manager.issue("user-1", now=1000)
+            manager.revoke_user("user-1", now=1030)
+            self.assertIsNone(manager.validate(other, now=1031))
+
+    def test_shared_revocations(self):
+        """ a logout on one worker holds on the others sharing the sqlite file """
+        workers = [SessionManager(secret=b"k" * 32, ttl=60, store=SqliteRevocations(self.path))
+                   for _ in range(2)]
+        token, _ = workers[0].issue("user-1", now=1000)
+        self.assertEqual(workers[1].validate(token, now=1001), "user-1")
+        workers[0].revoke(token, now=1001)
+        self.assertIsNone(workers[1].validate(token, now=1002))
+
+    def test_secret_required(self):
+        """ several workers can't each make their own key """
+        with patch.dict(os.environ, {"HBNB_SECRET_KEY": ""}):
+            sessions.check_secret(1)
+            with self.assertRaises(RuntimeError):
+                sessions.check_secret(2)
+
+    def test_login_logout(self):
+        """ the token of a login works until logout """
+        client = app.test_client()
+        user = client.post('/api/v1/users', json={
+            "first_name": "Arthur", "last_name": "Curry",
+            "email": "arthur@atlantis.com", "password": "trident1"}).get_json()
+        try:
+            token = client.post('/api/v1/auth/login', json={
+                "email": "arthur@atlantis.com", "password": "trident1"}).get_json()["token"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            self.assertEqual(client.get('/api/v1/auth/me', headers=headers).get_json()["id"],
+                             user["id"])
+            self.assertEqual(client.post('/api/v1/auth/logout', headers=headers).status_code, 204)
+            self.assertEqual(client.get('/api/v1/auth/me', headers=headers).status_code, 401)
+            self.assertEqual(client.get('/api/v1/auth/me').status_code, 401)
+        finally:
+            client.delete(f'/api/v1/users/{user["id"]}')
+        self.assertNotIn(user["id"], user_data)
+
+    def test_admin_key(self):
+        """ the admin routes answer 401 without the admin key """
+        client = app.test_client()
+        routes = [("GET", '/api/v1/admin/snapshots'), ("POST", '/api/v1/admin/snapshots'),
+                  ("GET", '/api/v1/admin/partitions'), ("GET", '/api/v1/admin/review_graph'),
+                  ("GET", '/api/v1/admin/startup')]
+        with patch.dict(os.environ, {"HBNB_ADMIN_KEY": ""}):
+            # no admin key set: nobody gets in
+            self.assertEqual(client.get('/api/v1/admin/startup',
+                                        headers={"X-Admin-Key": ""}).status_code, 401)
+        with patch.dict(os.environ, {"HBNB_ADMIN_KEY": "admin"}):
+            for method, path in routes:
+                self.assertEqual(client.open(path, method=method).status_code, 401)
+                self.assertEqual(client.open(path, method=method,
+                                             headers={"X-Admin-Key": "nope"}).status_code, 401)
+            self.assertEqual(client.get('/api/v1/admin/startup',
+                                        headers={"X-Admin-Key": "admin"}).status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import unittest
+from app import app
+from data import place_data
+from services.changes import ChangeFeed
+from services.similar_places import SimilarPlaces
+
+class TestSimilarPlaces(unittest.TestCase):
+    """Test the places like this one
+    """
+
+    def test_similar(self):
+        """ the lists follow the changes of the places and the amenities """
+        amenities = {a: {"id": a} for a in ("wifi", "pool", "gym", "spa", "bar")}
+        places = {
+            "a": {"price_per_night": 100.0, "max_guests": 2, "latitude": -37.8, "longitude": 145.0},
+            "b": {"price_per_night": 110.0, "max_guests": 2, "latitude": -37.8, "longitude": 145.1},
+            "c": {"price_per_night": 900.0, "max_guests": 8, "latitude": -37.9, "longitude": 145.0},
+            "far": {"price_per_night": 100.0, "max_guests": 2, "latitude": 40.7, "longitude": -74.0},
+        }
+        place_amenities = {"a": ["wifi", "pool", "gym"], "b": ["wifi", "pool", "gym"],
+                           "c": ["spa"], "far": ["bar"]}
+        changes = ChangeFeed()
+        similar = SimilarPlaces(places, amenities, place_amenities, k=2)
+        changes.subscribe(similar.on_change)
+
+        self.assertEqual([p for _, p in similar.similar("a")], ["b", "c"])
+        self.assertEqual(similar.similar("far"), [])
+        self.assertIsNone(similar.similar("nowhere"))
+
+        # the same amenities as "a" makes "far" a candidate through the LSH bands
+        place_amenities["far"] = ["wifi", "pool", "gym"]
+        changes.publish("Place", "update", "far", places["far"])
+        self.assertEqual([p for _, p in similar.similar("far")], ["a", "b"])
+        self.assertIn("far", [p for _, p in similar.similar("a")])
+
+        del places["b"]
+        changes.publish("Place", "delete", "b")
+        self.assertNotIn("b", [p for _, p in similar.similar("a")])
+
+        del amenities["gym"]
+        changes.publish("Amenity", "delete", "gym")
+        scores = dict((p, s) for s, p in similar.similar("a"))
+        self.assertGreater(scores["far"], scores["c"])
+
+    def test_endpoint(self):
+        """ the similar places of a place """
+        client = app.test_client()
+        place_id = next(k for k, v in place_data.items() if v.get('city_id'))
+        rows = client.get(f'/api/v1/places/{place_id}/similar?k=3').get_json()
+        self.assertLessEqual(len(rows), 3)
+        self.assertNotIn(place_id, [row["id"] for row in rows])
+        self.assertEqual(rows, sorted(rows, key=lambda row: -row["similarity"]))
+        self.assertEqual(client.get('/api/v1/places/nowhere/similar').status_code, 404)
+
+    def test_stable_signatures(self):
+        """ the LSH bands of a place don't depend on the order the amenities were seen in """
+        amenities = {a: {"id": a} for a in ("wifi", "pool", "gym", "spa")}
+        place = {"price_per_night": 100.0, "max_guests": 2, "latitude": 1.0, "longitude": 1.0}
+        bands = []
+        for first in ("spa", "wifi"):
+            similar = SimilarPlaces({"x": place, "y": place}, amenities,
+                                    {"x": [first], "y": ["wifi", "pool", "gym"]})
+            similar.similar("x")
+            bands.append(similar._features["y"].bands)  # pylint: disable=protected-access
+        self.assertEqual(bands[0], bands[1])
+
+if __name__ == '__main__':
+    unittest.main()
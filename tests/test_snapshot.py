@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+""" Unittests for HBnB Evolution Part 1 """
+
+import json
+import os
+import tempfile
+import unittest
+from data.file_storage import write_json_atomic
+from data.snapshot import Snapshotter, latest, restore, snapshots, verify
+from services.changes import ChangeFeed
+
+class TestSnapshot(unittest.TestCase):
+    """Test the atomic saves and the snapshots of the stores
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.feed = ChangeFeed()
+        self.stores = {
+            "city.json": {"1": {"id": "1", "name": "Paris"}},
+            "place_to_amenity.json": {"p": ["a", "b"]},
+        }
+        self.snapshotter = Snapshotter(self.feed, self.stores,
+                                       os.path.join(self.tmp.name, "snapshots"))
+        self.feed.subscribe(self.snapshotter.on_change)
+
+    def test_atomic_write(self):
+        """ the file is replaced and no temporary file is left behind """
+        path = os.path.join(self.tmp.name, "city.json")
+        write_json_atomic(path, {"City": []})
+        write_json_atomic(path, {"City": [{"id": "1"}]}, indent=4)
+
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"City": [{"id": "1"}]})
+        self.assertEqual(os.listdir(self.tmp.name), ["city.json"])
+
+    def test_snapshot_and_restore(self):
+        """ unchanged stores are linked and a snapshot restores into a data folder """
+        first = self.snapshotter.take()
+        self.assertEqual(first["seq"], 0)
+        self.assertEqual(self.snapshotter.take(), first)
+
+        self.stores["city.json"]["2"] = {"id": "2", "name": "Lyon"}
+        self.feed.publish("City", "create", "2", self.stores["city.json"]["2"])
+        second = self.snapshotter.take()
+        self.assertEqual(second["files"]["city.json"]["rows"], 2)
+        self.assertEqual(len(snapshots(self.snapshotter.directory)), 2)
+        path = latest(self.snapshotter.directory)
+        self.assertEqual(os.stat(os.path.join(path, "place_to_amenity.json")).st_nlink, 2)
+
+        data_dir = os.path.join(self.tmp.name, "data")
+        os.makedirs(data_dir)
+        restore(path, data_dir)
+        with open(os.path.join(data_dir, "place_to_amenity.json"), encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)["Place_to_Amenity"]), 2)
+
+        with open(os.path.join(path, "city.json"), "a", encoding="utf-8") as f:
+            f.write(" ")
+        with self.assertRaises(ValueError):
+            verify(path)
+
+if __name__ == '__main__':
+    unittest.main()